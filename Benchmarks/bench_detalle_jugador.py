@@ -0,0 +1,99 @@
+"""
+Benchmark de la construcción de la respuesta de detalle de jugador:
+respuesta armada directamente como dict frente a la validación con los schemas Pydantic.
+También comprueba que ambos caminos producen exactamente la misma respuesta.
+
+Uso (desde la raíz del proyecto):
+    python -m Benchmarks.bench_detalle_jugador [--jugadores 200] [--repeticiones 5] [--json]
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+
+from Benchmarks.datos_sinteticos import generar_torneo
+from Services import estadistica_service
+from Utils import estadistica_util
+
+
+def preparar_casos(jugadores: int):
+    """Jugadores sintéticos con sus acciones ya acumuladas, como los recibe construir_detalle_jugador."""
+    datos = generar_torneo()
+    paises = {p['id']: p['nombre'] for p in datos['paises']}
+    acumulados = defaultdict(estadistica_util.AcumuladorJugador)
+    partidos = defaultdict(set)
+    acciones_equipo = defaultdict(int)
+    for partido in datos['historial']:
+        for accion in partido['acciones']:
+            clave = (accion['jugador'], accion['equipo'])
+            acumulados[clave].agregar(accion)
+            partidos[clave].add(partido['_id'])
+            acciones_equipo[clave] += len(partido['acciones']) // 2
+
+    casos = []
+    for jugador in datos['jugadores'][:jugadores]:
+        jugador = dict(jugador, pais=paises[jugador['pais_id']])
+        clave = (jugador['nombre'], jugador['pais'])
+        casos.append((jugador, acumulados[clave], len(partidos[clave]), acciones_equipo[clave]))
+    return casos
+
+
+def medir(casos, validar: bool, repeticiones: int):
+    """Microsegundos por respuesta en cada repetición."""
+    estadistica_service.VALIDAR_RESPUESTAS = validar
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for caso in casos:
+            estadistica_service.construir_detalle_jugador(*caso)
+        tiempos.append((time.perf_counter() - inicio) / len(casos) * 1e6)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la respuesta de detalle de jugador")
+    parser.add_argument('--jugadores', type=int, default=200)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Imprimir los resultados como JSON")
+    args = parser.parse_args()
+
+    casos = preparar_casos(args.jugadores)
+
+    # Ambos caminos deben producir la misma respuesta (incluidos los tipos)
+    for caso in casos:
+        estadistica_service.VALIDAR_RESPUESTAS = True
+        validada = estadistica_service.construir_detalle_jugador(*caso)
+        estadistica_service.VALIDAR_RESPUESTAS = False
+        directa = estadistica_service.construir_detalle_jugador(*caso)
+        if json.dumps(validada, sort_keys=True, default=str) != json.dumps(directa, sort_keys=True, default=str):
+            raise SystemExit(f"Las respuestas difieren para {caso[0]['nombre']}")
+
+    medir(casos, False, 1)  # calentamiento
+    con_validacion = medir(casos, True, args.repeticiones)
+    sin_validacion = medir(casos, False, args.repeticiones)
+
+    mediana_con = statistics.median(con_validacion)
+    mediana_sin = statistics.median(sin_validacion)
+    resultado = {
+        'benchmark': 'detalle_jugador',
+        'jugadores': len(casos),
+        'resultados': {
+            'con_validacion': {'mediana_us': round(mediana_con, 2), 'muestras_us': [round(t, 2) for t in con_validacion]},
+            'sin_validacion': {'mediana_us': round(mediana_sin, 2), 'muestras_us': [round(t, 2) for t in sin_validacion]}
+        },
+        'ahorro_us': round(mediana_con - mediana_sin, 2),
+        'ahorro_porcentaje': round((mediana_con - mediana_sin) / mediana_con * 100, 2)
+    }
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        print(f"Jugadores: {len(casos)}, repeticiones: {args.repeticiones}")
+        print(f"Con validación Pydantic: {mediana_con:9.2f} µs/respuesta")
+        print(f"Dict directo:            {mediana_sin:9.2f} µs/respuesta")
+        print(f"Ahorro: {resultado['ahorro_us']:.2f} µs por respuesta ({resultado['ahorro_porcentaje']:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
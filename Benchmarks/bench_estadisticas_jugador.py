@@ -0,0 +1,69 @@
+"""
+Benchmark de las consultas de estadísticas de jugador (`get_jugador_basic`, `get_jugador_detalle` y el lote
+`get_jugadores_detalle`) sobre un torneo sintético servido en modo offline, con `jugador_stats` materializado.
+
+Uso (desde la raíz del proyecto):
+    python -m Benchmarks.bench_estadisticas_jugador [--jugadores 10] [--repeticiones 5] [--json]
+"""
+import argparse
+import json
+import logging
+import statistics
+import time
+
+from Benchmarks.datos_sinteticos import usar_snapshot_sintetico
+
+
+def medir(funcion, ids, repeticiones: int):
+    """Microsegundos por jugador en cada repetición (tras una pasada de calentamiento)."""
+    funcion(ids)
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(ids)
+        tiempos.append((time.perf_counter() - inicio) / len(ids) * 1e6)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estadísticas de jugador")
+    parser.add_argument('--partidos', type=int, default=64)
+    parser.add_argument('--jugadores', type=int, default=10)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Imprimir los resultados como JSON")
+    args = parser.parse_args()
+
+    usar_snapshot_sintetico(partidos=args.partidos)
+    from Config.database import db
+    from Services import estadistica_service, jugador_stats_service
+
+    logger = logging.getLogger('bench_estadisticas_jugador')
+    logger.disabled = True
+    jugador_stats_service.backfill(logger)
+
+    # Jugadores repartidos entre todas las selecciones
+    todos = [str(j['_id']) for j in db['jugadores'].find({}, {'_id': 1})]
+    ids = todos[::max(1, len(todos) // args.jugadores)][:args.jugadores]
+
+    casos = {
+        'get_jugador_basic': lambda ids: [estadistica_service.get_jugador_basic(i, logger) for i in ids],
+        'get_jugador_detalle': lambda ids: [estadistica_service.get_jugador_detalle(i, logger) for i in ids],
+        'get_jugadores_detalle': lambda ids: estadistica_service.get_jugadores_detalle(ids, logger),
+    }
+    resultados = {}
+    for nombre, funcion in casos.items():
+        tiempos = medir(funcion, ids, args.repeticiones)
+        resultados[nombre] = {'mediana_us': round(statistics.median(tiempos), 2),
+                              'muestras_us': [round(t, 2) for t in tiempos]}
+    resultado = {'benchmark': 'estadisticas_jugador', 'jugadores': len(ids), 'resultados': resultados}
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        print(f"Jugadores: {len(ids)}, repeticiones: {args.repeticiones}")
+        for nombre, valores in resultados.items():
+            print(f"{nombre:<25}{valores['mediana_us']:12.2f} µs/jugador")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark de las estadísticas del torneo: cada función `analizar_*` de `analisis_torneo_service`
+(se incluyen solas las que se agreguen) y `get_estadisticas_torneo` completo, sobre un torneo sintético
+servido en modo offline.
+
+Uso (desde la raíz del proyecto):
+    python -m Benchmarks.bench_torneo [--partidos 64] [--repeticiones 5] [--json]
+"""
+import argparse
+import inspect
+import json
+import logging
+import statistics
+import time
+
+from Benchmarks.datos_sinteticos import usar_snapshot_sintetico
+
+
+def medir(funcion, repeticiones: int):
+    """Microsegundos por llamada en cada repetición (tras una llamada de calentamiento)."""
+    funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    return tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de las estadísticas del torneo")
+    parser.add_argument('--partidos', type=int, default=64)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help="Imprimir los resultados como JSON")
+    args = parser.parse_args()
+
+    usar_snapshot_sintetico(partidos=args.partidos)
+    from Config.database import db
+    from Services import analisis_torneo_service, identidad_service, referencia_service
+
+    logger = logging.getLogger('bench_torneo')
+    logger.disabled = True
+
+    historial = list(db['historial'].find({'estado': 'finalizado'}).sort('_id', 1))
+    identidad_service.obtener_indice(logger).sellar_historial(historial)
+    argumentos = {
+        'historial': historial,
+        'jugadores': list(db['jugadores'].find()),
+        'paises': referencia_service.paises(),
+        'logger': logger,
+    }
+
+    casos = {}
+    for nombre, funcion in inspect.getmembers(analisis_torneo_service, inspect.isfunction):
+        parametros = inspect.signature(funcion).parameters
+        if nombre.startswith('analizar_') and set(parametros) <= set(argumentos):
+            casos[nombre] = (lambda f=funcion, p=list(parametros): f(*(argumentos[n] for n in p)))
+    casos['get_estadisticas_torneo'] = lambda: analisis_torneo_service.get_estadisticas_torneo(logger)
+
+    resultados = {}
+    for nombre, funcion in casos.items():
+        tiempos = medir(funcion, args.repeticiones)
+        resultados[nombre] = {'mediana_us': round(statistics.median(tiempos), 2),
+                              'muestras_us': [round(t, 2) for t in tiempos]}
+    resultado = {'benchmark': 'torneo', 'partidos': len(historial), 'resultados': resultados}
+
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+    else:
+        print(f"Partidos: {len(historial)}, repeticiones: {args.repeticiones}")
+        for nombre, valores in resultados.items():
+            print(f"{nombre:<35}{valores['mediana_us'] / 1000:10.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
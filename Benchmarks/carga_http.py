@@ -0,0 +1,309 @@
+"""
+Prueba de carga HTTP de las rutas de `Routes/estadistica_route.py`: varios clientes concurrentes envían peticiones
+según una mezcla ponderada durante un tiempo fijo y se reporta el throughput y la latencia p50/p95/p99 por endpoint.
+
+Por defecto levanta la aplicación con uvicorn en modo offline (`MONGODB_SNAPSHOT`) sobre un torneo sintético,
+así que no necesita MongoDB. Para comparar dos builds, crear el volcado una vez y apuntar cada corrida a él
+(o a un servidor ya levantado con `--url`, que debe servir ese mismo volcado):
+
+Uso (desde la raíz del proyecto):
+    python -m Benchmarks.carga_http [--concurrencia 16] [--duracion 20] [--workers 1] [--json]
+    python -m Benchmarks.carga_http --mezcla torneo=1,jugador_detalle=5,pais=2 --concurrencia 64
+    python -m Benchmarks.carga_http --snapshot ./snapshot --url http://localhost:8105 --api-key <clave>
+"""
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+from urllib.parse import quote, urlsplit
+
+import bson
+
+from Benchmarks.datos_sinteticos import escribir_snapshot
+from Config.settings import PREFIX_SERVER_PATH
+
+METRICAS_RANKING = ('exito_pases', 'precision_tiros', 'indice_creacion', 'eficiencia_defensiva')
+
+# Endpoint -> (método, ruta de estadistica_route.py, peso por defecto, constructor de la petición concreta).
+# `finalizado` escribe (idempotente) e invalida la versión de los datos, por eso no entra en la mezcla por defecto.
+ENDPOINTS = {
+    'torneo': ('GET', '/torneo', 1, lambda ids, rng: ('/torneo', None)),
+    'torneo_cambios': ('GET', '/torneo/cambios', 1, lambda ids, rng: ('/torneo/cambios?desde=1', None)),
+    'pais': ('GET', '/pais/{id}', 3, lambda ids, rng: (f"/pais/{rng.choice(ids['paises'])}", None)),
+    'ciudad': ('GET', '/ciudad/{id}', 2, lambda ids, rng: (f"/ciudad/{rng.choice(ids['ciudades'])}", None)),
+    'jugador': ('GET', '/jugador/{id}', 3, lambda ids, rng: (f"/jugador/{rng.choice(ids['jugadores'])}", None)),
+    'jugador_detalle': ('GET', '/jugador-detail/{id}', 5,
+                        lambda ids, rng: (f"/jugador-detail/{rng.choice(ids['jugadores'])}", None)),
+    'jugadores_detalle': ('POST', '/jugadores/detalle', 1,
+                          lambda ids, rng: ('/jugadores/detalle', {'ids': rng.sample(ids['jugadores'], 20)})),
+    'ranking': ('GET', '/ranking/{metrica}', 2,
+                lambda ids, rng: (f"/ranking/{rng.choice(METRICAS_RANKING)}?top=10", None)),
+    'timeline': ('GET', '/partido/{id}/timeline', 2,
+                 lambda ids, rng: (f"/partido/{rng.choice(ids['historial'])}/timeline", None)),
+    'finalizado': ('POST', '/partido/{id}/finalizado', 0,
+                   lambda ids, rng: (f"/partido/{rng.choice(ids['historial'])}/finalizado", None)),
+    'confederacion': ('GET', '/confederacion/{id}', 1, lambda ids, rng: (f"/confederacion/{rng.randint(1, 6)}", None)),
+    'mapa_calor': ('GET', '/mapa-calor', 1, lambda ids, rng: ('/mapa-calor', None)),
+    'mapa_calor_equipos': ('GET', '/mapa-calor/equipos', 1, lambda ids, rng: ('/mapa-calor/equipos', None)),
+    'mapa_calor_equipo': ('GET', '/mapa-calor/equipo/{nombre}', 1,
+                          lambda ids, rng: (f"/mapa-calor/equipo/{quote(rng.choice(ids['equipos']))}", None)),
+    'mapa_calor_jugador': ('GET', '/mapa-calor/jugador/{id}', 1,
+                           lambda ids, rng: (f"/mapa-calor/jugador/{rng.choice(ids['jugadores'])}", None)),
+    'export': ('GET', '/export/{tabla}', 0.2, lambda ids, rng: ('/export/partidos?formato=csv', None)),
+}
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not valores:
+        return 0.0
+    return valores[min(len(valores) - 1, max(0, math.ceil(p / 100 * len(valores)) - 1))]
+
+
+def leer_ids(directorio: str) -> Dict[str, List[str]]:
+    """Identificadores con los que se construyen las peticiones, leídos del volcado `.bson`."""
+    def documentos(nombre):
+        ruta = os.path.join(directorio, f"{nombre}.bson")
+        if not os.path.exists(ruta):
+            return []
+        with open(ruta, 'rb') as archivo:
+            return list(bson.decode_file_iter(archivo))
+
+    historial = documentos('historial')
+    return {
+        'paises': [str(p['_id']) for p in documentos('paises')],
+        'ciudades': [str(c['_id']) for c in documentos('ciudades')],
+        'jugadores': [str(j['_id']) for j in documentos('jugadores')],
+        'historial': [str(h['_id']) for h in historial],
+        # Selecciones que jugaron al menos un partido (las demás no tienen mapa de calor)
+        'equipos': sorted({h[lado] for h in historial for lado in ('equipo_local', 'equipo_visitante')}),
+    }
+
+
+def parsear_mezcla(texto: Optional[str]) -> Dict[str, float]:
+    if not texto:
+        return {nombre: endpoint[2] for nombre, endpoint in ENDPOINTS.items() if endpoint[2] > 0}
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        if nombre.strip() not in ENDPOINTS:
+            raise SystemExit(f"Endpoint desconocido: {nombre}. Disponibles: {', '.join(ENDPOINTS)}")
+        mezcla[nombre.strip()] = float(peso or 1)
+    return mezcla
+
+
+class Servidor:
+    """La aplicación en un proceso uvicorn aparte, en modo offline sobre el volcado."""
+
+    def __init__(self, snapshot: str, api_key: str, workers: int):
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            self.puerto = s.getsockname()[1]
+        entorno = dict(os.environ, MONGODB_SNAPSHOT=snapshot, SECRET_KEY=api_key, INDICES_AL_INICIO='no')
+        raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.proceso = subprocess.Popen(
+            [sys.executable, '-m', 'uvicorn', 'app:app', '--port', str(self.puerto), '--workers', str(workers),
+             '--log-level', 'warning'],
+            cwd=raiz, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.url = f"http://127.0.0.1:{self.puerto}"
+
+    def esperar(self, segundos: float = 60) -> None:
+        limite = time.monotonic() + segundos
+        while time.monotonic() < limite:
+            if self.proceso.poll() is not None:
+                raise SystemExit("El servidor terminó al iniciar")
+            try:
+                conexion = http.client.HTTPConnection('127.0.0.1', self.puerto, timeout=2)
+                conexion.request('GET', '/openapi.json')
+                if conexion.getresponse().status == 200:
+                    return
+            except OSError:
+                time.sleep(0.2)
+        raise SystemExit("El servidor no respondió a tiempo")
+
+    def detener(self) -> None:
+        self.proceso.terminate()
+        try:
+            self.proceso.wait(10)
+        except subprocess.TimeoutExpired:
+            self.proceso.kill()
+
+
+class Cliente:
+    """Conexión keep-alive de un cliente concurrente."""
+
+    def __init__(self, url: str, api_key: str):
+        partes = urlsplit(url)
+        self.host, self.puerto = partes.hostname, partes.port or 80
+        self.cabeceras = {'api-key': api_key, 'Accept-Encoding': 'gzip'}
+        self.conexion = None
+
+    def enviar(self, metodo: str, ruta: str, cuerpo) -> int:
+        if self.conexion is None:
+            self.conexion = http.client.HTTPConnection(self.host, self.puerto, timeout=120)
+        cabeceras = dict(self.cabeceras)
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode()
+            cabeceras['Content-Type'] = 'application/json'
+        try:
+            self.conexion.request(metodo, PREFIX_SERVER_PATH + ruta, body=datos, headers=cabeceras)
+            respuesta = self.conexion.getresponse()
+            respuesta.read()
+            return respuesta.status
+        except (OSError, http.client.HTTPException):
+            self.conexion.close()
+            self.conexion = None
+            return 0
+
+
+def rutas_sin_cubrir(url: str) -> List[str]:
+    """Rutas de la API (según /openapi.json) que ningún endpoint de la prueba ejercita."""
+    partes = urlsplit(url)
+    conexion = http.client.HTTPConnection(partes.hostname, partes.port or 80, timeout=10)
+    conexion.request('GET', '/openapi.json')
+    rutas = json.loads(conexion.getresponse().read())['paths']
+    cubiertas = {PREFIX_SERVER_PATH + endpoint[1] for endpoint in ENDPOINTS.values()}
+    return sorted(ruta for ruta in rutas if ruta.startswith(PREFIX_SERVER_PATH) and ruta not in cubiertas
+                  and not ruta.startswith(PREFIX_SERVER_PATH + '/test'))
+
+
+def correr(url: str, api_key: str, ids: Dict[str, List[str]], mezcla: Dict[str, float], concurrencia: int,
+           duracion: float, semilla: int) -> Dict:
+    nombres = list(mezcla)
+    pesos = [mezcla[nombre] for nombre in nombres]
+    latencias = defaultdict(list)
+    errores = defaultdict(int)
+    lock = threading.Lock()
+
+    # Calentamiento: cada endpoint una vez, sin medir (cálculos y cachés iniciales)
+    cliente = Cliente(url, api_key)
+    rng = random.Random(semilla)
+    for nombre in nombres:
+        metodo, _, _, construir = ENDPOINTS[nombre]
+        cliente.enviar(metodo, *construir(ids, rng))
+
+    inicio = time.perf_counter()
+    fin = inicio + duracion
+
+    def trabajar(numero: int):
+        cliente = Cliente(url, api_key)
+        rng = random.Random(semilla + numero)
+        propias, propios_errores = defaultdict(list), defaultdict(int)
+        while time.perf_counter() < fin:
+            nombre = rng.choices(nombres, pesos)[0]
+            metodo, _, _, construir = ENDPOINTS[nombre]
+            ruta, cuerpo = construir(ids, rng)
+            t0 = time.perf_counter()
+            estado = cliente.enviar(metodo, ruta, cuerpo)
+            propias[nombre].append((time.perf_counter() - t0) * 1000)
+            if not 200 <= estado < 400:
+                propios_errores[nombre] += 1
+        with lock:
+            for nombre, valores in propias.items():
+                latencias[nombre].extend(valores)
+            for nombre, total in propios_errores.items():
+                errores[nombre] += total
+
+    hilos = [threading.Thread(target=trabajar, args=(i,)) for i in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    endpoints = {}
+    for nombre in nombres:
+        valores = sorted(latencias[nombre])
+        endpoints[nombre] = {
+            'peticiones': len(valores),
+            'errores': errores[nombre],
+            'rps': round(len(valores) / transcurrido, 2),
+            'p50_ms': round(percentil(valores, 50), 2),
+            'p95_ms': round(percentil(valores, 95), 2),
+            'p99_ms': round(percentil(valores, 99), 2),
+            'max_ms': round(valores[-1], 2) if valores else 0.0,
+        }
+    total = sum(e['peticiones'] for e in endpoints.values())
+    return {
+        'benchmark': 'carga_http',
+        'url': url,
+        'concurrencia': concurrencia,
+        'duracion_s': round(transcurrido, 2),
+        'peticiones': total,
+        'errores': sum(e['errores'] for e in endpoints.values()),
+        'rps': round(total / transcurrido, 2),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP con latencias p50/p95/p99 por endpoint")
+    parser.add_argument('--concurrencia', type=int, default=16, help="Clientes concurrentes")
+    parser.add_argument('--duracion', type=float, default=20, help="Segundos de medición")
+    parser.add_argument('--mezcla', help="Pesos por endpoint, p. ej. torneo=1,pais=3 (por defecto todos los de lectura)")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos uvicorn del servidor levantado")
+    parser.add_argument('--snapshot', help="Volcado a servir (por defecto se genera un torneo sintético)")
+    parser.add_argument('--partidos', type=int, default=64, help="Partidos del torneo sintético")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--url', help="Servidor ya levantado (sirviendo el mismo --snapshot) en lugar de uno propio")
+    parser.add_argument('--api-key', default='carga', help="Cabecera api-key")
+    parser.add_argument('--salida', help="Guardar el reporte JSON en este archivo")
+    parser.add_argument('--json', action='store_true', help="Imprimir los resultados como JSON")
+    args = parser.parse_args()
+
+    mezcla = parsear_mezcla(args.mezcla)
+    with tempfile.TemporaryDirectory(prefix='carga-http-') as temporal:
+        snapshot = args.snapshot
+        if not snapshot:
+            if args.url:
+                parser.error("Con --url indicar el --snapshot que sirve ese servidor")
+            snapshot = temporal
+            escribir_snapshot(snapshot, partidos=args.partidos, semilla=args.semilla)
+        ids = leer_ids(snapshot)
+
+        servidor = None
+        url = args.url
+        if not url:
+            servidor = Servidor(snapshot, args.api_key, args.workers)
+            url = servidor.url
+        try:
+            if servidor:
+                servidor.esperar()
+            resultado = correr(url, args.api_key, ids, mezcla, args.concurrencia, args.duracion, args.semilla)
+            resultado['workers'] = args.workers if servidor else None
+            resultado['rutas_sin_cubrir'] = rutas_sin_cubrir(url)
+        finally:
+            if servidor:
+                servidor.detener()
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+    if args.json:
+        print(json.dumps(resultado, ensure_ascii=False))
+        return
+
+    print(f"{url}: {resultado['concurrencia']} clientes, {resultado['duracion_s']}s, "
+          f"{resultado['peticiones']} peticiones ({resultado['rps']} req/s), {resultado['errores']} errores")
+    print(f"{'endpoint':<20}{'req':>7}{'err':>6}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for nombre, stats in resultado['endpoints'].items():
+        print(f"{nombre:<20}{stats['peticiones']:>7}{stats['errores']:>6}{stats['rps']:>9.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+    if resultado['rutas_sin_cubrir']:
+        print(f"Rutas sin cubrir: {', '.join(resultado['rutas_sin_cubrir'])}")
+
+
+if __name__ == '__main__':
+    main()
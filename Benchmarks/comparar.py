@@ -0,0 +1,161 @@
+"""
+Compuerta de regresiones de rendimiento: compara los resultados JSON de los benchmarks con la línea base
+guardada en `Benchmarks/linea_base.json` y termina con error si alguna métrica empeoró más de la tolerancia.
+
+Cada métrica es `<benchmark>.<caso>` (p. ej. `torneo.analizar_local_visitante`). Para controlar el ruido cada
+benchmark se corre varias veces y se compara la mediana de las medianas; además, una diferencia menor que
+`--umbral-us` nunca cuenta como regresión.
+
+Uso (desde la raíz del proyecto):
+    python -m Benchmarks.comparar [--corridas 3] [--tolerancia 0.2]     # corre los benchmarks y compara
+    python -m Benchmarks.comparar resultados/*.json                      # compara salidas `--json` ya generadas
+    python -m Benchmarks.comparar --guardar                              # actualiza la línea base
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+BENCHMARKS = ('bench_torneo', 'bench_estadisticas_jugador', 'bench_detalle_jugador')
+LINEA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+TOLERANCIA = 0.20
+UMBRAL_US = 50.0
+
+REGRESION = 'REGRESIÓN'
+MEJORA = 'mejora'
+IGUAL = 'ok'
+NUEVA = 'nueva'
+SIN_DATOS = 'sin datos'
+
+
+def correr_benchmarks(nombres: Iterable[str], corridas: int) -> List[Dict]:
+    """Corre cada benchmark `corridas` veces en un proceso propio y devuelve sus resultados JSON."""
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    resultados = []
+    for nombre in nombres:
+        for corrida in range(corridas):
+            print(f"{nombre} ({corrida + 1}/{corridas})...", file=sys.stderr)
+            salida = subprocess.run([sys.executable, '-m', f'Benchmarks.{nombre}', '--json'], cwd=raiz,
+                                    capture_output=True, text=True, check=True).stdout
+            resultados.append(json.loads([linea for linea in salida.splitlines() if linea.startswith('{')][-1]))
+    return resultados
+
+
+def leer_resultados(rutas: Iterable[str]) -> List[Dict]:
+    """Resultados de archivos con la salida `--json` de un benchmark (un objeto, una lista o uno por línea)."""
+    resultados = []
+    for ruta in rutas:
+        with open(ruta, encoding='utf-8') as archivo:
+            contenido = archivo.read().strip()
+        try:
+            datos = json.loads(contenido)
+            resultados.extend(datos if isinstance(datos, list) else [datos])
+        except json.JSONDecodeError:
+            resultados.extend(json.loads(linea) for linea in contenido.splitlines() if linea.strip())
+    return resultados
+
+
+def medianas(resultados: Iterable[Dict]) -> Dict[str, float]:
+    """Mediana entre corridas de la mediana de cada caso, por métrica `<benchmark>.<caso>`."""
+    valores = defaultdict(list)
+    for resultado in resultados:
+        for caso, medida in resultado['resultados'].items():
+            valores[f"{resultado['benchmark']}.{caso}"].append(medida['mediana_us'])
+    return {metrica: round(statistics.median(lista), 2) for metrica, lista in sorted(valores.items())}
+
+
+def comparar(base: Dict[str, float], actual: Dict[str, float], tolerancia: float = TOLERANCIA,
+             umbral_us: float = UMBRAL_US) -> List[Dict]:
+    """Una fila por métrica con el cambio relativo y su estado respecto a la línea base."""
+    filas = []
+    for metrica in sorted(set(base) | set(actual)):
+        anterior, nuevo = base.get(metrica), actual.get(metrica)
+        if anterior is None or nuevo is None:
+            estado = NUEVA if anterior is None else SIN_DATOS
+            filas.append({'metrica': metrica, 'base_us': anterior, 'actual_us': nuevo, 'cambio': None,
+                          'estado': estado})
+            continue
+        cambio = (nuevo - anterior) / anterior if anterior else 0.0
+        if cambio > tolerancia and nuevo - anterior > umbral_us:
+            estado = REGRESION
+        elif cambio < -tolerancia and anterior - nuevo > umbral_us:
+            estado = MEJORA
+        else:
+            estado = IGUAL
+        filas.append({'metrica': metrica, 'base_us': anterior, 'actual_us': nuevo, 'cambio': round(cambio, 4),
+                      'estado': estado})
+    return filas
+
+
+def _tiempo(microsegundos) -> str:
+    if microsegundos is None:
+        return '-'
+    if microsegundos >= 1000:
+        return f"{microsegundos / 1000:.2f} ms"
+    return f"{microsegundos:.1f} µs"
+
+
+def imprimir(filas: List[Dict], tolerancia: float) -> None:
+    ancho = max([len(fila['metrica']) for fila in filas] + [7])
+    print(f"{'métrica':<{ancho}}  {'base':>12}  {'actual':>12}  {'cambio':>8}  estado")
+    for fila in filas:
+        cambio = f"{fila['cambio'] * 100:+.1f}%" if fila['cambio'] is not None else '-'
+        print(f"{fila['metrica']:<{ancho}}  {_tiempo(fila['base_us']):>12}  {_tiempo(fila['actual_us']):>12}  "
+              f"{cambio:>8}  {fila['estado']}")
+    regresiones = [fila for fila in filas if fila['estado'] == REGRESION]
+    if regresiones:
+        print(f"\n{len(regresiones)} métricas empeoraron más de {tolerancia * 100:.0f}%: "
+              f"{', '.join(fila['metrica'] for fila in regresiones)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara los benchmarks con la línea base guardada")
+    parser.add_argument('archivos', nargs='*', help="Resultados `--json` ya generados (por defecto se corren)")
+    parser.add_argument('--benchmarks', nargs='+', default=list(BENCHMARKS), choices=BENCHMARKS)
+    parser.add_argument('--corridas', type=int, default=3, help="Veces que se corre cada benchmark")
+    parser.add_argument('--tolerancia', type=float, help=f"Empeoramiento relativo permitido (por defecto el de la "
+                                                         f"línea base o {TOLERANCIA})")
+    parser.add_argument('--umbral-us', type=float, default=UMBRAL_US,
+                        help="Diferencia absoluta mínima para contar una regresión")
+    parser.add_argument('--linea-base', default=LINEA_BASE)
+    parser.add_argument('--guardar', action='store_true', help="Guardar los resultados como nueva línea base")
+    parser.add_argument('--json', action='store_true', help="Imprimir la comparación como JSON")
+    args = parser.parse_args()
+
+    resultados = leer_resultados(args.archivos) if args.archivos else correr_benchmarks(args.benchmarks,
+                                                                                         args.corridas)
+    actual = medianas(resultados)
+
+    if args.guardar:
+        linea_base = {'tolerancia': args.tolerancia or TOLERANCIA, 'corridas': args.corridas, 'metricas': actual}
+        with open(args.linea_base, 'w', encoding='utf-8') as archivo:
+            json.dump(linea_base, archivo, ensure_ascii=False, indent=2)
+            archivo.write('\n')
+        print(f"Línea base guardada en {args.linea_base}: {len(actual)} métricas")
+        return
+
+    if not os.path.exists(args.linea_base):
+        raise SystemExit(f"No existe la línea base {args.linea_base}; generarla con --guardar")
+    with open(args.linea_base, encoding='utf-8') as archivo:
+        linea_base = json.load(archivo)
+    tolerancia = args.tolerancia if args.tolerancia is not None else linea_base.get('tolerancia', TOLERANCIA)
+
+    # Solo se comparan los benchmarks que se corrieron o se leyeron
+    corridos = {metrica.split('.', 1)[0] for metrica in actual}
+    base = {metrica: valor for metrica, valor in linea_base['metricas'].items() if metrica.split('.', 1)[0] in corridos}
+    filas = comparar(base, actual, tolerancia, args.umbral_us)
+
+    if args.json:
+        print(json.dumps({'tolerancia': tolerancia, 'filas': filas}, ensure_ascii=False))
+    else:
+        imprimir(filas, tolerancia)
+    if any(fila['estado'] == REGRESION for fila in filas):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Generador determinista de datos sintéticos del torneo con la forma de las colecciones de MongoDB
+(`paises`, `ciudades`, `jugadores`, `juegos`, `historial`). Lo usan los benchmarks para no depender de datos reales.
+Con `usar_snapshot_sintetico` los servicios leen el torneo desde un volcado local (modo offline).
+"""
+import atexit
+import os
+import random
+import shutil
+import tempfile
+from typing import Dict, List
+
+import bson
+from bson import ObjectId
+
+TIPOS_ACCION = (
+    'Pase', 'Pase', 'Pase', 'Pase', 'Tiro', 'Gol', 'Regate', 'Entrada', 'Intercepcion',
+    'Falta', 'Despeje', 'Atajada', 'Centro', 'Tiro Libre', 'Córner', 'Tarjeta Amarilla'
+)
+SECTORES = (
+    'defensivo', 'defensivo_lateral_izquierdo', 'defensivo_lateral_derecho', 'medio_central',
+    'medio_lateral_izquierdo', 'medio_lateral_derecho', 'ofensivo', 'ofensivo_central', 'ofensivo_area_chica'
+)
+LADOS = ('izquierdo', 'centro', 'derecho')
+IMPORTANCIAS = ('critica', 'alta', 'media', 'baja')
+ATRIBUTOS = (
+    'precision_tiro', 'precision_pase', 'regate', 'fuerza_disparo', 'vision_juego', 'anticipacion',
+    'control_balon', 'juego_aereo', 'velocidad', 'resistencia', 'fuerza_fisica', 'agilidad',
+    'compostura', 'agresividad', 'concentracion', 'forma_actual', 'moral'
+)
+
+
+def generar_jugador(rng: random.Random, id: int, pais_id: int, nombre: str, numero: int) -> Dict:
+    jugador = {
+        '_id': ObjectId(),
+        'id': id,
+        'nombre': nombre,
+        'pais_id': pais_id,
+        'posicion_id': 1 + (numero - 1) % 10,
+        'numero': numero,
+        'titular': 1 if numero <= 11 else 0,
+        'goles': rng.randrange(0, 40),
+        'goles_temp': rng.randrange(0, 5),
+        'faltas': rng.randrange(0, 30),
+        'faltas_temp': rng.randrange(0, 4),
+        'lesiones': rng.randrange(0, 3),
+        'rendimiento': rng.randrange(50, 100),
+        'overall': rng.randrange(55, 95),
+        'pie_habil': rng.choice(('derecho', 'izquierdo', 'ambidiestro')),
+        'especialista_penales': rng.random() < 0.1,
+        'especialista_tiros_libres': rng.random() < 0.1,
+        'bonificaciones': []
+    }
+    for atributo in ATRIBUTOS:
+        jugador[atributo] = rng.randrange(40, 100)
+    return jugador
+
+
+def generar_acciones(rng: random.Random, local: Dict, visitante: Dict, plantillas: Dict[str, List[str]],
+                     total: int) -> List[Dict]:
+    """Acciones de un partido repartidas a lo largo de 95 minutos, ordenadas por tiempo."""
+    acciones = []
+    for i in range(total):
+        equipo = local if rng.random() < 0.5 else visitante
+        minuto = i * 95 // total
+        acciones.append({
+            'clave': f"a{i}",
+            'minuto': minuto,
+            'segundo': rng.randrange(60),
+            'tipo': rng.choice(TIPOS_ACCION),
+            'jugador': rng.choice(plantillas[equipo['nombre']]),
+            'equipo': equipo['nombre'],
+            'descripcion': 'tiro penal' if rng.random() < 0.02 else '',
+            'importancia': rng.choice(IMPORTANCIAS),
+            'sector': rng.choice(SECTORES),
+            'lado': rng.choice(LADOS),
+            'exito': rng.random() < 0.7
+        })
+    return acciones
+
+
+def generar_torneo(equipos: int = 32, jugadores_por_equipo: int = 23, partidos: int = 64,
+                   acciones_por_partido: int = 190, semilla: int = 1) -> Dict[str, List[Dict]]:
+    """
+    Genera un torneo completo. Devuelve los documentos de cada colección;
+    los `juegos` están todos finalizados y cada partido del `historial` apunta a su juego y lleva sus datos.
+    """
+    rng = random.Random(semilla)
+    paises = [
+        {'_id': ObjectId(), 'id': i + 1, 'nombre': f"Pais {i + 1:02d}", 'siglas': f"P{i + 1:02d}",
+         'confederacion_id': 1 + i % 6}
+        for i in range(equipos)
+    ]
+    # Una sede por selección, la de sus partidos como local
+    ciudades = [
+        {'_id': ObjectId(), 'id': pais['id'], 'nombre': f"Ciudad {pais['siglas']}", 'pais_id': pais['id'],
+         'estadio': f"Estadio {pais['siglas']}"}
+        for pais in paises
+    ]
+
+    jugadores = []
+    plantillas = {}
+    for pais in paises:
+        nombres = []
+        for numero in range(1, jugadores_por_equipo + 1):
+            nombre = f"Jugador {numero:02d} {pais['siglas']}"
+            jugadores.append(generar_jugador(rng, len(jugadores) + 1, pais['id'], nombre, numero))
+            nombres.append(nombre)
+        plantillas[pais['nombre']] = nombres
+
+    juegos = []
+    historial = []
+    for k in range(partidos):
+        local, visitante = rng.sample(paises, 2)
+        acciones = generar_acciones(rng, local, visitante, plantillas, acciones_por_partido)
+        goles_local = sum(1 for a in acciones if a['tipo'] == 'Gol' and a['equipo'] == local['nombre'])
+        goles_visitante = sum(1 for a in acciones if a['tipo'] == 'Gol' and a['equipo'] == visitante['nombre'])
+        juego = {
+            '_id': ObjectId(), 'estado': 'finalizado', 'fecha': f"2026-06-{k % 30 + 1:02d}",
+            'fase_id': 1 + k // 48, 'grupo': chr(ord('A') + k % 8), 'jornada': str(k % 3 + 1), 'mundial_id': 1
+        }
+        juegos.append(juego)
+        if goles_local > goles_visitante:
+            ganador = local['nombre']
+        elif goles_visitante > goles_local:
+            ganador = visitante['nombre']
+        else:
+            ganador = 'Empate'
+        historial.append({
+            '_id': ObjectId(),
+            'equipo_local': local['nombre'],
+            'equipo_visitante': visitante['nombre'],
+            'goles_local': goles_local,
+            'goles_visitante': goles_visitante,
+            'ganador': ganador,
+            'asistencia': rng.randrange(20000, 90000),
+            'ubicacion': {'ciudad': f"Ciudad {local['siglas']}", 'pais': local['nombre'],
+                          'estadio': f"Estadio {local['siglas']}"},
+            'tarjetas_amarillas_detalle': [
+                {'jugador': a['jugador'], 'equipo': a['equipo'], 'minuto': a['minuto']}
+                for a in acciones if a['tipo'] == 'Tarjeta Amarilla'
+            ],
+            'tarjetas_rojas_detalle': [],
+            'acciones': acciones,
+            'partido_original_id': str(juego['_id']),
+            # Datos del juego copiados en el historial (desnormalizacion_service)
+            **{campo: juego[campo] for campo in ('estado', 'fecha', 'fase_id', 'grupo', 'jornada', 'mundial_id')}
+        })
+
+    return {'paises': paises, 'ciudades': ciudades, 'jugadores': jugadores, 'juegos': juegos, 'historial': historial}
+
+
+def escribir_snapshot(directorio: str, partidos: int = 64, semilla: int = 1) -> Dict[str, int]:
+    """Escribe el torneo como volcado del modo offline: un archivo `.bson` por colección."""
+    os.makedirs(directorio, exist_ok=True)
+    totales = {}
+    for nombre, documentos in generar_torneo(partidos=partidos, semilla=semilla).items():
+        with open(os.path.join(directorio, f"{nombre}.bson"), 'wb') as archivo:
+            for documento in documentos:
+                archivo.write(bson.encode(documento))
+        totales[nombre] = len(documentos)
+    return totales
+
+
+def usar_snapshot_sintetico(partidos: int = 64, semilla: int = 1) -> str:
+    """
+    Escribe el torneo en un directorio temporal y lo activa con `MONGODB_SNAPSHOT`.
+    Llamar antes de importar `Config.database` (o cualquier servicio).
+    """
+    directorio = tempfile.mkdtemp(prefix='mundial-bench-')
+    atexit.register(shutil.rmtree, directorio, ignore_errors=True)
+    escribir_snapshot(directorio, partidos=partidos, semilla=semilla)
+    os.environ['MONGODB_SNAPSHOT'] = directorio
+    return directorio
@@ -0,0 +1,18 @@
+from pymongo.mongo_client import MongoClient
+from Config.settings import MONGODB_URI, MONGODB_SNAPSHOT, CONSULTAS_LENTAS_MS, CONSULTAS_LENTAS_MUESTREO_EXPLAIN
+
+if MONGODB_SNAPSHOT:
+    # Modo offline: las colecciones se leen del volcado local y las escrituras quedan en memoria
+    from Utils.snapshot_db import BaseDatosSnapshot
+    client = None
+    db = BaseDatosSnapshot(MONGODB_SNAPSHOT)
+else:
+    # Registro de consultas lentas con los listeners de comandos del cliente
+    from Utils.consultas_lentas_util import MonitorConsultasLentas
+    monitores = [MonitorConsultasLentas(CONSULTAS_LENTAS_MS, CONSULTAS_LENTAS_MUESTREO_EXPLAIN)] \
+        if CONSULTAS_LENTAS_MS > 0 else []
+    # Cliente compartido por todos los servicios (un solo pool de conexiones por proceso)
+    client = MongoClient(MONGODB_URI, event_listeners=monitores)
+    for monitor in monitores:
+        monitor.cliente = client
+    db = client['mundial']
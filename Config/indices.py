@@ -0,0 +1,43 @@
+"""
+Índices que necesitan las consultas de los servicios, por colección.
+`Scripts/indices.py` los crea o reconcilia y al iniciar la aplicación se verifica que existan.
+Los nombres son los que genera MongoDB por defecto, de modo que coinciden con los ya creados por `create_index`.
+"""
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+INDICES = {
+    'historial': [
+        # Detalle de jugador: $elemMatch sobre la misma acción (índice multikey compuesto)
+        IndexModel([('acciones.jugador', ASCENDING), ('acciones.equipo', ASCENDING)]),
+        # Partidos de un país o ciudad, paginados por _id descendente
+        IndexModel([('equipo_local', ASCENDING), ('_id', DESCENDING)]),
+        IndexModel([('equipo_visitante', ASCENDING), ('_id', DESCENDING)]),
+        IndexModel([('ubicacion.ciudad', ASCENDING), ('ubicacion.pais', ASCENDING), ('_id', DESCENDING)]),
+        # Historial de un juego (ingesta y desnormalización)
+        IndexModel([('partido_original_id', ASCENDING)]),
+        # Partidos finalizados en orden de _id, con el estado copiado del juego (torneo, versión de los datos,
+        # mapas de calor, confederaciones); mundial y fase para acotar por torneo y fase
+        IndexModel([('estado', ASCENDING), ('_id', ASCENDING)]),
+        IndexModel([('mundial_id', ASCENDING), ('fase_id', ASCENDING), ('grupo', ASCENDING), ('jornada', ASCENDING)]),
+    ],
+    'juegos': [
+        # Juegos finalizados (partido_service.obtener_partidos)
+        IndexModel([('estado', ASCENDING)]),
+    ],
+    'paises': [
+        IndexModel([('id', ASCENDING)]),
+    ],
+    'jugadores': [
+        # Jugadores del torneo por id (goleadores y mejores jugadores de /torneo)
+        IndexModel([('id', ASCENDING)]),
+    ],
+    'jugador_stats': [
+        # Clave única de la que depende la idempotencia de las actualizaciones por partido
+        IndexModel([('jugador', ASCENDING), ('equipo', ASCENDING)], unique=True),
+    ],
+    'torneo_versiones': [
+        IndexModel([('huella', ASCENDING)], unique=True),
+        # Última versión asignada (numero_version)
+        IndexModel([('numero', DESCENDING)]),
+    ],
+}
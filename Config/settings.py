@@ -1,5 +1,55 @@
 import os 
+import tempfile
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 MONGODB_URI = os.getenv("MONGODB_URI")
-PREFIX_SERVER_PATH = '/api/v1'
\ No newline at end of file
+
+# Directorio con un volcado local (mongodump .bson o NDJSON) para trabajar sin MongoDB; vacío = MongoDB en MONGODB_URI
+MONGODB_SNAPSHOT = os.getenv("MONGODB_SNAPSHOT", "")
+
+PREFIX_SERVER_PATH = '/api/v1'
+
+# Coalescencia de peticiones: directorio propio (0700) de locks y resultados entre workers (vacío = solo en proceso)
+COALESCENCIA_DIR = os.getenv("COALESCENCIA_DIR", os.path.join(tempfile.gettempdir(), "mundial-coalescencia"))
+
+# Versión de datos: segundos que se reutiliza la huella antes de volver a consultarla
+VERSION_DATOS_TTL_SEG = float(os.getenv("VERSION_DATOS_TTL_SEG", "5"))
+
+# Estadísticas del torneo: servir el último snapshot mientras se recalcula en segundo plano
+TORNEO_SWR = os.getenv("TORNEO_SWR", "0") == "1"
+# Segundos máximos que se sirve un snapshot desactualizado antes de bloquear hasta recalcular
+TORNEO_MAX_STALENESS_SEG = float(os.getenv("TORNEO_MAX_STALENESS_SEG", "300"))
+
+# Detalle de jugador: leer conteos materializados en `jugador_stats` cuando existan
+JUGADOR_STATS_MATERIALIZADO = os.getenv("JUGADOR_STATS_MATERIALIZADO", "1") == "1"
+
+# Índice de identidades (nombre, selección) -> id: segundos entre comprobaciones de vigencia
+IDENTIDAD_TTL_SEG = float(os.getenv("IDENTIDAD_TTL_SEG", "60"))
+# Antigüedad máxima del índice de identidades antes de reconstruirlo aunque su huella no cambie (renombres externos)
+IDENTIDAD_MAX_EDAD_SEG = float(os.getenv("IDENTIDAD_MAX_EDAD_SEG", "3600"))
+
+# Datos de referencia (paises, confederaciones, ciudades): segundos antes de recargarlos
+REFERENCIA_TTL_SEG = float(os.getenv("REFERENCIA_TTL_SEG", "300"))
+
+# Validar las respuestas de detalle de jugador contra los schemas Pydantic (tests y depuración)
+VALIDAR_RESPUESTAS = os.getenv("VALIDAR_RESPUESTAS", "0") == "1"
+
+# Versiones de las estadísticas del torneo que se conservan en memoria para responder /torneo/cambios
+TORNEO_VERSIONES_RETENIDAS = int(os.getenv("TORNEO_VERSIONES_RETENIDAS", "20"))
+
+# Máximo de respuestas precomprimidas de /pais y /ciudad que se conservan en memoria
+CACHE_RESPUESTAS_MAX = int(os.getenv("CACHE_RESPUESTAS_MAX", "256"))
+
+# Máximo de timelines de marcador que se conservan en memoria por proceso (LRU)
+TIMELINES_CACHE_MAX = int(os.getenv("TIMELINES_CACHE_MAX", "2048"))
+
+# Índices de Config/indices.py al iniciar la aplicación: verificar (advertir si faltan), crear o no
+INDICES_AL_INICIO = os.getenv("INDICES_AL_INICIO", "verificar")
+
+# Segundos entre reconciliaciones de los datos del juego copiados en el historial con `juegos` (0 = solo al iniciar)
+DESNORMALIZACION_INTERVALO_SEG = float(os.getenv("DESNORMALIZACION_INTERVALO_SEG", "30"))
+
+# Consultas lentas: milisegundos a partir de los que se registra una consulta (0 = desactivado)
+CONSULTAS_LENTAS_MS = float(os.getenv("CONSULTAS_LENTAS_MS", "200"))
+# Fracción de las consultas lentas de las que se obtiene el plan con explain()
+CONSULTAS_LENTAS_MUESTREO_EXPLAIN = float(os.getenv("CONSULTAS_LENTAS_MUESTREO_EXPLAIN", "0.1"))
@@ -1,7 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from Config.settings import PREFIX_SERVER_PATH
+from fastapi import APIRouter, HTTPException, Request, Response, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from Config.settings import PREFIX_SERVER_PATH, CACHE_RESPUESTAS_MAX
 from Services import estadistica_service
-from Services import analisis_torneo_service
+from Services import snapshot_torneo_service
+from Services import jugador_stats_service
+from Services import desnormalizacion_service
+from Services import ranking_service
+from Services import confederacion_service
+from Services import mapa_calor_service
+from Services import partido_service
+from Services import exportacion_service
+from Services import version_service
+from Utils import coalescencia_util
+from Utils import compresion_util
+from Schemas.jugador import JugadoresDetalleRequest
 import logging
 import uuid 
 
@@ -12,12 +25,37 @@ process_uuid = uuid.uuid4()
 logging.basicConfig(level=logging.INFO, format=f'%(asctime)s - %(levelname)s - {process_uuid} - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Cuerpos ya serializados y comprimidos de /pais y /ciudad por versión de los datos
+_cache_respuestas = compresion_util.CacheRespuestas(CACHE_RESPUESTAS_MAX)
+
+
+def _responder_cacheado(request: Request, clave: str, calcular):
+    """Sirve la respuesta precomprimida de `clave` para la versión actual de los datos, calculándola si falta."""
+    version = version_service.obtener_version_datos()
+    cuerpo = _cache_respuestas.obtener((clave, version))
+    if cuerpo is None:
+        # Entre workers se comparten los datos (JSON); cada proceso comprime una sola vez
+        cuerpo = coalescencia_util.ejecutar_coalescido(
+            f"cuerpo:{clave}:{version}",
+            lambda: compresion_util.CuerpoPrecomprimido(
+                coalescencia_util.ejecutar_coalescido(f"{clave}:{version}", calcular, logger)),
+            logger, entre_workers=False)
+        _cache_respuestas.guardar((clave, version), cuerpo)
+    return compresion_util.responder(request, cuerpo)
+
 
 @route.get("/pais/{id}", tags=[tag])
-def get_pais_route(id: str):
+def get_pais_route(request: Request, id: str, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None,
+                   expand: Optional[str] = None):
+    """
+    Detalle de un país con una página de sus partidos (resumen por defecto, `expand=acciones` para incluirlas).
+    Para la página siguiente enviar `cursor` con el `siguiente_cursor` recibido.
+    """
     try:
-        respuesta = estadistica_service.get_pais_detalle(id, logger)        
-        return respuesta
+        expandir = expand == "acciones"
+        return _responder_cacheado(
+            request, f"pais:{id}:{limit}:{cursor}:{expandir}",
+            lambda: estadistica_service.get_pais_detalle(id, logger, limit, cursor, expandir))
     except Exception as e:
         logger.error(f"Error al obtener estadisticas: {str(e)}")
         raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
@@ -34,23 +72,155 @@ def get_jugador_route(id: str):
 @route.get("/jugador-detail/{id}", tags=[tag])
 def get_jugador_detail_route(id: str):
     try:
-        respuesta = estadistica_service.get_jugador_detalle(id, logger)        
+        respuesta = coalescencia_util.ejecutar_coalescido(
+            f"jugador-detail:{id}", lambda: estadistica_service.get_jugador_detalle(id, logger), logger)        
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+    
+@route.post("/jugadores/detalle", tags=[tag])
+def post_jugadores_detalle_route(peticion: JugadoresDetalleRequest):
+    """
+    Detalle de varios jugadores (p. ej. una plantilla completa) en una sola petición.
+    Retorna la misma respuesta que /jugador-detail/{id} para cada jugador, en el orden pedido.
+    """
+    try:
+        respuesta = estadistica_service.get_jugadores_detalle(peticion.ids, logger)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+    
+@route.get("/ranking/{metrica}", tags=[tag])
+def get_ranking_route(metrica: str, top: int = Query(10, ge=1, le=100),
+                      posicion: Optional[str] = None, equipo: Optional[str] = None,
+                      min_partidos: int = Query(1, ge=1)):
+    """
+    Top-N jugadores del torneo para una métrica predictiva o analítica
+    (exito_pases, precision_tiros, indice_creacion, eficiencia_defensiva, ...).
+    Filtrable por posición (p. ej. "Delantero Centro"), por selección y por partidos jugados mínimos.
+    fatiga_desgaste y faltas_cometidas se ordenan de menor a mayor.
+    """
+    try:
+        respuesta = ranking_service.get_ranking(metrica, top, posicion, equipo, logger, min_partidos)
+        return respuesta
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+    
+@route.get("/partido/{id}/timeline", tags=[tag])
+def get_timeline_partido_route(id: str):
+    """
+    Evolución del marcador de un partido del historial: estado después de cada gol
+    y mayor déficit que enfrentó cada equipo.
+    """
+    try:
+        respuesta = partido_service.get_timeline_partido(id, logger)
         return respuesta
     except Exception as e:
         logger.error(f"Error al obtener estadisticas: {str(e)}")
         raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.post("/partido/{id}/finalizado", tags=[tag])
+def post_partido_finalizado_route(id: str):
+    """
+    Hook para el servicio que registra los partidos: copia en el historial el estado y los datos del juego
+    e incorpora el partido finalizado a las estadísticas materializadas por jugador (`jugador_stats`).
+    """
+    try:
+        juego = desnormalizacion_service.desnormalizar_partido(id, logger)
+        # Solo los partidos finalizados cuentan en las estadísticas por jugador
+        actualizados = 0
+        if juego.get('estado') == 'finalizado':
+            actualizados = jugador_stats_service.registrar_partido_por_id(id, logger)
+        return {"partido_id": id, "estado": juego.get('estado'), "jugadores_actualizados": actualizados}
+    except Exception as e:
+        logger.error(f"Error al registrar el partido finalizado: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al registrar el partido finalizado: {str(e)}")
     
 @route.get("/ciudad/{id}", tags=[tag])
-def get_ciudad_route(id: str):
+def get_ciudad_route(request: Request, id: str, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None,
+                     expand: Optional[str] = None):
+    """
+    Detalle de una ciudad con una página de los partidos jugados en ella (resumen por defecto,
+    `expand=acciones` para incluirlas). Para la página siguiente enviar `cursor` con el `siguiente_cursor` recibido.
+    """
     try:
-        respuesta = estadistica_service.get_ciudad_detalle(id, logger)        
+        expandir = expand == "acciones"
+        return _responder_cacheado(
+            request, f"ciudad:{id}:{limit}:{cursor}:{expandir}",
+            lambda: estadistica_service.get_ciudad_detalle(id, logger, limit, cursor, expandir))
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.get("/confederacion/{id}", tags=[tag])
+def get_confederacion_route(id: str):
+    """
+    Estadísticas del torneo de los países de una confederación (_id o id numérico):
+    V/E/D, goles, tarjetas y máximos goleadores.
+    """
+    try:
+        respuesta = coalescencia_util.ejecutar_coalescido(
+            f"confederacion:{id}", lambda: confederacion_service.get_confederacion_detalle(id, logger), logger)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.get("/mapa-calor", tags=[tag])
+def get_mapa_calor_torneo_route(tipo: Optional[str] = None, exito: Optional[bool] = None):
+    """
+    Mapa de calor de todo el torneo por sector/lado y por tipo de acción. Filtros opcionales `tipo` y `exito`.
+    """
+    try:
+        respuesta = mapa_calor_service.get_mapa_torneo(tipo, exito, logger)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.get("/mapa-calor/equipos", tags=[tag])
+def get_mapas_calor_equipos_route(tipo: Optional[str] = None, exito: Optional[bool] = None):
+    """
+    Mapas de calor de todas las selecciones en una sola respuesta.
+    """
+    try:
+        respuesta = mapa_calor_service.get_mapas_equipos(tipo, exito, logger)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.get("/mapa-calor/equipo/{nombre}", tags=[tag])
+def get_mapa_calor_equipo_route(nombre: str, tipo: Optional[str] = None, exito: Optional[bool] = None):
+    """
+    Mapa de calor de una selección (nombre o siglas).
+    """
+    try:
+        respuesta = mapa_calor_service.get_mapa_equipo(nombre, tipo, exito, logger)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener estadisticas: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
+
+@route.get("/mapa-calor/jugador/{id}", tags=[tag])
+def get_mapa_calor_jugador_route(id: str, tipo: Optional[str] = None, exito: Optional[bool] = None):
+    """
+    Mapa de calor de un jugador en el torneo.
+    """
+    try:
+        respuesta = mapa_calor_service.get_mapa_jugador(id, tipo, exito, logger)
         return respuesta
     except Exception as e:
         logger.error(f"Error al obtener estadisticas: {str(e)}")
         raise HTTPException(status_code=409, detail=f"Error al obtener estadisticas: {str(e)}")
 
 @route.get("/torneo", tags=[tag])
-def get_estadisticas_torneo_route():
+def get_estadisticas_torneo_route(request: Request):
     """
     Endpoint para obtener estadísticas completas del torneo.
     
@@ -61,10 +231,57 @@ def get_estadisticas_torneo_route():
     - Estadísticas de equipos
     - Disciplina (tarjetas amarillas y rojas)
     - Partidos destacados
+    
+    Headers de respuesta:
+    - Age: segundos desde que se calculó el snapshot servido
+    - X-Snapshot-Stale: "true" si se está recalculando en segundo plano
+    - Content-Encoding: gzip, br o zstd según `Accept-Encoding` (variantes comprimidas de antemano)
     """
     try:
-        respuesta = analisis_torneo_service.get_estadisticas_torneo(logger)        
-        return respuesta
+        snapshot, desactualizado = snapshot_torneo_service.obtener_snapshot(logger)
+        return compresion_util.responder(request, snapshot.cuerpo, {
+            "Age": str(int(snapshot.edad())),
+            "X-Snapshot-Stale": "true" if desactualizado else "false",
+            "X-Torneo-Version": str(snapshot.numero)
+        })
     except Exception as e:
         logger.error(f"Error al obtener estadísticas del torneo: {str(e)}")
         raise HTTPException(status_code=409, detail=f"Error al obtener estadísticas del torneo: {str(e)}")
+
+@route.get("/torneo/cambios", tags=[tag])
+def get_cambios_torneo_route(desde: int, response: Response):
+    """
+    Cambios de las estadísticas del torneo desde la versión `desde` (campo `version` de /torneo).
+    
+    - `cambios`: solo las secciones modificadas; en los diccionarios solo las claves que cambiaron
+      (las eliminadas en `_eliminados`) y en las listas solo las posiciones que cambiaron
+      (`{"_lista": longitud, "entradas": {"indice": valor}}`).
+    - Si la versión ya no se conserva en el servidor, `completo` es true y `datos` trae la respuesta completa.
+    """
+    try:
+        snapshot, respuesta = snapshot_torneo_service.obtener_cambios(desde, logger)
+        response.headers["Age"] = str(int(snapshot.edad()))
+        response.headers["X-Torneo-Version"] = str(snapshot.numero)
+        return respuesta
+    except Exception as e:
+        logger.error(f"Error al obtener cambios del torneo: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener cambios del torneo: {str(e)}")
+
+@route.get("/export/{tabla}", tags=[tag])
+def get_exportacion_route(tabla: str, formato: str = "csv"):
+    """
+    Exporta el historial completo como tabla plana, transmitida por partes.
+
+    - `tabla`: `acciones` (una fila por acción con su partido y equipos) o `partidos` (una fila por partido)
+    - `formato`: `csv`, `arrow` (Arrow IPC stream) o `parquet`; arrow y parquet requieren pyarrow
+    """
+    try:
+        partes = exportacion_service.exportar(tabla, formato, logger)
+        return StreamingResponse(partes, media_type=exportacion_service.tipo_contenido(formato), headers={
+            "Content-Disposition": f'attachment; filename="{exportacion_service.nombre_archivo(tabla, formato)}"'
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al exportar: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al exportar: {str(e)}")
@@ -122,3 +122,7 @@ class JugadorDetalleResponse(BaseModel):
     datos_descriptivos: DatosDescriptivos
     probabilidades_predictivas: ProbabilidadesPredictivas
     estadisticas_analiticas: EstadisticasAnaliticas
+
+class JugadoresDetalleRequest(BaseModel):
+    """Petición del endpoint de detalle en lote"""
+    ids: List[str] = Field(..., min_length=1, max_length=100)
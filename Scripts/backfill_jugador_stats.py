@@ -0,0 +1,26 @@
+"""
+Reconstruye la colección `jugador_stats` a partir de todo el historial.
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.backfill_jugador_stats [--lote 500]
+"""
+import argparse
+import json
+import logging
+
+from Services import jugador_stats_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de estadísticas materializadas por jugador")
+    parser.add_argument('--lote', type=int, default=jugador_stats_service.TAMANO_LOTE,
+                        help="Documentos del historial por lote y operaciones por bulk_write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    resultado = jugador_stats_service.backfill(logging.getLogger(__name__), tamano_lote=args.lote)
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Crea un volcado local para el modo offline (`MONGODB_SNAPSHOT`): un archivo .bson por colección,
+con el mismo formato que `mongodump`. Los datos salen de MongoDB (`MONGODB_URI`) o del generador sintético.
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.crear_snapshot --salida ./snapshot
+    python -m Scripts.crear_snapshot --salida ./snapshot --sintetico [--partidos 64] [--semilla 1]
+"""
+import argparse
+import json
+import os
+
+import bson
+
+COLECCIONES = ('historial', 'juegos', 'jugadores', 'paises', 'confederaciones', 'ciudades')
+
+
+def escribir_coleccion(directorio: str, nombre: str, documentos) -> int:
+    total = 0
+    with open(os.path.join(directorio, f"{nombre}.bson"), 'wb') as archivo:
+        for documento in documentos:
+            archivo.write(bson.encode(documento))
+            total += 1
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volcado local de las colecciones para el modo offline")
+    parser.add_argument('--salida', required=True, help="Directorio de destino")
+    parser.add_argument('--sintetico', action='store_true', help="Generar un torneo sintético en lugar de leer MongoDB")
+    parser.add_argument('--partidos', type=int, default=64)
+    parser.add_argument('--semilla', type=int, default=1)
+    args = parser.parse_args()
+
+    os.makedirs(args.salida, exist_ok=True)
+    if args.sintetico:
+        from Benchmarks.datos_sinteticos import generar_torneo
+        datos = generar_torneo(partidos=args.partidos, semilla=args.semilla)
+        fuentes = {nombre: datos[nombre] for nombre in datos}
+    else:
+        from Config.database import db
+        fuentes = {nombre: db[nombre].find(batch_size=500) for nombre in COLECCIONES}
+
+    totales = {nombre: escribir_coleccion(args.salida, nombre, documentos) for nombre, documentos in fuentes.items()}
+    print(json.dumps({'directorio': args.salida, 'documentos': totales}, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
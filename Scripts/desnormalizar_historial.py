@@ -0,0 +1,28 @@
+"""
+Copia en cada documento del `historial` el estado, fecha, fase, grupo, jornada y mundial de su juego.
+Los mantienen el hook `/partido/{id}/finalizado`, la ingesta y la reconciliación periódica de la aplicación;
+el script copia todos los campos de todos los juegos de una vez.
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.desnormalizar_historial [--lote 500]
+"""
+import argparse
+import json
+import logging
+
+from Services import desnormalizacion_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill de los datos del juego en el historial")
+    parser.add_argument('--lote', type=int, default=desnormalizacion_service.TAMANO_LOTE,
+                        help="Juegos por lote y operaciones por bulk_write")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    resultado = desnormalizacion_service.backfill(logging.getLogger(__name__), tamano_lote=args.lote)
+    print(json.dumps(resultado, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Exporta el historial como tabla plana (equivalente a GET /export/{tabla}).
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.exportar acciones --formato parquet --salida acciones.parquet
+    python -m Scripts.exportar partidos --formato csv > partidos.csv
+"""
+import argparse
+import logging
+import sys
+
+from Services import exportacion_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación del historial en CSV, Arrow IPC o Parquet")
+    parser.add_argument('tabla', choices=sorted(exportacion_service.COLUMNAS))
+    parser.add_argument('--formato', choices=sorted(exportacion_service.FORMATOS), default='csv')
+    parser.add_argument('--salida', help="Archivo de destino (por defecto la salida estándar)")
+    parser.add_argument('--filas-por-bloque', type=int, default=exportacion_service.FILAS_POR_BLOQUE)
+    parser.add_argument('--lote', type=int, default=exportacion_service.TAMANO_LOTE,
+                        help="Partidos del historial por lote del cursor")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', stream=sys.stderr)
+    partes = exportacion_service.exportar(args.tabla, args.formato, logging.getLogger(__name__),
+                                          args.filas_por_bloque, args.lote)
+    destino = open(args.salida, 'wb') if args.salida else sys.stdout.buffer
+    try:
+        for parte in partes:
+            destino.write(parte)
+    finally:
+        if args.salida:
+            destino.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""
+Crea o reconcilia los índices de MongoDB según `Config/indices.py`.
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.indices                       # crea los faltantes y recrea los que tienen otras opciones
+    python -m Scripts.indices --verificar           # solo reporta las diferencias
+    python -m Scripts.indices --eliminar-sobrantes  # además elimina los índices no especificados
+"""
+import argparse
+import json
+import logging
+
+from Config.indices import INDICES
+from Services import indice_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconciliación de índices de MongoDB")
+    parser.add_argument('colecciones', nargs='*', help=f"Colecciones a reconciliar ({', '.join(INDICES)}; por defecto todas)")
+    parser.add_argument('--verificar', action='store_true', help="No modificar nada, solo reportar")
+    parser.add_argument('--eliminar-sobrantes', action='store_true',
+                        help="Eliminar los índices que no están en la especificación")
+    args = parser.parse_args()
+    desconocidas = [c for c in args.colecciones if c not in INDICES]
+    if desconocidas:
+        parser.error(f"Colecciones sin índices especificados: {', '.join(desconocidas)}")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    reporte = indice_service.reconciliar(
+        logging.getLogger(__name__), args.colecciones or None,
+        aplicar=not args.verificar, eliminar_sobrantes=args.eliminar_sobrantes
+    )
+    print(json.dumps(reporte, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
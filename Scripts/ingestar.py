@@ -0,0 +1,47 @@
+"""
+Carga masiva de `historial` y `juegos` desde archivos exportados con `mongoexport`
+(un documento Extended JSON por línea, o un arreglo JSON), y carga de las referencias del repositorio.
+
+Uso (desde la raíz del proyecto):
+    python -m Scripts.ingestar --juegos juegos.ndjson --historial historial.ndjson [--lote 500] [--derivados]
+    python -m Scripts.ingestar --referencias
+"""
+import argparse
+import json
+import logging
+
+from Services import ingesta_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga masiva de historial y juegos con bulk_write por lotes")
+    parser.add_argument('--historial', help="Archivo con documentos del historial")
+    parser.add_argument('--juegos', help="Archivo con documentos de juegos")
+    parser.add_argument('--referencias', action='store_true',
+                        help="Cargar paises.json y confederaciones.json en sus colecciones")
+    parser.add_argument('--lote', type=int, default=ingesta_service.TAMANO_LOTE, help="Operaciones por bulk_write")
+    parser.add_argument('--sin-validar', action='store_true', help="No validar contra los schemas Pydantic")
+    parser.add_argument('--derivados', action='store_true',
+                        help="Actualizar jugador_stats con cada partido finalizado del historial en la misma pasada")
+    args = parser.parse_args()
+    if not (args.historial or args.juegos or args.referencias):
+        parser.error("Indicar --historial, --juegos o --referencias")
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger(__name__)
+
+    reportes = []
+    if args.referencias:
+        reportes.extend(ingesta_service.sembrar_referencias(logger, args.lote))
+    # Los juegos primero, para que el historial que se carga después ya tenga su juego
+    for coleccion, ruta in (('juegos', args.juegos), ('historial', args.historial)):
+        if ruta:
+            reportes.append(ingesta_service.ingerir(
+                coleccion, ingesta_service.leer_documentos(ruta), logger, tamano_lote=args.lote,
+                validar=not args.sin_validar, derivados=args.derivados
+            ))
+    print(json.dumps(reportes, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
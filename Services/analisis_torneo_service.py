@@ -1,81 +1,140 @@
 """
 Módulo para el análisis avanzado de estadísticas de torneos.
 Contiene funciones para analizar remontadas, goleadores, mejores jugadores, etc.
+
+Cada análisis es un acumulador que recibe los partidos de a uno (`agregar`) y arma su resultado al final
+(`resultado`), guardando solo contadores y los primeros N candidatos que devuelve. Así `get_estadisticas_torneo`
+recorre el historial con un cursor por lotes y la memoria no crece con la cantidad de partidos.
+Las funciones `analizar_*` conservan la interfaz sobre una lista de partidos ya cargada.
 """
-from bson import ObjectId
+import heapq
 from fastapi import HTTPException, status
 from google.api_core.exceptions import GoogleAPIError
-from pymongo.mongo_client import MongoClient
 from Utils import estadistica_util
-from Config.settings import MONGODB_URI
+from Config.database import db
+from Services import identidad_service
+from Services import partido_service
+from Services import referencia_service
 from datetime import datetime
-from collections import defaultdict
-from typing import List, Dict, Any
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List
 
-client = MongoClient(MONGODB_URI)
-db = client['mundial']
+# Partidos del historial que se leen y procesan juntos
+TAMANO_LOTE = 100
 
+# Campos del historial que usan los análisis (se descartan titulares, acciones agrupadas, etc.)
+PROYECCION_HISTORIAL = {
+    'equipo_local': 1, 'equipo_visitante': 1, 'goles_local': 1, 'goles_visitante': 1, 'ganador': 1,
+    'asistencia': 1, 'ubicacion': 1, 'fecha': 1, 'jornada': 1, 'tarjetas_amarillas': 1,
+    'tarjetas_amarillas_detalle': 1, 'tarjetas_rojas_detalle': 1, 'lesiones': 1, 'estadisticas_acciones': 1,
+    'acciones': 1, 'revision': 1
+}
 
-def analizar_remontadas(historial: List[Dict], logger) -> Dict:
+# Campos de `jugadores` con los que se enriquecen goleadores y mejores jugadores
+PROYECCION_JUGADOR = {
+    'id': 1, 'pais': 1, 'goles': 1, 'overall': 1, 'rendimiento': 1, 'forma_actual': 1, 'precision_tiro': 1,
+    'velocidad': 1, 'fuerza_disparo': 1, 'regate': 1, 'vision_juego': 1
+}
+
+# Goleadores y mejores jugadores que se devuelven, y jugadores lesionados que se listan
+TOP_JUGADORES = 10
+LIMITE_LESIONADOS = 20
+
+
+def _clave_jugador(accion: Dict):
     """
-    Analiza partidos donde un equipo remontó estando abajo por 2 o más goles.
+    Clave de agrupación de un jugador: su id sellado por el índice de identidades,
+    o (nombre, selección) si el nombre no está en el índice.
     """
-    logger.info("Analizando remontadas en el torneo...")
-    remontadas = []
-    estadisticas_remontadas = {
-        "total_remontadas": 0,
-        "remontadas_2_goles": 0,
-        "remontadas_3_o_mas_goles": 0,
-        "equipos_con_mas_remontadas": [],
-        "partidos": []
-    }
-    
-    equipos_remontadas = defaultdict(int)
-    
-    for partido in historial:
+    jugador_id = accion.get('jugador_id')
+    return jugador_id if jugador_id is not None else (accion.get('jugador'), accion.get('equipo'))
+
+
+class _Ranking:
+    """
+    Los `limite` mayores elementos según `clave`, en un montículo acotado.
+    Ante empates conserva el orden de llegada, igual que un `sort(reverse=True)` estable seguido de `[:limite]`.
+    """
+
+    def __init__(self, limite: int, clave: Callable[[Dict], float]):
+        self.limite = limite
+        self.clave = clave
+        self.total = 0
+        self._monticulo = []
+
+    def agregar(self, elemento: Dict) -> None:
+        # El orden negado hace que, a igual clave, el que llegó antes quede por encima
+        entrada = (self.clave(elemento), -self.total, elemento)
+        self.total += 1
+        if len(self._monticulo) < self.limite:
+            heapq.heappush(self._monticulo, entrada)
+        elif entrada[:2] > self._monticulo[0][:2]:
+            heapq.heapreplace(self._monticulo, entrada)
+
+    def lista(self) -> List[Dict]:
+        return [entrada[2] for entrada in sorted(self._monticulo, key=lambda e: e[:2], reverse=True)]
+
+
+def _lotes(cursor: Iterable[Dict], tamano: int) -> Iterator[List[Dict]]:
+    """Partidos del cursor en listas de hasta `tamano`."""
+    partidos = iter(cursor)
+    while True:
+        lote = list(islice(partidos, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def _jugadores_por_id(jugadores: Iterable[Dict]) -> Dict:
+    """Jugadores por `id` (ante ids repetidos queda el último)."""
+    return {j.get('id'): j for j in jugadores if j.get('id') is not None}
+
+
+class AcumuladorRemontadas:
+    """
+    Partidos donde un equipo remontó estando abajo por 2 o más goles.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.estadisticas = {
+            "total_remontadas": 0,
+            "remontadas_2_goles": 0,
+            "remontadas_3_o_mas_goles": 0,
+            "equipos_con_mas_remontadas": [],
+            "partidos": []
+        }
+        self.equipos_remontadas = defaultdict(int)
+
+    def agregar(self, partido: Dict, timelines: Dict[str, Dict]) -> None:
         try:
-            juego = db['juegos'].find_one({"_id": ObjectId(partido.get('partido_original_id'))})
-            acciones = partido.get('acciones', [])
-            goles_local = 0
-            goles_visitante = 0
-            diferencia_maxima_local = 0
-            diferencia_maxima_visitante = 0
-            
-            # Simular el marcador minuto a minuto
-            for accion in acciones:
-                if accion.get('tipo') == 'Gol':
-                    if accion.get('equipo') == partido.get('equipo_local'):
-                        goles_local += 1
-                    elif accion.get('equipo') == partido.get('equipo_visitante'):
-                        goles_visitante += 1
-                    
-                    diferencia = goles_visitante - goles_local
-                    if diferencia > diferencia_maxima_visitante:
-                        diferencia_maxima_visitante = diferencia
-                    if -diferencia > diferencia_maxima_local:
-                        diferencia_maxima_local = -diferencia
-            
+            timeline = timelines[str(partido.get('_id'))]
+            # Máxima ventaja que llegó a tener cada equipo (= déficit máximo del rival)
+            diferencia_maxima_visitante = timeline['deficit_maximo_local']
+            diferencia_maxima_local = timeline['deficit_maximo_visitante']
+
             # Verificar si hubo remontada
             ganador = partido.get('ganador')
             equipo_remonto = None
             diferencia_remontada = 0
-            
+
             if ganador == partido.get('equipo_local') and diferencia_maxima_visitante >= 2:
                 equipo_remonto = partido.get('equipo_local')
                 diferencia_remontada = diferencia_maxima_visitante
             elif ganador == partido.get('equipo_visitante') and diferencia_maxima_local >= 2:
                 equipo_remonto = partido.get('equipo_visitante')
                 diferencia_remontada = diferencia_maxima_local
-            
+
             if equipo_remonto:
-                estadisticas_remontadas["total_remontadas"] += 1
-                equipos_remontadas[equipo_remonto] += 1
-                
+                self.estadisticas["total_remontadas"] += 1
+                self.equipos_remontadas[equipo_remonto] += 1
+
                 if diferencia_remontada == 2:
-                    estadisticas_remontadas["remontadas_2_goles"] += 1
+                    self.estadisticas["remontadas_2_goles"] += 1
                 elif diferencia_remontada >= 3:
-                    estadisticas_remontadas["remontadas_3_o_mas_goles"] += 1
-                
+                    self.estadisticas["remontadas_3_o_mas_goles"] += 1
+
                 ubicacion = partido.get('ubicacion', {})
                 partido_remontada = {
                     "partido_id": str(partido.get('_id')),
@@ -90,325 +149,361 @@ def analizar_remontadas(historial: List[Dict], logger) -> Dict:
                     "marcador_final": f"{partido.get('goles_local')}-{partido.get('goles_visitante')}",
                     "estadio": ubicacion.get('estadio', 'N/A'),
                     "ciudad": ubicacion.get('ciudad', 'N/A'),
-                    "fecha": juego.get('fecha', 'N/A')
+                    "fecha": partido.get('fecha', 'N/A')
                 }
-                estadisticas_remontadas["partidos"].append(partido_remontada)
-        
+                self.estadisticas["partidos"].append(partido_remontada)
+
         except Exception as e:
-            logger.warning(f"Error procesando partido para remontadas: {str(e)}")
-            continue
-    
-    # Top equipos con más remontadas
-    equipos_top = sorted(equipos_remontadas.items(), key=lambda x: x[1], reverse=True)[:5]
-    estadisticas_remontadas["equipos_con_mas_remontadas"] = [
-        {"equipo": equipo, "remontadas": count} for equipo, count in equipos_top
-    ]
-    
-    logger.info(f"Total remontadas encontradas: {estadisticas_remontadas['total_remontadas']}")
-    return estadisticas_remontadas
+            self.logger.warning(f"Error procesando partido para remontadas: {str(e)}")
 
+    def resultado(self) -> Dict:
+        # Top equipos con más remontadas
+        equipos_top = sorted(self.equipos_remontadas.items(), key=lambda x: x[1], reverse=True)[:5]
+        self.estadisticas["equipos_con_mas_remontadas"] = [
+            {"equipo": equipo, "remontadas": count} for equipo, count in equipos_top
+        ]
 
-def analizar_goleadores(historial: List[Dict], jugadores: List[Dict], logger) -> Dict:
+        self.logger.info(f"Total remontadas encontradas: {self.estadisticas['total_remontadas']}")
+        return self.estadisticas
+
+
+class AcumuladorGoleadores:
     """
-    Analiza los máximos goleadores del torneo.
+    Goles por jugador; solo los primeros `TOP_JUGADORES` se enriquecen con la colección jugadores.
     """
-    logger.info("Analizando goleadores del torneo...")
-    goleadores_stats = defaultdict(lambda: {
-        "nombre": "",
-        "pais": "",
-        "goles_torneo": 0,
-        "partidos": set(),
-        "overall": 0
-    })
-    
-    total_goles = 0
-    
-    # Contar goles por jugador en el historial
-    for partido in historial:
-        acciones = partido.get('acciones', [])
-        for accion in acciones:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.goleadores = defaultdict(lambda: {
+            "nombre": "",
+            "pais": "",
+            "goles_torneo": 0,
+            "partidos_jugados": 0,
+            "ultimo_partido": None
+        })
+        self.total_goles = 0
+        self.total_partidos = 0
+
+    def agregar(self, partido: Dict) -> None:
+        self.total_partidos += 1
+        partido_id = str(partido.get('_id'))
+        for accion in partido.get('acciones', []):
             if accion.get('tipo') == 'Gol':
                 jugador = accion.get('jugador')
                 equipo = accion.get('equipo')
                 if jugador and equipo:
-                    goleadores_stats[jugador]["nombre"] = jugador
-                    goleadores_stats[jugador]["pais"] = equipo
-                    goleadores_stats[jugador]["goles_torneo"] += 1
-                    goleadores_stats[jugador]["partidos"].add(str(partido.get('_id')))
-                    total_goles += 1
-    
-    # Enriquecer con información de jugadores
-    jugadores_dict = {j.get('nombre'): j for j in jugadores if j.get('nombre')}
-    
-    top_goleadores = []
-    for jugador_nombre, stats in goleadores_stats.items():
-        jugador_info = jugadores_dict.get(jugador_nombre, {})
-        partidos_jugados = len(stats["partidos"])
-        
-        goleador = {
-            "nombre": jugador_nombre,
-            "pais": stats["pais"],
-            "goles_totales": jugador_info.get('goles', 0),
-            "goles_torneo": stats["goles_torneo"],
-            "partidos_jugados": partidos_jugados,
-            "promedio_goles": round(stats["goles_torneo"] / partidos_jugados, 2) if partidos_jugados > 0 else 0,
-            "overall": jugador_info.get('overall', 0)
+                    stats = self.goleadores[_clave_jugador(accion)]
+                    stats["nombre"] = jugador
+                    stats["pais"] = equipo
+                    stats["goles_torneo"] += 1
+                    # Las acciones de un partido llegan juntas: basta comparar con el último partido contado
+                    if stats["ultimo_partido"] != partido_id:
+                        stats["ultimo_partido"] = partido_id
+                        stats["partidos_jugados"] += 1
+                    self.total_goles += 1
+
+    def _top(self) -> List:
+        return heapq.nlargest(TOP_JUGADORES, self.goleadores.items(), key=lambda x: x[1]["goles_torneo"])
+
+    def candidatos(self) -> List[int]:
+        """Ids de jugador que hay que buscar en la colección jugadores."""
+        return [clave for clave, _ in self._top() if not isinstance(clave, tuple)]
+
+    def resultado(self, jugadores_dict: Dict) -> Dict:
+        top_goleadores = []
+        for clave, stats in self._top():
+            # Enriquecer con información de jugadores
+            jugador_info = jugadores_dict.get(clave, {})
+            partidos_jugados = stats["partidos_jugados"]
+
+            goleador = {
+                "nombre": stats["nombre"],
+                "pais": stats["pais"],
+                "goles_totales": jugador_info.get('goles', 0),
+                "goles_torneo": stats["goles_torneo"],
+                "partidos_jugados": partidos_jugados,
+                "promedio_goles": round(stats["goles_torneo"] / partidos_jugados, 2) if partidos_jugados > 0 else 0,
+                "overall": jugador_info.get('overall', 0)
+            }
+            top_goleadores.append(goleador)
+
+        total_partidos = self.total_partidos
+        promedio_goles = round(self.total_goles / total_partidos, 2) if total_partidos > 0 else 0
+
+        result = {
+            "total_goles_torneo": self.total_goles,
+            "promedio_goles_partido": promedio_goles,
+            "top_goleadores": top_goleadores,
+            "goleador_maximo": top_goleadores[0] if top_goleadores else None
         }
-        top_goleadores.append(goleador)
-    
-    # Ordenar por goles del torneo
-    top_goleadores.sort(key=lambda x: x["goles_torneo"], reverse=True)
-    
-    total_partidos = len(historial)
-    promedio_goles = round(total_goles / total_partidos, 2) if total_partidos > 0 else 0
-    
-    result = {
-        "total_goles_torneo": total_goles,
-        "promedio_goles_partido": promedio_goles,
-        "top_goleadores": top_goleadores[:10],
-        "goleador_maximo": top_goleadores[0] if top_goleadores else None
-    }
-    
-    logger.info(f"Total goles del torneo: {total_goles}")
-    return result
 
+        self.logger.info(f"Total goles del torneo: {self.total_goles}")
+        return result
 
-def analizar_mejores_jugadores(historial: List[Dict], jugadores: List[Dict], logger) -> Dict:
+
+class AcumuladorMejoresJugadores:
     """
-    Analiza los mejores jugadores del torneo basado en overall y rendimiento.
+    Participación de cada jugador; el ranking por overall se arma al final con la colección jugadores.
     """
-    logger.info("Analizando mejores jugadores del torneo...")
-    
-    # Crear diccionario de jugadores que participaron
-    jugadores_participantes = {}
-    for partido in historial:
-        acciones = partido.get('acciones', [])
-        for accion in acciones:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.participantes = {}
+
+    def agregar(self, partido: Dict) -> None:
+        partido_id = str(partido.get('_id'))
+        for accion in partido.get('acciones', []):
             jugador = accion.get('jugador')
-            if jugador and jugador not in jugadores_participantes:
-                jugadores_participantes[jugador] = {
-                    "partidos": set(),
+            if not jugador:
+                continue
+            clave = _clave_jugador(accion)
+            if clave not in self.participantes:
+                self.participantes[clave] = {
+                    "nombre": jugador,
+                    "partidos_jugados": 0,
+                    "ultimo_partido": None,
                     "goles": 0,
                     "acciones_criticas": 0
                 }
-            if jugador:
-                jugadores_participantes[jugador]["partidos"].add(str(partido.get('_id')))
-                if accion.get('tipo') == 'Gol':
-                    jugadores_participantes[jugador]["goles"] += 1
-                if accion.get('importancia') == 'critica':
-                    jugadores_participantes[jugador]["acciones_criticas"] += 1
-    
-    # Enriquecer con datos de la colección jugadores
-    jugadores_dict = {j.get('nombre'): j for j in jugadores if j.get('nombre')}
-    
-    mejores = []
-    for jugador_nombre, stats in jugadores_participantes.items():
-        jugador_info = jugadores_dict.get(jugador_nombre, {})
-        overall = jugador_info.get('overall', 0)
-        
-        if overall > 0:  # Solo incluir jugadores con datos completos
-            atributos_destacados = {
-                "precision_tiro": jugador_info.get('precision_tiro', 0),
-                "velocidad": jugador_info.get('velocidad', 0),
-                "fuerza_disparo": jugador_info.get('fuerza_disparo', 0),
-                "regate": jugador_info.get('regate', 0),
-                "vision_juego": jugador_info.get('vision_juego', 0)
-            }
-            
-            mejor_jugador = {
-                "nombre": jugador_nombre,
-                "pais": jugador_info.get('pais', 'N/A'),
-                "overall": overall,
-                "goles": stats["goles"],
-                "rendimiento_promedio": jugador_info.get('rendimiento', 0),
-                "partidos_jugados": len(stats["partidos"]),
-                "forma_actual": jugador_info.get('forma_actual', 0),
-                "atributos_destacados": atributos_destacados
-            }
-            mejores.append(mejor_jugador)
-    
-    # Ordenar por overall
-    mejores.sort(key=lambda x: x["overall"], reverse=True)
-    
-    result = {
-        "criterio_evaluacion": "Overall, goles y rendimiento en el torneo",
-        "top_jugadores": mejores[:10],
-        "mejor_jugador_general": mejores[0] if mejores else None
-    }
-    
-    logger.info(f"Total jugadores analizados: {len(mejores)}")
-    return result
+            stats = self.participantes[clave]
+            if stats["ultimo_partido"] != partido_id:
+                stats["ultimo_partido"] = partido_id
+                stats["partidos_jugados"] += 1
+            if accion.get('tipo') == 'Gol':
+                stats["goles"] += 1
+            if accion.get('importancia') == 'critica':
+                stats["acciones_criticas"] += 1
 
+    def candidatos(self) -> List[int]:
+        """
+        Ids de todos los participantes identificados: el ranking depende del overall de cada uno, así que
+        `_buscar_mejores_por_overall` solo trae de la colección jugadores los de mayor overall entre ellos.
+        """
+        return [clave for clave in self.participantes if not isinstance(clave, tuple)]
 
-def analizar_equipos(historial: List[Dict], paises: List[Dict], logger) -> Dict:
+    def resultado(self, jugadores_dict: Dict) -> Dict:
+        """`jugadores_dict` debe incluir al menos los TOP_JUGADORES participantes de mayor overall y sus empates."""
+        mejores = _Ranking(TOP_JUGADORES, lambda x: x["overall"])
+        for clave, stats in self.participantes.items():
+            jugador_info = jugadores_dict.get(clave, {})
+            overall = jugador_info.get('overall', 0)
+
+            if overall > 0:  # Solo incluir jugadores con datos completos
+                atributos_destacados = {
+                    "precision_tiro": jugador_info.get('precision_tiro', 0),
+                    "velocidad": jugador_info.get('velocidad', 0),
+                    "fuerza_disparo": jugador_info.get('fuerza_disparo', 0),
+                    "regate": jugador_info.get('regate', 0),
+                    "vision_juego": jugador_info.get('vision_juego', 0)
+                }
+
+                mejor_jugador = {
+                    "nombre": stats["nombre"],
+                    "pais": jugador_info.get('pais', 'N/A'),
+                    "overall": overall,
+                    "goles": stats["goles"],
+                    "rendimiento_promedio": jugador_info.get('rendimiento', 0),
+                    "partidos_jugados": stats["partidos_jugados"],
+                    "forma_actual": jugador_info.get('forma_actual', 0),
+                    "atributos_destacados": atributos_destacados
+                }
+                mejores.agregar(mejor_jugador)
+
+        top_jugadores = mejores.lista()
+        result = {
+            "criterio_evaluacion": "Overall, goles y rendimiento en el torneo",
+            "top_jugadores": top_jugadores,
+            "mejor_jugador_general": top_jugadores[0] if top_jugadores else None
+        }
+
+        self.logger.info(f"Total jugadores analizados: {len(self.participantes)}")
+        return result
+
+
+class AcumuladorEquipos:
     """
-    Analiza estadísticas de equipos en el torneo.
+    Partidos, resultados y goles de cada equipo.
     """
-    logger.info("Analizando estadísticas de equipos...")
-    
-    equipos_stats = defaultdict(lambda: {
-        "equipo": "",
-        "partidos_jugados": 0,
-        "victorias": 0,
-        "empates": 0,
-        "derrotas": 0,
-        "goles_favor": 0,
-        "goles_contra": 0
-    })
-    
-    for partido in historial:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.equipos_stats = defaultdict(lambda: {
+            "equipo": "",
+            "partidos_jugados": 0,
+            "victorias": 0,
+            "empates": 0,
+            "derrotas": 0,
+            "goles_favor": 0,
+            "goles_contra": 0
+        })
+
+    def agregar(self, partido: Dict) -> None:
         local = partido.get('equipo_local')
         visitante = partido.get('equipo_visitante')
         goles_local = partido.get('goles_local', 0)
         goles_visitante = partido.get('goles_visitante', 0)
         ganador = partido.get('ganador')
-        
+        equipos_stats = self.equipos_stats
+
         # Actualizar local
         equipos_stats[local]["equipo"] = local
         equipos_stats[local]["partidos_jugados"] += 1
         equipos_stats[local]["goles_favor"] += goles_local
         equipos_stats[local]["goles_contra"] += goles_visitante
-        
+
         if ganador == local:
             equipos_stats[local]["victorias"] += 1
         elif ganador == "Empate":
             equipos_stats[local]["empates"] += 1
         else:
             equipos_stats[local]["derrotas"] += 1
-        
+
         # Actualizar visitante
         equipos_stats[visitante]["equipo"] = visitante
         equipos_stats[visitante]["partidos_jugados"] += 1
         equipos_stats[visitante]["goles_favor"] += goles_visitante
         equipos_stats[visitante]["goles_contra"] += goles_local
-        
+
         if ganador == visitante:
             equipos_stats[visitante]["victorias"] += 1
         elif ganador == "Empate":
             equipos_stats[visitante]["empates"] += 1
         else:
             equipos_stats[visitante]["derrotas"] += 1
-    
-    # Calcular estadísticas adicionales
-    equipos_list = []
-    for equipo, stats in equipos_stats.items():
-        stats["diferencia_goles"] = stats["goles_favor"] - stats["goles_contra"]
-        stats["porcentaje_victorias"] = round(
-            (stats["victorias"] / stats["partidos_jugados"] * 100) if stats["partidos_jugados"] > 0 else 0, 2
-        )
-        stats["racha_actual"] = "N/A"  # Se podría calcular con más detalle
-        equipos_list.append(stats)
-    
-    # Identificar equipos destacados
-    equipo_mas_goleador = max(equipos_list, key=lambda x: x["goles_favor"]) if equipos_list else None
-    mejor_defensa = min(equipos_list, key=lambda x: x["goles_contra"]) if equipos_list else None
-    equipo_mas_victorias = max(equipos_list, key=lambda x: x["victorias"]) if equipos_list else None
-    
-    result = {
-        "total_equipos": len(equipos_list),
-        "equipo_mas_goleador": equipo_mas_goleador,
-        "mejor_defensa": mejor_defensa,
-        "equipo_mas_victorias": equipo_mas_victorias,
-        "equipos": sorted(equipos_list, key=lambda x: x["victorias"], reverse=True)
-    }
-    
-    logger.info(f"Total equipos analizados: {len(equipos_list)}")
-    return result
 
+    def resultado(self) -> Dict:
+        # Calcular estadísticas adicionales
+        equipos_list = []
+        for equipo, stats in self.equipos_stats.items():
+            stats["diferencia_goles"] = stats["goles_favor"] - stats["goles_contra"]
+            stats["porcentaje_victorias"] = round(
+                (stats["victorias"] / stats["partidos_jugados"] * 100) if stats["partidos_jugados"] > 0 else 0, 2
+            )
+            stats["racha_actual"] = "N/A"  # Se podría calcular con más detalle
+            equipos_list.append(stats)
 
-def analizar_disciplina(historial: List[Dict], logger) -> Dict:
+        # Identificar equipos destacados
+        equipo_mas_goleador = max(equipos_list, key=lambda x: x["goles_favor"]) if equipos_list else None
+        mejor_defensa = min(equipos_list, key=lambda x: x["goles_contra"]) if equipos_list else None
+        equipo_mas_victorias = max(equipos_list, key=lambda x: x["victorias"]) if equipos_list else None
+
+        result = {
+            "total_equipos": len(equipos_list),
+            "equipo_mas_goleador": equipo_mas_goleador,
+            "mejor_defensa": mejor_defensa,
+            "equipo_mas_victorias": equipo_mas_victorias,
+            "equipos": sorted(equipos_list, key=lambda x: x["victorias"], reverse=True)
+        }
+
+        self.logger.info(f"Total equipos analizados: {len(equipos_list)}")
+        return result
+
+
+class AcumuladorDisciplina:
     """
-    Analiza tarjetas amarillas y rojas en el torneo.
+    Tarjetas amarillas y rojas por equipo y por jugador.
     """
-    logger.info("Analizando disciplina del torneo...")
-    
-    total_amarillas = 0
-    total_rojas = 0
-    tarjetas_por_equipo = defaultdict(lambda: {"amarillas": 0, "rojas": 0})
-    tarjetas_por_jugador = defaultdict(lambda: {"amarillas": 0, "rojas": 0, "equipo": ""})
-    
-    for partido in historial:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.total_partidos = 0
+        self.total_amarillas = 0
+        self.total_rojas = 0
+        self.tarjetas_por_equipo = defaultdict(lambda: {"amarillas": 0, "rojas": 0})
+        self.tarjetas_por_jugador = defaultdict(lambda: {"amarillas": 0, "rojas": 0, "equipo": ""})
+
+    def agregar(self, partido: Dict) -> None:
+        self.total_partidos += 1
+
         # Tarjetas amarillas
         amarillas_detalle = partido.get('tarjetas_amarillas_detalle', [])
         for amarilla in amarillas_detalle:
-            total_amarillas += 1
+            self.total_amarillas += 1
             equipo = amarilla.get('equipo')
             jugador = amarilla.get('jugador')
             if equipo:
-                tarjetas_por_equipo[equipo]["amarillas"] += 1
+                self.tarjetas_por_equipo[equipo]["amarillas"] += 1
             if jugador:
-                tarjetas_por_jugador[jugador]["amarillas"] += 1
-                tarjetas_por_jugador[jugador]["equipo"] = equipo
-        
+                self.tarjetas_por_jugador[jugador]["amarillas"] += 1
+                self.tarjetas_por_jugador[jugador]["equipo"] = equipo
+
         # Tarjetas rojas
         rojas_detalle = partido.get('tarjetas_rojas_detalle', [])
-        total_rojas += len(rojas_detalle)
+        self.total_rojas += len(rojas_detalle)
         for roja in rojas_detalle:
             equipo = roja.get('equipo') if isinstance(roja, dict) else None
             jugador = roja.get('jugador') if isinstance(roja, dict) else None
             if equipo:
-                tarjetas_por_equipo[equipo]["rojas"] += 1
+                self.tarjetas_por_equipo[equipo]["rojas"] += 1
             if jugador:
-                tarjetas_por_jugador[jugador]["rojas"] += 1
-                tarjetas_por_jugador[jugador]["equipo"] = equipo
-    
-    total_partidos = len(historial)
-    promedio_amarillas = round(total_amarillas / total_partidos, 2) if total_partidos > 0 else 0
-    promedio_rojas = round(total_rojas / total_partidos, 2) if total_partidos > 0 else 0
-    
-    # Equipo más indisciplinado
-    equipo_mas_indisciplinado = None
-    if tarjetas_por_equipo:
-        equipo_top = max(tarjetas_por_equipo.items(), 
-                        key=lambda x: x[1]["amarillas"] + x[1]["rojas"] * 2)
-        equipo_mas_indisciplinado = {
-            "equipo": equipo_top[0],
-            "amarillas": equipo_top[1]["amarillas"],
-            "rojas": equipo_top[1]["rojas"]
-        }
-    
-    # Jugador más amonestado
-    jugador_mas_amonestado = None
-    if tarjetas_por_jugador:
-        jugador_top = max(tarjetas_por_jugador.items(), 
-                         key=lambda x: x[1]["amarillas"] + x[1]["rojas"] * 2)
-        jugador_mas_amonestado = {
-            "jugador": jugador_top[0],
-            "equipo": jugador_top[1]["equipo"],
-            "amarillas": jugador_top[1]["amarillas"],
-            "rojas": jugador_top[1]["rojas"]
+                self.tarjetas_por_jugador[jugador]["rojas"] += 1
+                self.tarjetas_por_jugador[jugador]["equipo"] = equipo
+
+    def resultado(self) -> Dict:
+        total_partidos = self.total_partidos
+        total_amarillas = self.total_amarillas
+        total_rojas = self.total_rojas
+        promedio_amarillas = round(total_amarillas / total_partidos, 2) if total_partidos > 0 else 0
+        promedio_rojas = round(total_rojas / total_partidos, 2) if total_partidos > 0 else 0
+
+        # Equipo más indisciplinado
+        equipo_mas_indisciplinado = None
+        if self.tarjetas_por_equipo:
+            equipo_top = max(self.tarjetas_por_equipo.items(),
+                             key=lambda x: x[1]["amarillas"] + x[1]["rojas"] * 2)
+            equipo_mas_indisciplinado = {
+                "equipo": equipo_top[0],
+                "amarillas": equipo_top[1]["amarillas"],
+                "rojas": equipo_top[1]["rojas"]
+            }
+
+        # Jugador más amonestado
+        jugador_mas_amonestado = None
+        if self.tarjetas_por_jugador:
+            jugador_top = max(self.tarjetas_por_jugador.items(),
+                              key=lambda x: x[1]["amarillas"] + x[1]["rojas"] * 2)
+            jugador_mas_amonestado = {
+                "jugador": jugador_top[0],
+                "equipo": jugador_top[1]["equipo"],
+                "amarillas": jugador_top[1]["amarillas"],
+                "rojas": jugador_top[1]["rojas"]
+            }
+
+        result = {
+            "total_tarjetas_amarillas": total_amarillas,
+            "total_tarjetas_rojas": total_rojas,
+            "promedio_amarillas_partido": promedio_amarillas,
+            "promedio_rojas_partido": promedio_rojas,
+            "equipo_mas_indisciplinado": equipo_mas_indisciplinado,
+            "jugador_mas_amonestado": jugador_mas_amonestado
         }
-    
-    result = {
-        "total_tarjetas_amarillas": total_amarillas,
-        "total_tarjetas_rojas": total_rojas,
-        "promedio_amarillas_partido": promedio_amarillas,
-        "promedio_rojas_partido": promedio_rojas,
-        "equipo_mas_indisciplinado": equipo_mas_indisciplinado,
-        "jugador_mas_amonestado": jugador_mas_amonestado
-    }
-    
-    logger.info(f"Total amarillas: {total_amarillas}, Total rojas: {total_rojas}")
-    return result
 
+        self.logger.info(f"Total amarillas: {total_amarillas}, Total rojas: {total_rojas}")
+        return result
 
-def analizar_partidos_destacados(historial: List[Dict], logger) -> Dict:
+
+class AcumuladorPartidosDestacados:
     """
-    Analiza partidos destacados (más goles, más asistencia, etc.).
+    Partidos destacados (más goles, más asistencia y los 5 con más goles).
     """
-    logger.info("Analizando partidos destacados...")
-    
-    partidos_destacados = []
-    total_goles = 0
-    
-    for partido in historial:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.total_partidos = 0
+        self.total_goles = 0
+        self.partido_mas_goles = None
+        self.partido_mas_asistencia = None
+        self.top_partidos = _Ranking(5, lambda x: x["total_goles"])
+
+    def agregar(self, partido: Dict) -> None:
         goles_local = partido.get('goles_local', 0)
         goles_visitante = partido.get('goles_visitante', 0)
         total_goles_partido = goles_local + goles_visitante
-        total_goles += total_goles_partido
-        
+        self.total_partidos += 1
+        self.total_goles += total_goles_partido
+
         ubicacion = partido.get('ubicacion', {})
-        
+
         partido_info = {
             "partido_id": str(partido.get('_id')),
             "equipo_local": partido.get('equipo_local'),
@@ -422,385 +517,367 @@ def analizar_partidos_destacados(historial: List[Dict], logger) -> Dict:
             "estadio": ubicacion.get('estadio', 'N/A'),
             "ciudad": ubicacion.get('ciudad', 'N/A')
         }
-        partidos_destacados.append(partido_info)
-    
-    # Partido con más goles
-    partido_mas_goles = max(partidos_destacados, key=lambda x: x["total_goles"]) if partidos_destacados else None
-    if partido_mas_goles:
-        partido_mas_goles["categoria"] = "más goles"
-        partido_mas_goles["descripcion"] = f"Partido con {partido_mas_goles['total_goles']} goles"
-    
-    # Partido con más asistencia
-    partido_mas_asistencia = max(partidos_destacados, key=lambda x: x["asistencia"]) if partidos_destacados else None
-    if partido_mas_asistencia:
-        partido_mas_asistencia["categoria"] = "más asistencia"
-        partido_mas_asistencia["descripcion"] = f"Asistencia de {partido_mas_asistencia['asistencia']} espectadores"
-    
-    total_partidos = len(historial)
-    promedio_goles = round(total_goles / total_partidos, 2) if total_partidos > 0 else 0
-    
-    # Top 5 partidos con más goles
-    top_partidos = sorted(partidos_destacados, key=lambda x: x["total_goles"], reverse=True)[:5]
-    
-    result = {
-        "total_partidos": total_partidos,
-        "promedio_goles_partido": promedio_goles,
-        "partido_mas_goles": partido_mas_goles,
-        "partido_mas_asistencia": partido_mas_asistencia,
-        "partidos_destacados": top_partidos
-    }
-    
-    logger.info(f"Total partidos: {total_partidos}")
-    return result
 
+        # Ante empates se queda el primero, como max()
+        if self.partido_mas_goles is None or total_goles_partido > self.partido_mas_goles["total_goles"]:
+            self.partido_mas_goles = partido_info
+        if self.partido_mas_asistencia is None or partido_info["asistencia"] > self.partido_mas_asistencia["asistencia"]:
+            self.partido_mas_asistencia = partido_info
+        self.top_partidos.agregar(partido_info)
 
-def analizar_estadios(historial: List[Dict], logger) -> Dict:
+    def resultado(self) -> Dict:
+        # Partido con más goles
+        partido_mas_goles = self.partido_mas_goles
+        if partido_mas_goles:
+            partido_mas_goles["categoria"] = "más goles"
+            partido_mas_goles["descripcion"] = f"Partido con {partido_mas_goles['total_goles']} goles"
+
+        # Partido con más asistencia
+        partido_mas_asistencia = self.partido_mas_asistencia
+        if partido_mas_asistencia:
+            partido_mas_asistencia["categoria"] = "más asistencia"
+            partido_mas_asistencia["descripcion"] = f"Asistencia de {partido_mas_asistencia['asistencia']} espectadores"
+
+        total_partidos = self.total_partidos
+        promedio_goles = round(self.total_goles / total_partidos, 2) if total_partidos > 0 else 0
+
+        result = {
+            "total_partidos": total_partidos,
+            "promedio_goles_partido": promedio_goles,
+            "partido_mas_goles": partido_mas_goles,
+            "partido_mas_asistencia": partido_mas_asistencia,
+            "partidos_destacados": self.top_partidos.lista()
+        }
+
+        self.logger.info(f"Total partidos: {total_partidos}")
+        return result
+
+
+class AcumuladorEstadios:
     """
-    Analiza estadísticas de estadios (más partidos, más goles, mayor asistencia).
+    Partidos, goles y asistencia por estadio.
     """
-    logger.info("Analizando estadísticas de estadios...")
-    
-    estadios_stats = defaultdict(lambda: {
-        "estadio": "",
-        "ciudad": "",
-        "partidos_jugados": 0,
-        "total_goles": 0,
-        "asistencia_total": 0,
-        "asistencias": []
-    })
-    
-    for partido in historial:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.estadios_stats = defaultdict(lambda: {
+            "estadio": "",
+            "ciudad": "",
+            "partidos_jugados": 0,
+            "total_goles": 0,
+            "asistencia_total": 0
+        })
+
+    def agregar(self, partido: Dict) -> None:
         ubicacion = partido.get('ubicacion', {})
         estadio = ubicacion.get('estadio', 'Desconocido')
         ciudad = ubicacion.get('ciudad', 'Desconocida')
-        
+
         goles = partido.get('goles_local', 0) + partido.get('goles_visitante', 0)
         asistencia = partido.get('asistencia', 0)
-        
-        estadios_stats[estadio]["estadio"] = estadio
-        estadios_stats[estadio]["ciudad"] = ciudad
-        estadios_stats[estadio]["partidos_jugados"] += 1
-        estadios_stats[estadio]["total_goles"] += goles
-        estadios_stats[estadio]["asistencia_total"] += asistencia
-        estadios_stats[estadio]["asistencias"].append(asistencia)
-    
-    # Calcular promedios y crear lista
-    estadios_list = []
-    for estadio, stats in estadios_stats.items():
-        partidos = stats["partidos_jugados"]
-        estadio_info = {
-            "estadio": stats["estadio"],
-            "ciudad": stats["ciudad"],
-            "partidos_jugados": partidos,
-            "total_goles": stats["total_goles"],
-            "promedio_goles": round(stats["total_goles"] / partidos, 2) if partidos > 0 else 0,
-            "asistencia_total": stats["asistencia_total"],
-            "asistencia_promedio": stats["asistencia_total"] // partidos if partidos > 0 else 0
+
+        stats = self.estadios_stats[estadio]
+        stats["estadio"] = estadio
+        stats["ciudad"] = ciudad
+        stats["partidos_jugados"] += 1
+        stats["total_goles"] += goles
+        stats["asistencia_total"] += asistencia
+
+    def resultado(self) -> Dict:
+        # Calcular promedios y crear lista
+        estadios_list = []
+        for estadio, stats in self.estadios_stats.items():
+            partidos = stats["partidos_jugados"]
+            estadio_info = {
+                "estadio": stats["estadio"],
+                "ciudad": stats["ciudad"],
+                "partidos_jugados": partidos,
+                "total_goles": stats["total_goles"],
+                "promedio_goles": round(stats["total_goles"] / partidos, 2) if partidos > 0 else 0,
+                "asistencia_total": stats["asistencia_total"],
+                "asistencia_promedio": stats["asistencia_total"] // partidos if partidos > 0 else 0
+            }
+            estadios_list.append(estadio_info)
+
+        # Identificar estadios destacados
+        estadio_mas_partidos = max(estadios_list, key=lambda x: x["partidos_jugados"]) if estadios_list else None
+        estadio_mas_goleador = max(estadios_list, key=lambda x: x["total_goles"]) if estadios_list else None
+        estadio_mayor_asistencia = max(estadios_list, key=lambda x: x["asistencia_total"]) if estadios_list else None
+
+        result = {
+            "total_estadios": len(estadios_list),
+            "estadio_mas_partidos": estadio_mas_partidos,
+            "estadio_mas_goleador": estadio_mas_goleador,
+            "estadio_mayor_asistencia": estadio_mayor_asistencia,
+            "estadios": sorted(estadios_list, key=lambda x: x["partidos_jugados"], reverse=True)[:10]
         }
-        estadios_list.append(estadio_info)
-    
-    # Identificar estadios destacados
-    estadio_mas_partidos = max(estadios_list, key=lambda x: x["partidos_jugados"]) if estadios_list else None
-    estadio_mas_goleador = max(estadios_list, key=lambda x: x["total_goles"]) if estadios_list else None
-    estadio_mayor_asistencia = max(estadios_list, key=lambda x: x["asistencia_total"]) if estadios_list else None
-    
-    result = {
-        "total_estadios": len(estadios_list),
-        "estadio_mas_partidos": estadio_mas_partidos,
-        "estadio_mas_goleador": estadio_mas_goleador,
-        "estadio_mayor_asistencia": estadio_mayor_asistencia,
-        "estadios": sorted(estadios_list, key=lambda x: x["partidos_jugados"], reverse=True)[:10]
-    }
-    
-    logger.info(f"Total estadios analizados: {len(estadios_list)}")
-    return result
 
+        self.logger.info(f"Total estadios analizados: {len(estadios_list)}")
+        return result
 
-def analizar_local_visitante(historial: List[Dict], logger) -> Dict:
+
+def _tipo_jugada_gol(acciones: List[Dict], i: int) -> str:
     """
-    Analiza estadísticas de victorias locales, visitantes y empates.
-    Incluye clasificación de goles por tipo de jugada (penal, corner, jugada normal).
+    Tipo de jugada del gol `acciones[i]` según las acciones previas (hasta 20, en los últimos 30 segundos).
     """
-    logger.info("Analizando estadísticas local vs visitante...")
-    
-    total_partidos = len(historial)
-    victorias_local = 0
-    victorias_visitante = 0
-    empates = 0
-    goles_local_total = 0
-    goles_visitante_total = 0
-    
-    # Contadores para tipos de goles
-    goles_local_penal = 0
-    goles_local_corner = 0
-    goles_local_tiro_libre = 0
-    goles_local_normal = 0
-    goles_visitante_penal = 0
-    goles_visitante_corner = 0
-    goles_visitante_tiro_libre = 0
-    goles_visitante_normal = 0
-    
-    for partido in historial:
+    accion = acciones[i]
+    minuto_gol = accion.get('minuto', 0)
+    segundo_gol = accion.get('segundo', 0)
+
+    for j in range(max(0, i - 20), i):
+        accion_previa = acciones[j]
+        minuto_prev = accion_previa.get('minuto', 0)
+        segundo_prev = accion_previa.get('segundo', 0)
+        tipo_prev = accion_previa.get('tipo', '')
+
+        # Calcular diferencia en segundos
+        diff_segundos = (minuto_gol - minuto_prev) * 60 + (segundo_gol - segundo_prev)
+
+        if diff_segundos <= 30 and diff_segundos >= 0:
+            if tipo_prev == 'Tiro' and 'penal' in accion_previa.get('descripcion', '').lower():
+                return 'penal'
+            elif tipo_prev == 'Tiro Libre':
+                return 'tiro_libre'
+            elif tipo_prev == 'Córner':
+                return 'corner'
+    return 'normal'
+
+
+class AcumuladorLocalVisitante:
+    """
+    Victorias locales, visitantes y empates, con los goles de cada lado por tipo de jugada
+    (penal, corner, tiro libre, jugada normal).
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.total_partidos = 0
+        self.victorias_local = 0
+        self.victorias_visitante = 0
+        self.empates = 0
+        self.goles_local_total = 0
+        self.goles_visitante_total = 0
+        # Contadores para tipos de goles
+        self.tipos_local = Counter()
+        self.tipos_visitante = Counter()
+
+    def agregar(self, partido: Dict) -> None:
         ganador = partido.get('ganador')
-        goles_local = partido.get('goles_local', 0)
-        goles_visitante = partido.get('goles_visitante', 0)
         equipo_local = partido.get('equipo_local')
         equipo_visitante = partido.get('equipo_visitante')
         acciones = partido.get('acciones', [])
-        
-        goles_local_total += goles_local
-        goles_visitante_total += goles_visitante
-        
-        # Analizar tipo de gol basado en las acciones previas
+
+        self.total_partidos += 1
+        self.goles_local_total += partido.get('goles_local', 0)
+        self.goles_visitante_total += partido.get('goles_visitante', 0)
+
+        # Clasificar cada gol según las acciones previas
         for i, accion in enumerate(acciones):
             if accion.get('tipo') == 'Gol':
                 equipo_gol = accion.get('equipo')
-                
-                # Buscar las acciones previas (últimos 5 segundos o misma jugada)
-                tipo_jugada = 'normal'
-                minuto_gol = accion.get('minuto', 0)
-                segundo_gol = accion.get('segundo', 0)
-                
-                # Revisar acciones previas en los últimos 30 segundos
-                for j in range(max(0, i - 20), i):
-                    accion_previa = acciones[j]
-                    minuto_prev = accion_previa.get('minuto', 0)
-                    segundo_prev = accion_previa.get('segundo', 0)
-                    tipo_prev = accion_previa.get('tipo', '')
-                    
-                    # Calcular diferencia en segundos
-                    diff_segundos = (minuto_gol - minuto_prev) * 60 + (segundo_gol - segundo_prev)
-                    
-                    if diff_segundos <= 30 and diff_segundos >= 0:
-                        if tipo_prev == 'Tiro' and 'penal' in accion_previa.get('descripcion', '').lower():
-                            tipo_jugada = 'penal'
-                            break
-                        elif tipo_prev == 'Tiro Libre':
-                            tipo_jugada = 'tiro_libre'
-                            break
-                        elif tipo_prev == 'Córner':
-                            tipo_jugada = 'corner'
-                            break
-                
-                # Clasificar el gol
                 if equipo_gol == equipo_local:
-                    if tipo_jugada == 'penal':
-                        goles_local_penal += 1
-                    elif tipo_jugada == 'tiro_libre':
-                        goles_local_tiro_libre += 1
-                    elif tipo_jugada == 'corner':
-                        goles_local_corner += 1
-                    else:
-                        goles_local_normal += 1
+                    self.tipos_local[_tipo_jugada_gol(acciones, i)] += 1
                 elif equipo_gol == equipo_visitante:
-                    if tipo_jugada == 'penal':
-                        goles_visitante_penal += 1
-                    elif tipo_jugada == 'tiro_libre':
-                        goles_visitante_tiro_libre += 1
-                    elif tipo_jugada == 'corner':
-                        goles_visitante_corner += 1
-                    else:
-                        goles_visitante_normal += 1
-        
+                    self.tipos_visitante[_tipo_jugada_gol(acciones, i)] += 1
+
         # Contar victorias
         if ganador == equipo_local:
-            victorias_local += 1
+            self.victorias_local += 1
         elif ganador == equipo_visitante:
-            victorias_visitante += 1
+            self.victorias_visitante += 1
         elif ganador == "Empate":
-            empates += 1
-    
-    # Calcular porcentajes de tipos de goles
-    def calcular_porcentajes_goles(penal, corner, tiro_libre, normal, total):
-        return {
-            "goles_penal": penal,
-            "goles_corner": corner,
-            "goles_tiro_libre": tiro_libre,
-            "goles_jugada_normal": normal,
-            "porcentaje_penal": round((penal / total * 100) if total > 0 else 0, 2),
-            "porcentaje_corner": round((corner / total * 100) if total > 0 else 0, 2),
-            "porcentaje_tiro_libre": round((tiro_libre / total * 100) if total > 0 else 0, 2),
-            "porcentaje_jugada_normal": round((normal / total * 100) if total > 0 else 0, 2)
+            self.empates += 1
+
+    def resultado(self) -> Dict:
+        total_partidos = self.total_partidos
+        victorias_local = self.victorias_local
+        victorias_visitante = self.victorias_visitante
+        empates = self.empates
+        goles_local_total = self.goles_local_total
+        goles_visitante_total = self.goles_visitante_total
+
+        # Calcular porcentajes de tipos de goles
+        def calcular_porcentajes_goles(tipos, total):
+            penal, corner, tiro_libre, normal = tipos['penal'], tipos['corner'], tipos['tiro_libre'], tipos['normal']
+            return {
+                "goles_penal": penal,
+                "goles_corner": corner,
+                "goles_tiro_libre": tiro_libre,
+                "goles_jugada_normal": normal,
+                "porcentaje_penal": round((penal / total * 100) if total > 0 else 0, 2),
+                "porcentaje_corner": round((corner / total * 100) if total > 0 else 0, 2),
+                "porcentaje_tiro_libre": round((tiro_libre / total * 100) if total > 0 else 0, 2),
+                "porcentaje_jugada_normal": round((normal / total * 100) if total > 0 else 0, 2)
+            }
+
+        result = {
+            "total_partidos": total_partidos,
+            "victorias_local": victorias_local,
+            "victorias_visitante": victorias_visitante,
+            "empates": empates,
+            "porcentaje_local": round((victorias_local / total_partidos * 100) if total_partidos > 0 else 0, 2),
+            "porcentaje_visitante": round((victorias_visitante / total_partidos * 100) if total_partidos > 0 else 0, 2),
+            "porcentaje_empate": round((empates / total_partidos * 100) if total_partidos > 0 else 0, 2),
+            "goles_local_total": goles_local_total,
+            "goles_visitante_total": goles_visitante_total,
+            "promedio_goles_local": round(goles_local_total / total_partidos, 2) if total_partidos > 0 else 0,
+            "promedio_goles_visitante": round(goles_visitante_total / total_partidos, 2) if total_partidos > 0 else 0,
+            "goles_local_detalle": calcular_porcentajes_goles(self.tipos_local, goles_local_total),
+            "goles_visitante_detalle": calcular_porcentajes_goles(self.tipos_visitante, goles_visitante_total)
         }
-    
-    result = {
-        "total_partidos": total_partidos,
-        "victorias_local": victorias_local,
-        "victorias_visitante": victorias_visitante,
-        "empates": empates,
-        "porcentaje_local": round((victorias_local / total_partidos * 100) if total_partidos > 0 else 0, 2),
-        "porcentaje_visitante": round((victorias_visitante / total_partidos * 100) if total_partidos > 0 else 0, 2),
-        "porcentaje_empate": round((empates / total_partidos * 100) if total_partidos > 0 else 0, 2),
-        "goles_local_total": goles_local_total,
-        "goles_visitante_total": goles_visitante_total,
-        "promedio_goles_local": round(goles_local_total / total_partidos, 2) if total_partidos > 0 else 0,
-        "promedio_goles_visitante": round(goles_visitante_total / total_partidos, 2) if total_partidos > 0 else 0,
-        "goles_local_detalle": calcular_porcentajes_goles(
-            goles_local_penal, goles_local_corner, goles_local_tiro_libre, goles_local_normal, goles_local_total
-        ),
-        "goles_visitante_detalle": calcular_porcentajes_goles(
-            goles_visitante_penal, goles_visitante_corner, goles_visitante_tiro_libre, goles_visitante_normal, goles_visitante_total
-        )
-    }
-    
-    logger.info(f"Local: {victorias_local}, Visitante: {victorias_visitante}, Empates: {empates}")
-    logger.info(f"Goles local - Penal: {goles_local_penal}, Corner: {goles_local_corner}, Tiro Libre: {goles_local_tiro_libre}, Normal: {goles_local_normal}")
-    logger.info(f"Goles visitante - Penal: {goles_visitante_penal}, Corner: {goles_visitante_corner}, Tiro Libre: {goles_visitante_tiro_libre}, Normal: {goles_visitante_normal}")
-    return result
 
+        local, visitante = self.tipos_local, self.tipos_visitante
+        self.logger.info(f"Local: {victorias_local}, Visitante: {victorias_visitante}, Empates: {empates}")
+        self.logger.info(f"Goles local - Penal: {local['penal']}, Corner: {local['corner']}, Tiro Libre: {local['tiro_libre']}, Normal: {local['normal']}")
+        self.logger.info(f"Goles visitante - Penal: {visitante['penal']}, Corner: {visitante['corner']}, Tiro Libre: {visitante['tiro_libre']}, Normal: {visitante['normal']}")
+        return result
 
-def analizar_lesiones(historial: List[Dict], logger) -> Dict:
+
+class AcumuladorLesiones:
     """
-    Analiza jugadores lesionados durante el torneo.
+    Lesiones por equipo y los primeros `LIMITE_LESIONADOS` jugadores lesionados.
     """
-    logger.info("Analizando lesiones del torneo...")
-    
-    total_lesiones = 0
-    jugadores_lesionados = []
-    lesiones_por_equipo = defaultdict(int)
-    
-    for partido in historial:
-        lesiones = partido.get('lesiones', {})
-        lesiones_local = lesiones.get('local', [])
-        lesiones_visitante = lesiones.get('visitante', [])
-        
-        equipo_local = partido.get('equipo_local')
-        equipo_visitante = partido.get('equipo_visitante')
-        
-        # Procesar lesiones local
-        for lesion in lesiones_local:
-            total_lesiones += 1
-            lesiones_por_equipo[equipo_local] += 1
-            
-            if isinstance(lesion, dict):
-                jugadores_lesionados.append({
-                    "jugador": lesion.get('jugador', 'Desconocido'),
-                    "equipo": equipo_local,
-                    "partido_id": str(partido.get('_id')),
-                    "minuto": lesion.get('minuto'),
-                    "rival": equipo_visitante
-                })
-        
-        # Procesar lesiones visitante
-        for lesion in lesiones_visitante:
-            total_lesiones += 1
-            lesiones_por_equipo[equipo_visitante] += 1
-            
-            if isinstance(lesion, dict):
-                jugadores_lesionados.append({
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.total_partidos = 0
+        self.total_lesiones = 0
+        self.jugadores_lesionados = []
+        self.lesiones_por_equipo = defaultdict(int)
+
+    def _agregar_lesiones(self, partido: Dict, lesiones: List, equipo: str, rival: str) -> None:
+        for lesion in lesiones:
+            self.total_lesiones += 1
+            self.lesiones_por_equipo[equipo] += 1
+
+            if isinstance(lesion, dict) and len(self.jugadores_lesionados) < LIMITE_LESIONADOS:
+                self.jugadores_lesionados.append({
                     "jugador": lesion.get('jugador', 'Desconocido'),
-                    "equipo": equipo_visitante,
+                    "equipo": equipo,
                     "partido_id": str(partido.get('_id')),
                     "minuto": lesion.get('minuto'),
-                    "rival": equipo_local
+                    "rival": rival
                 })
-    
-    total_partidos = len(historial)
-    promedio_lesiones = round(total_lesiones / total_partidos, 2) if total_partidos > 0 else 0
-    
-    # Equipo con más lesiones
-    equipo_mas_lesiones = None
-    if lesiones_por_equipo:
-        equipo_top = max(lesiones_por_equipo.items(), key=lambda x: x[1])
-        equipo_mas_lesiones = {
-            "equipo": equipo_top[0],
-            "lesiones": equipo_top[1]
+
+    def agregar(self, partido: Dict) -> None:
+        self.total_partidos += 1
+        lesiones = partido.get('lesiones', {})
+        equipo_local = partido.get('equipo_local')
+        equipo_visitante = partido.get('equipo_visitante')
+
+        self._agregar_lesiones(partido, lesiones.get('local', []), equipo_local, equipo_visitante)
+        self._agregar_lesiones(partido, lesiones.get('visitante', []), equipo_visitante, equipo_local)
+
+    def resultado(self) -> Dict:
+        total_partidos = self.total_partidos
+        total_lesiones = self.total_lesiones
+        promedio_lesiones = round(total_lesiones / total_partidos, 2) if total_partidos > 0 else 0
+
+        # Equipo con más lesiones
+        equipo_mas_lesiones = None
+        if self.lesiones_por_equipo:
+            equipo_top = max(self.lesiones_por_equipo.items(), key=lambda x: x[1])
+            equipo_mas_lesiones = {
+                "equipo": equipo_top[0],
+                "lesiones": equipo_top[1]
+            }
+
+        result = {
+            "total_lesiones": total_lesiones,
+            "promedio_lesiones_partido": promedio_lesiones,
+            "equipo_mas_lesiones": equipo_mas_lesiones,
+            "jugadores_lesionados": self.jugadores_lesionados
         }
-    
-    result = {
-        "total_lesiones": total_lesiones,
-        "promedio_lesiones_partido": promedio_lesiones,
-        "equipo_mas_lesiones": equipo_mas_lesiones,
-        "jugadores_lesionados": jugadores_lesionados[:20]  # Top 20
-    }
-    
-    logger.info(f"Total lesiones: {total_lesiones}")
-    return result
 
+        self.logger.info(f"Total lesiones: {total_lesiones}")
+        return result
 
-def analizar_arbitros(historial: List[Dict], logger) -> Dict:
+
+class AcumuladorArbitros:
     """
-    Analiza estadísticas de árbitros (partidos, amarillas, rojas).
+    Partidos y tarjetas por árbitro.
     """
-    logger.info("Analizando estadísticas de árbitros...")
-    
-    # Como no tenemos campo de árbitro en el historial actual,
-    # voy a simular basándome en los partidos
-    # En una implementación real, esto vendría de un campo específico
-    
-    arbitros_stats = defaultdict(lambda: {
-        "nombre": "",
-        "partidos_arbitrados": 0,
-        "amarillas_mostradas": 0,
-        "rojas_mostradas": 0
-    })
-    
-    # Simulación: Usar partido_id como base para asignar árbitros
-    # En producción, deberías tener un campo 'arbitro' en el historial
-    for i, partido in enumerate(historial):
-        arbitro_id = f"Árbitro_{(i % 20) + 1}"  # Simular 20 árbitros diferentes
-        
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.partidos = 0
+        self.arbitros_stats = defaultdict(lambda: {
+            "nombre": "",
+            "partidos_arbitrados": 0,
+            "amarillas_mostradas": 0,
+            "rojas_mostradas": 0
+        })
+
+    def agregar(self, partido: Dict) -> None:
+        # Como no tenemos campo de árbitro en el historial actual, se simula con el orden del partido.
+        # En producción, deberías tener un campo 'arbitro' en el historial
+        arbitro_id = f"Árbitro_{(self.partidos % 20) + 1}"  # Simular 20 árbitros diferentes
+        self.partidos += 1
+
         amarillas = sum(partido.get('tarjetas_amarillas', {}).values())
         rojas = len(partido.get('tarjetas_rojas_detalle', []))
-        
-        arbitros_stats[arbitro_id]["nombre"] = arbitro_id
-        arbitros_stats[arbitro_id]["partidos_arbitrados"] += 1
-        arbitros_stats[arbitro_id]["amarillas_mostradas"] += amarillas
-        arbitros_stats[arbitro_id]["rojas_mostradas"] += rojas
-    
-    # Crear lista de árbitros
-    arbitros_list = []
-    for arbitro, stats in arbitros_stats.items():
-        partidos = stats["partidos_arbitrados"]
-        arbitro_info = {
-            "nombre": stats["nombre"],
-            "partidos_arbitrados": partidos,
-            "amarillas_mostradas": stats["amarillas_mostradas"],
-            "rojas_mostradas": stats["rojas_mostradas"],
-            "promedio_amarillas": round(stats["amarillas_mostradas"] / partidos, 2) if partidos > 0 else 0,
-            "promedio_rojas": round(stats["rojas_mostradas"] / partidos, 2) if partidos > 0 else 0
-        }
-        arbitros_list.append(arbitro_info)
-    
-    # Identificar árbitros destacados
-    arbitro_mas_partidos = max(arbitros_list, key=lambda x: x["partidos_arbitrados"]) if arbitros_list else None
-    arbitro_mas_amarillas = max(arbitros_list, key=lambda x: x["amarillas_mostradas"]) if arbitros_list else None
-    arbitro_mas_rojas = max(arbitros_list, key=lambda x: x["rojas_mostradas"]) if arbitros_list else None
-    
-    result = {
-        "total_arbitros_principal": len(arbitros_list),
-        "total_arbitros_linea": 0,  # No tenemos datos de árbitros de línea
-        "arbitro_mas_partidos": arbitro_mas_partidos,
-        "arbitro_mas_amarillas": arbitro_mas_amarillas,
-        "arbitro_mas_rojas": arbitro_mas_rojas,
-        "arbitros_principales": sorted(arbitros_list, key=lambda x: x["partidos_arbitrados"], reverse=True)[:10],
-        "estadisticas_arbitros_linea": {
-            "mensaje": "Datos de árbitros de línea no disponibles en el historial actual"
+
+        stats = self.arbitros_stats[arbitro_id]
+        stats["nombre"] = arbitro_id
+        stats["partidos_arbitrados"] += 1
+        stats["amarillas_mostradas"] += amarillas
+        stats["rojas_mostradas"] += rojas
+
+    def resultado(self) -> Dict:
+        # Crear lista de árbitros
+        arbitros_list = []
+        for arbitro, stats in self.arbitros_stats.items():
+            partidos = stats["partidos_arbitrados"]
+            arbitro_info = {
+                "nombre": stats["nombre"],
+                "partidos_arbitrados": partidos,
+                "amarillas_mostradas": stats["amarillas_mostradas"],
+                "rojas_mostradas": stats["rojas_mostradas"],
+                "promedio_amarillas": round(stats["amarillas_mostradas"] / partidos, 2) if partidos > 0 else 0,
+                "promedio_rojas": round(stats["rojas_mostradas"] / partidos, 2) if partidos > 0 else 0
+            }
+            arbitros_list.append(arbitro_info)
+
+        # Identificar árbitros destacados
+        arbitro_mas_partidos = max(arbitros_list, key=lambda x: x["partidos_arbitrados"]) if arbitros_list else None
+        arbitro_mas_amarillas = max(arbitros_list, key=lambda x: x["amarillas_mostradas"]) if arbitros_list else None
+        arbitro_mas_rojas = max(arbitros_list, key=lambda x: x["rojas_mostradas"]) if arbitros_list else None
+
+        result = {
+            "total_arbitros_principal": len(arbitros_list),
+            "total_arbitros_linea": 0,  # No tenemos datos de árbitros de línea
+            "arbitro_mas_partidos": arbitro_mas_partidos,
+            "arbitro_mas_amarillas": arbitro_mas_amarillas,
+            "arbitro_mas_rojas": arbitro_mas_rojas,
+            "arbitros_principales": sorted(arbitros_list, key=lambda x: x["partidos_arbitrados"], reverse=True)[:10],
+            "estadisticas_arbitros_linea": {
+                "mensaje": "Datos de árbitros de línea no disponibles en el historial actual"
+            }
         }
-    }
-    
-    logger.info(f"Total árbitros analizados: {len(arbitros_list)}")
-    return result
 
+        self.logger.info(f"Total árbitros analizados: {len(arbitros_list)}")
+        return result
 
-def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
+
+class AcumuladorPartidosEspeciales:
     """
-    Analiza partidos especiales: emocionantes, aburridos, agresivos, último minuto, goleadas.
+    Partidos emocionantes, aburridos, agresivos, goles de último minuto, goleadas y extremos de asistencia.
     """
-    logger.info("Analizando partidos especiales...")
-    
-    partidos_emocionantes = []
-    partidos_aburridos = []
-    partidos_agresivos = []
-    goles_ultimo_minuto = []
-    goleadas = []
-    
-    partido_menor_asistencia = None
-    partido_mayor_asistencia = None
-    menor_asistencia_valor = float('inf')
-    mayor_asistencia_valor = 0
-    
-    for partido in historial:
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.partidos_emocionantes = _Ranking(10, lambda x: x["indice_emocion"])
+        self.partidos_aburridos = _Ranking(10, lambda x: x["indice_aburrimiento"])
+        self.partidos_agresivos = _Ranking(10, lambda x: x["indice_agresividad"])
+        self.goleadas = _Ranking(15, lambda x: x["diferencia_goles"])
+        self.goles_ultimo_minuto = []
+
+        self.partido_menor_asistencia = None
+        self.partido_mayor_asistencia = None
+        self.menor_asistencia_valor = float('inf')
+        self.mayor_asistencia_valor = 0
+
+    def agregar(self, partido: Dict, timelines: Dict[str, Dict]) -> None:
         partido_id = str(partido.get('_id'))
         local = partido.get('equipo_local')
         visitante = partido.get('equipo_visitante')
@@ -808,21 +885,21 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
         goles_visitante = partido.get('goles_visitante', 0)
         marcador = f"{goles_local}-{goles_visitante}"
         ganador = partido.get('ganador')
-        
+
         ubicacion = partido.get('ubicacion', {})
         estadio = ubicacion.get('estadio', 'N/A')
-        
+
         stats_acciones = partido.get('estadisticas_acciones', {})
         total_acciones = stats_acciones.get('total_acciones', 0)
         acciones_criticas = stats_acciones.get('acciones_criticas', 0)
         acciones_altas = stats_acciones.get('acciones_altas', 0)
-        
+
         asistencia = partido.get('asistencia', 0)
-        
+
         # Analizar asistencia
-        if asistencia < menor_asistencia_valor and asistencia > 0:
-            menor_asistencia_valor = asistencia
-            partido_menor_asistencia = {
+        if asistencia < self.menor_asistencia_valor and asistencia > 0:
+            self.menor_asistencia_valor = asistencia
+            self.partido_menor_asistencia = {
                 "partido_id": partido_id,
                 "equipo_local": local,
                 "equipo_visitante": visitante,
@@ -830,10 +907,10 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "asistencia": asistencia,
                 "estadio": estadio
             }
-        
-        if asistencia > mayor_asistencia_valor:
-            mayor_asistencia_valor = asistencia
-            partido_mayor_asistencia = {
+
+        if asistencia > self.mayor_asistencia_valor:
+            self.mayor_asistencia_valor = asistencia
+            self.partido_mayor_asistencia = {
                 "partido_id": partido_id,
                 "equipo_local": local,
                 "equipo_visitante": visitante,
@@ -841,11 +918,11 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "asistencia": asistencia,
                 "estadio": estadio
             }
-        
+
         # Partido emocionante (muchas acciones críticas y altas)
         indice_emocion = acciones_criticas * 3 + acciones_altas * 1.5
         if indice_emocion > 50:  # Umbral ajustable
-            partidos_emocionantes.append({
+            self.partidos_emocionantes.agregar({
                 "partido_id": partido_id,
                 "equipo_local": local,
                 "equipo_visitante": visitante,
@@ -856,11 +933,11 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "indice_emocion": round(indice_emocion, 2),
                 "estadio": estadio
             })
-        
+
         # Partido aburrido (pocas acciones, pocos goles)
         indice_aburrimiento = 100 - (total_acciones * 0.2 + (goles_local + goles_visitante) * 10)
         if total_acciones < 200 and (goles_local + goles_visitante) <= 1:
-            partidos_aburridos.append({
+            self.partidos_aburridos.agregar({
                 "partido_id": partido_id,
                 "equipo_local": local,
                 "equipo_visitante": visitante,
@@ -870,16 +947,16 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "indice_aburrimiento": round(max(0, indice_aburrimiento), 2),
                 "estadio": estadio
             })
-        
+
         # Partido agresivo (muchas faltas y tarjetas)
         conteo_por_tipo = stats_acciones.get('conteo_por_tipo', {})
         faltas = conteo_por_tipo.get('Falta', 0) if isinstance(conteo_por_tipo, dict) else 0
         amarillas = sum(partido.get('tarjetas_amarillas', {}).values())
         rojas = len(partido.get('tarjetas_rojas_detalle', []))
-        
+
         indice_agresividad = faltas + amarillas * 2 + rojas * 5
         if indice_agresividad > 20:  # Umbral ajustable
-            partidos_agresivos.append({
+            self.partidos_agresivos.agregar({
                 "partido_id": partido_id,
                 "equipo_local": local,
                 "equipo_visitante": visitante,
@@ -890,50 +967,45 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "indice_agresividad": indice_agresividad,
                 "estadio": estadio
             })
-        
-        # Goles de último minuto (minuto 85+) que deciden partidos empatados
-        acciones = partido.get('acciones', [])
-        
-        # Simular marcador minuto a minuto para detectar si iba empatado
-        goles_temp_local = 0
-        goles_temp_visitante = 0
-        
-        for accion in acciones:
-            if accion.get('tipo') == 'Gol':
-                equipo_gol = accion.get('equipo')
-                minuto = accion.get('minuto', 0)
-                jugador = accion.get('jugador', 'Desconocido')
-                
-                # Verificar si el partido iba empatado ANTES de este gol
-                iba_empatado = (goles_temp_local == goles_temp_visitante)
-                
-                # Actualizar marcador temporal
-                if equipo_gol == local:
-                    goles_temp_local += 1
-                elif equipo_gol == visitante:
-                    goles_temp_visitante += 1
-                
-                # Verificar si es gol de último minuto (85+) y el partido iba empatado
-                if minuto >= 85 and iba_empatado and ganador != "Empate" and equipo_gol == ganador:
-                    # Verificar que este gol sea decisivo (que haya dado la victoria)
-                    goles_ultimo_minuto.append({
-                        "partido_id": partido_id,
-                        "equipo_local": local,
-                        "equipo_visitante": visitante,
-                        "equipo_ganador": ganador,
-                        "marcador_final": marcador,
-                        "minuto_gol_decisivo": minuto,
-                        "jugador": jugador,
-                        "marcador_antes_gol": f"{goles_temp_local - (1 if equipo_gol == local else 0)}-{goles_temp_visitante - (1 if equipo_gol == visitante else 0)}",
-                        "descripcion": f"{jugador} marcó en el minuto {minuto} para {equipo_gol} cuando iban empatados"
-                    })
-        
+
+        # Goles de último minuto (minuto 85+) que deciden partidos empatados,
+        # leídos del marcador acumulado precalculado en el timeline del partido
+        timeline = timelines[partido_id]
+
+        for i, lado in enumerate(timeline['lados']):
+            if len(self.goles_ultimo_minuto) >= 15:
+                break
+            es_local = lado == partido_service.LOCAL
+            equipo_gol = local if es_local else visitante
+            minuto = timeline['minutos'][i]
+            jugador = timeline['jugadores'][i]
+
+            # Marcador ANTES de este gol
+            antes_local = timeline['acumulado_local'][i] - (1 if es_local else 0)
+            antes_visitante = timeline['acumulado_visitante'][i] - (0 if es_local else 1)
+            iba_empatado = (antes_local == antes_visitante)
+
+            # Verificar si es gol de último minuto (85+) y el partido iba empatado
+            if minuto >= 85 and iba_empatado and ganador != "Empate" and equipo_gol == ganador:
+                # Verificar que este gol sea decisivo (que haya dado la victoria)
+                self.goles_ultimo_minuto.append({
+                    "partido_id": partido_id,
+                    "equipo_local": local,
+                    "equipo_visitante": visitante,
+                    "equipo_ganador": ganador,
+                    "marcador_final": marcador,
+                    "minuto_gol_decisivo": minuto,
+                    "jugador": jugador,
+                    "marcador_antes_gol": f"{antes_local}-{antes_visitante}",
+                    "descripcion": f"{jugador} marcó en el minuto {minuto} para {equipo_gol} cuando iban empatados"
+                })
+
         # Goleadas (diferencia de 3+ goles)
         diferencia = abs(goles_local - goles_visitante)
         if diferencia >= 3:
             equipo_ganador = local if goles_local > goles_visitante else visitante
             equipo_perdedor = visitante if goles_local > goles_visitante else local
-            
+
             # Categorizar humillación
             if diferencia >= 5:
                 categoria = "Humillación épica"
@@ -941,8 +1013,8 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 categoria = "Goleada histórica"
             else:
                 categoria = "Goleada contundente"
-            
-            goleadas.append({
+
+            self.goleadas.agregar({
                 "partido_id": partido_id,
                 "equipo_ganador": equipo_ganador,
                 "equipo_perdedor": equipo_perdedor,
@@ -951,31 +1023,180 @@ def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
                 "categoria_humillacion": categoria,
                 "estadio": estadio
             })
-    
-    # Ordenar y limitar resultados
-    partidos_emocionantes.sort(key=lambda x: x["indice_emocion"], reverse=True)
-    partidos_aburridos.sort(key=lambda x: x["indice_aburrimiento"], reverse=True)
-    partidos_agresivos.sort(key=lambda x: x["indice_agresividad"], reverse=True)
-    goleadas.sort(key=lambda x: x["diferencia_goles"], reverse=True)
-    
-    result = {
-        "partidos_emocionantes": partidos_emocionantes[:10],
-        "partidos_aburridos": partidos_aburridos[:10],
-        "partidos_agresivos": partidos_agresivos[:10],
-        "goles_ultimo_minuto": goles_ultimo_minuto[:15],
-        "goleadas": goleadas[:15],
-        "partido_menor_asistencia": partido_menor_asistencia,
-        "partido_mayor_asistencia": partido_mayor_asistencia
-    }
-    
-    logger.info(f"Partidos emocionantes: {len(partidos_emocionantes)}, Goleadas: {len(goleadas)}")
-    return result
 
+    def resultado(self) -> Dict:
+        result = {
+            "partidos_emocionantes": self.partidos_emocionantes.lista(),
+            "partidos_aburridos": self.partidos_aburridos.lista(),
+            "partidos_agresivos": self.partidos_agresivos.lista(),
+            "goles_ultimo_minuto": self.goles_ultimo_minuto,
+            "goleadas": self.goleadas.lista(),
+            "partido_menor_asistencia": self.partido_menor_asistencia,
+            "partido_mayor_asistencia": self.partido_mayor_asistencia
+        }
+
+        self.logger.info(f"Partidos emocionantes: {self.partidos_emocionantes.total}, Goleadas: {self.goleadas.total}")
+        return result
 
-def generar_datos_graficas(historial: List[Dict], goleadores: Dict, equipos: Dict, 
-                          disciplina: Dict, local_visitante: Dict, logger) -> Dict:
+
+class AcumuladorGraficas:
+    """
+    Datos por partido de las gráficas: goles por jornada y tarjetas por equipo.
     """
-    Genera datos preparados para diferentes tipos de gráficas en el frontend.
+
+    def __init__(self):
+        self.goles_por_jornada = defaultdict(int)
+        self.partidos_por_jornada = defaultdict(int)
+        self.tarjetas_por_equipo = defaultdict(lambda: {"amarillas": 0, "rojas": 0})
+
+    def agregar(self, partido: Dict) -> None:
+        jornada = partido.get('jornada', 'N/A')
+        if jornada != 'N/A':
+            goles_totales = partido.get('goles_local', 0) + partido.get('goles_visitante', 0)
+            self.goles_por_jornada[jornada] += goles_totales
+            self.partidos_por_jornada[jornada] += 1
+
+        for tarjeta in partido.get('tarjetas_amarillas_detalle', []):
+            equipo = tarjeta.get('equipo', '')
+            if equipo:
+                self.tarjetas_por_equipo[equipo]["amarillas"] += 1
+
+        for tarjeta in partido.get('tarjetas_rojas_detalle', []):
+            equipo = tarjeta.get('equipo', '')
+            if equipo:
+                self.tarjetas_por_equipo[equipo]["rojas"] += 1
+
+
+def analizar_remontadas(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza partidos donde un equipo remontó estando abajo por 2 o más goles.
+    """
+    logger.info("Analizando remontadas en el torneo...")
+    acumulador = AcumuladorRemontadas(logger)
+    # Déficit máximo de cada equipo, precalculado una vez por partido finalizado
+    timelines = partido_service.obtener_timelines(historial, logger)
+    for partido in historial:
+        acumulador.agregar(partido, timelines)
+    return acumulador.resultado()
+
+
+def analizar_goleadores(historial: List[Dict], jugadores: List[Dict], logger) -> Dict:
+    """
+    Analiza los máximos goleadores del torneo.
+    """
+    logger.info("Analizando goleadores del torneo...")
+    acumulador = AcumuladorGoleadores(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado(_jugadores_por_id(jugadores))
+
+
+def analizar_mejores_jugadores(historial: List[Dict], jugadores: List[Dict], logger) -> Dict:
+    """
+    Analiza los mejores jugadores del torneo basado en overall y rendimiento.
+    """
+    logger.info("Analizando mejores jugadores del torneo...")
+    acumulador = AcumuladorMejoresJugadores(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado(_jugadores_por_id(jugadores))
+
+
+def analizar_equipos(historial: List[Dict], paises: List[Dict], logger) -> Dict:
+    """
+    Analiza estadísticas de equipos en el torneo.
+    """
+    logger.info("Analizando estadísticas de equipos...")
+    acumulador = AcumuladorEquipos(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_disciplina(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza tarjetas amarillas y rojas en el torneo.
+    """
+    logger.info("Analizando disciplina del torneo...")
+    acumulador = AcumuladorDisciplina(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_partidos_destacados(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza partidos destacados (más goles, más asistencia, etc.).
+    """
+    logger.info("Analizando partidos destacados...")
+    acumulador = AcumuladorPartidosDestacados(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_estadios(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza estadísticas de estadios (más partidos, más goles, mayor asistencia).
+    """
+    logger.info("Analizando estadísticas de estadios...")
+    acumulador = AcumuladorEstadios(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_local_visitante(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza estadísticas de victorias locales, visitantes y empates.
+    Incluye clasificación de goles por tipo de jugada (penal, corner, jugada normal).
+    """
+    logger.info("Analizando estadísticas local vs visitante...")
+    acumulador = AcumuladorLocalVisitante(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_lesiones(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza jugadores lesionados durante el torneo.
+    """
+    logger.info("Analizando lesiones del torneo...")
+    acumulador = AcumuladorLesiones(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_arbitros(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza estadísticas de árbitros (partidos, amarillas, rojas).
+    """
+    logger.info("Analizando estadísticas de árbitros...")
+    acumulador = AcumuladorArbitros(logger)
+    for partido in historial:
+        acumulador.agregar(partido)
+    return acumulador.resultado()
+
+
+def analizar_partidos_especiales(historial: List[Dict], logger) -> Dict:
+    """
+    Analiza partidos especiales: emocionantes, aburridos, agresivos, último minuto, goleadas.
+    """
+    logger.info("Analizando partidos especiales...")
+    acumulador = AcumuladorPartidosEspeciales(logger)
+    timelines = partido_service.obtener_timelines(historial, logger)
+    for partido in historial:
+        acumulador.agregar(partido, timelines)
+    return acumulador.resultado()
+
+
+def generar_datos_graficas(por_partido: AcumuladorGraficas, goleadores: Dict, equipos: Dict,
+                           disciplina: Dict, local_visitante: Dict, logger) -> Dict:
+    """
+    Genera datos preparados para diferentes tipos de gráficas en el frontend,
+    a partir de los demás análisis y de lo acumulado partido a partido en `por_partido`.
     
     Incluye:
     - Gráfica de barras: Victorias local vs visitante vs empates
@@ -1149,15 +1370,7 @@ def generar_datos_graficas(historial: List[Dict], goleadores: Dict, equipos: Dic
     }
     
     # 10. Gráfica de línea: Evolución de goles por jornada (si existe el campo)
-    goles_por_jornada = defaultdict(int)
-    partidos_por_jornada = defaultdict(int)
-    
-    for partido in historial:
-        jornada = partido.get('jornada', 'N/A')
-        if jornada != 'N/A':
-            goles_totales = partido.get('goles_local', 0) + partido.get('goles_visitante', 0)
-            goles_por_jornada[jornada] += goles_totales
-            partidos_por_jornada[jornada] += 1
+    goles_por_jornada = por_partido.goles_por_jornada
     
     jornadas_ordenadas = sorted(goles_por_jornada.keys())
     
@@ -1175,21 +1388,7 @@ def generar_datos_graficas(historial: List[Dict], goleadores: Dict, equipos: Dic
     }
     
     # 11. Gráfica de barras: Disciplina por equipo (top 10 con más tarjetas)
-    tarjetas_por_equipo = defaultdict(lambda: {"amarillas": 0, "rojas": 0})
-    
-    for partido in historial:
-        tarjetas_amarillas_detalle = partido.get('tarjetas_amarillas_detalle', [])
-        tarjetas_rojas_detalle = partido.get('tarjetas_rojas_detalle', [])
-        
-        for tarjeta in tarjetas_amarillas_detalle:
-            equipo = tarjeta.get('equipo', '')
-            if equipo:
-                tarjetas_por_equipo[equipo]["amarillas"] += 1
-        
-        for tarjeta in tarjetas_rojas_detalle:
-            equipo = tarjeta.get('equipo', '')
-            if equipo:
-                tarjetas_por_equipo[equipo]["rojas"] += 1
+    tarjetas_por_equipo = por_partido.tarjetas_por_equipo
     
     # Ordenar por total de tarjetas
     equipos_disciplina = sorted(
@@ -1232,56 +1431,92 @@ def generar_datos_graficas(historial: List[Dict], goleadores: Dict, equipos: Dic
     }
 
 
-def get_estadisticas_torneo(logger):
+def _buscar_jugadores(ids: Iterable[int]) -> Dict:
+    """Datos de los jugadores con esos ids, con solo los campos que se usan."""
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    return _jugadores_por_id(db['jugadores'].find({'id': {'$in': ids}}, PROYECCION_JUGADOR))
+
+
+def _buscar_mejores_por_overall(ids: Iterable[int], limite: int = TOP_JUGADORES) -> Dict:
+    """
+    Los `limite` jugadores de mayor overall entre esos ids, más los empatados con el último, ordenados en MongoDB:
+    el ranking de mejores jugadores no necesita leer a todos los participantes.
+    """
+    ids = list(set(ids))
+    if not ids:
+        return {}
+    seleccionados = []
+    cursor = db['jugadores'].find({'id': {'$in': ids}, 'overall': {'$gt': 0}}, PROYECCION_JUGADOR).sort('overall', -1)
+    for jugador in cursor:
+        if len(seleccionados) >= limite and jugador.get('overall', 0) < seleccionados[limite - 1].get('overall', 0):
+            break
+        seleccionados.append(jugador)
+    cursor.close()
+    return _jugadores_por_id(seleccionados)
+
+
+def get_estadisticas_torneo(logger, tamano_lote: int = TAMANO_LOTE):
     """
     Función principal que genera todas las estadísticas del torneo.
+    Recorre el historial por lotes: en memoria solo quedan el lote actual y los acumuladores.
     """
     try:
         logger.info("Iniciando análisis de estadísticas del torneo...")
         
-        # Obtener datos de las colecciones
-        _historial = list(db['historial'].find())
-
-        historial = []
-        for historia in _historial:
-            juego = db['juegos'].find_one({'_id': ObjectId(historia['partido_original_id'])})
-            if juego and juego.get('estado') == 'finalizado':
-                historial.append(historia)
+        remontadas = AcumuladorRemontadas(logger)
+        partidos_especiales = AcumuladorPartidosEspeciales(logger)
+        goleadores = AcumuladorGoleadores(logger)
+        mejores_jugadores = AcumuladorMejoresJugadores(logger)
+        equipos = AcumuladorEquipos(logger)
+        disciplina = AcumuladorDisciplina(logger)
+        partidos_destacados = AcumuladorPartidosDestacados(logger)
+        estadios = AcumuladorEstadios(logger)
+        local_visitante = AcumuladorLocalVisitante(logger)
+        lesiones = AcumuladorLesiones(logger)
+        arbitros = AcumuladorArbitros(logger)
+        graficas = AcumuladorGraficas()
+        por_partido = [goleadores, mejores_jugadores, equipos, disciplina, partidos_destacados, estadios,
+                       local_visitante, lesiones, arbitros, graficas]
+        
+        total_partidos = 0
+        total_goles = 0
+        indice = identidad_service.obtener_indice(logger)
         
-        jugadores = list(db['jugadores'].find())
-        paises = list(db['paises'].find())
+        # Partidos finalizados: el estado del juego está copiado en el historial (una sola consulta indexada)
+        cursor = db['historial'].find({'estado': 'finalizado'}, PROYECCION_HISTORIAL,
+                                      batch_size=tamano_lote).sort('_id', 1)
+        for lote in _lotes(cursor, tamano_lote):
+            # Sellar ids de jugador y país en las acciones para agrupar por id
+            indice.sellar_historial(lote)
+            timelines = partido_service.obtener_timelines(lote, logger)
+            for partido in lote:
+                total_partidos += 1
+                total_goles += partido.get('goles_local', 0) + partido.get('goles_visitante', 0)
+                remontadas.agregar(partido, timelines)
+                partidos_especiales.agregar(partido, timelines)
+                for acumulador in por_partido:
+                    acumulador.agregar(partido)
         
-        if not historial:
+        if not total_partidos:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND, 
                 detail="No se encontraron partidos en el historial"
             )
         
-        total_partidos = len(historial)
-        total_equipos = len(paises)
-        
-        # Calcular total de goles
-        total_goles = sum(p.get('goles_local', 0) + p.get('goles_visitante', 0) for p in historial)
-        
-        logger.info(f"Procesando {total_partidos} partidos, {total_equipos} equipos, {len(jugadores)} jugadores...")
-        
-        # Realizar análisis
-        remontadas = analizar_remontadas(historial, logger)
-        goleadores = analizar_goleadores(historial, jugadores, logger)
-        mejores_jugadores = analizar_mejores_jugadores(historial, jugadores, logger)
-        equipos = analizar_equipos(historial, paises, logger)
-        disciplina = analizar_disciplina(historial, logger)
-        partidos_destacados = analizar_partidos_destacados(historial, logger)
+        total_equipos = len(referencia_service.paises())
+        logger.info(f"Procesados {total_partidos} partidos en lotes de {tamano_lote}, {total_equipos} equipos")
         
-        # Nuevos análisis
-        estadios = analizar_estadios(historial, logger)
-        local_visitante = analizar_local_visitante(historial, logger)
-        lesiones = analizar_lesiones(historial, logger)
-        arbitros = analizar_arbitros(historial, logger)
-        partidos_especiales = analizar_partidos_especiales(historial, logger)
+        # De `jugadores` solo se leen los goleadores del top y los participantes de mayor overall
+        jugadores_dict = _buscar_jugadores(goleadores.candidatos())
+        mejores_dict = _buscar_mejores_por_overall(mejores_jugadores.candidatos())
         
-        # Generar datos para gráficas
-        graficas = generar_datos_graficas(historial, goleadores, equipos, disciplina, local_visitante, logger)
+        # Armar resultados
+        goleadores = goleadores.resultado(jugadores_dict)
+        equipos = equipos.resultado()
+        disciplina = disciplina.resultado()
+        local_visitante = local_visitante.resultado()
         
         # Construir respuesta
         respuesta = {
@@ -1289,18 +1524,18 @@ def get_estadisticas_torneo(logger):
             "total_partidos": total_partidos,
             "total_equipos": total_equipos,
             "total_goles": total_goles,
-            "remontadas": remontadas,
+            "remontadas": remontadas.resultado(),
             "goleadores": goleadores,
-            "mejores_jugadores": mejores_jugadores,
+            "mejores_jugadores": mejores_jugadores.resultado(mejores_dict),
             "equipos": equipos,
             "disciplina": disciplina,
-            "partidos_destacados": partidos_destacados,
-            "estadios": estadios,
+            "partidos_destacados": partidos_destacados.resultado(),
+            "estadios": estadios.resultado(),
             "local_visitante": local_visitante,
-            "lesiones": lesiones,
-            "arbitros": arbitros,
-            "partidos_especiales": partidos_especiales,
-            "graficas": graficas,
+            "lesiones": lesiones.resultado(),
+            "arbitros": arbitros.resultado(),
+            "partidos_especiales": partidos_especiales.resultado(),
+            "graficas": generar_datos_graficas(graficas, goleadores, equipos, disciplina, local_visitante, logger),
             "fecha_generacion": datetime.now().isoformat(),
             "mensaje": "Estadísticas completas del torneo generadas exitosamente"
         }
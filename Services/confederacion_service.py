@@ -0,0 +1,155 @@
+"""
+Módulo para las estadísticas del torneo agregadas por confederación.
+Los agregados por selección se calculan en una sola pasada sobre el historial, con los mismos acumuladores
+que `/torneo`, y se guardan en caché por versión de los datos; una confederación solo suma los agregados
+de sus países miembros.
+"""
+import heapq
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from google.api_core.exceptions import GoogleAPIError
+
+from Config.database import db
+from Services import analisis_torneo_service
+from Services import referencia_service
+from Services import version_service
+from Utils import coalescencia_util
+
+TOP_GOLEADORES = 10
+CAMPOS_SUMABLES = (
+    'partidos_jugados', 'victorias', 'empates', 'derrotas',
+    'goles_favor', 'goles_contra', 'tarjetas_amarillas', 'tarjetas_rojas'
+)
+
+_lock = threading.Lock()
+_agregados_cache = {"version": None, "equipos": None}
+
+
+def calcular_agregados_equipos(logger) -> Dict[str, Dict]:
+    """
+    Recorre una sola vez los partidos finalizados del historial con los acumuladores de `/torneo`
+    (equipos, disciplina y goleadores) y devuelve por selección: V/E/D, goles, tarjetas y sus mejores goleadores.
+    """
+    proyeccion = {
+        'equipo_local': 1, 'equipo_visitante': 1, 'goles_local': 1,
+        'goles_visitante': 1, 'ganador': 1, 'tarjetas_amarillas_detalle': 1, 'tarjetas_rojas_detalle': 1,
+        'acciones.tipo': 1, 'acciones.jugador': 1, 'acciones.equipo': 1
+    }
+
+    acumulador_equipos = analisis_torneo_service.AcumuladorEquipos(logger)
+    disciplina = analisis_torneo_service.AcumuladorDisciplina(logger)
+    goleadores = analisis_torneo_service.AcumuladorGoleadores(logger)
+    partidos = 0
+    for partido in db['historial'].find({'estado': 'finalizado'}, proyeccion):
+        partidos += 1
+        acumulador_equipos.agregar(partido)
+        disciplina.agregar(partido)
+        goleadores.agregar(partido)
+
+    goles_por_equipo = defaultdict(list)
+    for stats in goleadores.goleadores.values():
+        goles_por_equipo[stats["pais"]].append((stats["goles_torneo"], stats["nombre"]))
+
+    equipos = {}
+    for equipo in acumulador_equipos.equipos_stats.keys() | disciplina.tarjetas_por_equipo.keys():
+        resultados = acumulador_equipos.equipos_stats.get(equipo, {})
+        tarjetas = disciplina.tarjetas_por_equipo.get(equipo, {})
+        agregado = {campo: resultados.get(campo, 0) for campo in CAMPOS_SUMABLES}
+        agregado["equipo"] = equipo
+        agregado["tarjetas_amarillas"] = tarjetas.get("amarillas", 0)
+        agregado["tarjetas_rojas"] = tarjetas.get("rojas", 0)
+        # Solo los mejores goleadores de cada selección pueden entrar al top de una confederación
+        agregado["goleadores"] = [
+            (jugador, goles) for goles, jugador in heapq.nlargest(TOP_GOLEADORES, goles_por_equipo[equipo])
+        ]
+        equipos[equipo] = agregado
+
+    logger.info(f"Agregados por selección calculados: {len(equipos)} equipos en {partidos} partidos")
+    return equipos
+
+
+def obtener_agregados_equipos(logger) -> Dict[str, Dict]:
+    """Agregados por selección de la versión actual de los datos, calculados una sola vez por versión."""
+    version = version_service.obtener_version_datos()
+    with _lock:
+        if _agregados_cache["version"] == version:
+            return _agregados_cache["equipos"]
+
+    equipos = coalescencia_util.ejecutar_coalescido(
+        f"agregados-equipos:{version}", lambda: calcular_agregados_equipos(logger), logger)
+    with _lock:
+        _agregados_cache["version"] = version
+        _agregados_cache["equipos"] = equipos
+    return equipos
+
+
+def _buscar_confederacion(id: str) -> Optional[Dict]:
+    """Acepta el _id de MongoDB o el `id` numérico de la confederación."""
+    if id.isdigit():
+        return referencia_service.confederacion_por_id(int(id))
+    confederacion = referencia_service.obtener_catalogo('confederaciones').obtener(object_id=id)
+    if confederacion is None and ObjectId.is_valid(id):
+        confederacion = db['confederaciones'].find_one({'_id': ObjectId(id)})
+    return confederacion
+
+
+def get_confederacion_detalle(id: str, logger) -> Dict:
+    """
+    Estadísticas del torneo de todos los países de una confederación, sumando los agregados
+    en caché de cada selección miembro.
+    """
+    try:
+        logger.info(f"Consultando confederación {id}")
+        confederacion = _buscar_confederacion(id)
+        if not confederacion:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Confederación no encontrada")
+
+        miembros = [
+            p['nombre'] for p in referencia_service.paises()
+            if p.get('confederacion_id') == confederacion.get('id') and p.get('nombre')
+        ]
+        agregados = obtener_agregados_equipos(logger)
+
+        totales = {campo: 0 for campo in CAMPOS_SUMABLES}
+        equipos: List[Dict] = []
+        candidatos = []
+        for nombre in miembros:
+            stats = agregados.get(nombre)
+            if not stats:
+                continue
+            for campo in CAMPOS_SUMABLES:
+                totales[campo] += stats[campo]
+            equipos.append({campo: stats[campo] for campo in ("equipo",) + CAMPOS_SUMABLES})
+            candidatos.extend((goles, jugador, nombre) for jugador, goles in stats["goleadores"])
+
+        top_goleadores = [
+            {"jugador": jugador, "equipo": equipo, "goles": goles}
+            for goles, jugador, equipo in heapq.nlargest(TOP_GOLEADORES, candidatos)
+        ]
+        for stats in equipos:
+            stats["diferencia_goles"] = stats["goles_favor"] - stats["goles_contra"]
+
+        respuesta = {
+            "confederacion": {
+                "id": confederacion.get('id'),
+                "nombre": confederacion.get('nombre'),
+                "region": confederacion.get('region')
+            },
+            "total_paises": len(miembros),
+            "paises_participantes": len(equipos),
+            **totales,
+            "diferencia_goles": totales["goles_favor"] - totales["goles_contra"],
+            "top_goleadores": top_goleadores,
+            "equipos": sorted(equipos, key=lambda x: (x["victorias"], x["diferencia_goles"]), reverse=True)
+        }
+        return respuesta
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener la confederación: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener la confederación: {str(e)}")
@@ -0,0 +1,160 @@
+"""
+Módulo que copia en cada documento del `historial` los datos de su juego (`estado`, `fecha`, `fase_id`, `grupo`,
+`jornada` y `mundial_id`), de modo que las lecturas del torneo son una sola consulta indexada sobre `historial`
+sin consultar `juegos` partido por partido.
+Al iniciar y cada DESNORMALIZACION_INTERVALO_SEG se reconcilian los partidos sin desnormalizar y los que tienen
+un `estado` distinto del de su juego (p. ej. finalizado por otro escritor sin llamar al hook).
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from bson import ObjectId
+from pymongo import UpdateMany
+from pymongo.errors import PyMongoError
+
+from Config.database import db
+from Config.settings import DESNORMALIZACION_INTERVALO_SEG
+from Services import version_service
+
+CAMPOS = ('estado', 'fecha', 'fase_id', 'grupo', 'jornada', 'mundial_id')
+PROYECCION_JUEGO = {campo: 1 for campo in CAMPOS}
+TAMANO_LOTE = 500
+
+
+def campos_juego(juego: Dict) -> Dict:
+    """Campos del juego que se copian en el historial."""
+    return {campo: juego[campo] for campo in CAMPOS if campo in juego}
+
+
+def operacion_juego(juego: Dict) -> UpdateMany:
+    """Copia los campos de un juego en los documentos del historial que apuntan a él."""
+    return UpdateMany({'partido_original_id': str(juego['_id'])}, {'$set': campos_juego(juego)})
+
+
+def completar_historial(documentos: List[Dict]) -> int:
+    """
+    Copia en su lugar los campos del juego en documentos del historial que aún no se han escrito,
+    con una sola consulta a `juegos` por lote. Devuelve cuántos documentos encontraron su juego.
+    """
+    ids = {
+        str(documento.get('partido_original_id')) for documento in documentos
+        if ObjectId.is_valid(str(documento.get('partido_original_id')))
+    }
+    if not ids:
+        return 0
+    juegos = {
+        str(juego['_id']): campos_juego(juego)
+        for juego in db['juegos'].find({'_id': {'$in': [ObjectId(i) for i in ids]}}, PROYECCION_JUEGO)
+    }
+    completados = 0
+    for documento in documentos:
+        campos = juegos.get(str(documento.get('partido_original_id')))
+        if campos is not None:
+            documento.update(campos)
+            completados += 1
+    return completados
+
+
+def desnormalizar_partido(id: str, logger) -> Dict:
+    """Copia en un documento del historial (por su _id) los campos actuales de su juego."""
+    partido = db['historial'].find_one({'_id': ObjectId(id)}, {'partido_original_id': 1})
+    if not partido:
+        raise ValueError(f"Partido {id} no encontrado en el historial")
+    juego_id = str(partido.get('partido_original_id'))
+    juego = db['juegos'].find_one({'_id': ObjectId(juego_id)}, PROYECCION_JUEGO) if ObjectId.is_valid(juego_id) else None
+    if not juego:
+        raise ValueError(f"Juego {juego_id} del partido {id} no encontrado")
+
+    campos = campos_juego(juego)
+    db['historial'].update_one({'_id': partido['_id']}, {'$set': campos})
+    version_service.invalidar_version_datos()
+    logger.info(f"Partido {id}: datos del juego {juego_id} copiados en el historial ({campos.get('estado')})")
+    return campos
+
+
+def backfill(logger, tamano_lote: int = TAMANO_LOTE) -> Dict:
+    """
+    Recorre `juegos` una sola vez y copia sus campos en todo el historial con `bulk_write` por lotes.
+    Es idempotente; los partidos del historial cuyo juego no existe quedan sin `estado` y se reportan.
+    """
+    inicio = time.perf_counter()
+    juegos = actualizados = 0
+    operaciones = []
+    for juego in db['juegos'].find({}, PROYECCION_JUEGO, batch_size=tamano_lote):
+        juegos += 1
+        operaciones.append(operacion_juego(juego))
+        if len(operaciones) >= tamano_lote:
+            actualizados += db['historial'].bulk_write(operaciones, ordered=False).modified_count
+            operaciones = []
+    if operaciones:
+        actualizados += db['historial'].bulk_write(operaciones, ordered=False).modified_count
+
+    version_service.invalidar_version_datos()
+    sin_juego = pendientes()
+    duracion = time.perf_counter() - inicio
+    logger.info(f"Desnormalización del historial: {juegos} juegos, {actualizados} partidos actualizados, "
+                f"{sin_juego} sin juego en {duracion:.2f}s")
+    return {"juegos": juegos, "historial_actualizados": actualizados, "sin_juego": sin_juego,
+            "segundos": round(duracion, 2)}
+
+
+def pendientes() -> int:
+    """Partidos del historial que todavía no tienen copiados los datos de su juego."""
+    return db['historial'].count_documents({'estado': {'$exists': False}})
+
+
+def reconciliar(logger) -> int:
+    """
+    Copia los datos del juego en los partidos del historial que no los tienen o cuyo `estado` no es el de su juego.
+    Lee solo el estado de cada juego y, por el índice de `partido_original_id`, los partidos desfasados.
+    Devuelve el número de juegos cuyos datos se volvieron a copiar.
+    """
+    juegos_por_estado = defaultdict(list)
+    for juego in db['juegos'].find({'estado': {'$exists': True}}, {'estado': 1}):
+        juegos_por_estado[juego['estado']].append(str(juego['_id']))
+
+    desfasados = set()
+    for estado, ids in juegos_por_estado.items():
+        filtro = {'partido_original_id': {'$in': ids}, 'estado': {'$ne': estado}}
+        desfasados.update(str(partido['partido_original_id'])
+                          for partido in db['historial'].find(filtro, {'partido_original_id': 1}))
+    if not desfasados:
+        return 0
+
+    operaciones = [
+        operacion_juego(juego)
+        for juego in db['juegos'].find({'_id': {'$in': [ObjectId(i) for i in desfasados]}}, PROYECCION_JUEGO)
+    ]
+    for inicio in range(0, len(operaciones), TAMANO_LOTE):
+        db['historial'].bulk_write(operaciones[inicio:inicio + TAMANO_LOTE], ordered=False)
+    version_service.invalidar_version_datos()
+    logger.info(f"Reconciliación del historial: datos de {len(operaciones)} juegos copiados de nuevo")
+    return len(operaciones)
+
+
+def _reconciliar_periodicamente(logger) -> None:
+    while True:
+        time.sleep(DESNORMALIZACION_INTERVALO_SEG)
+        try:
+            reconciliar(logger)
+        except PyMongoError as e:
+            logger.warning(f"No se pudo reconciliar el historial con juegos: {str(e)}")
+
+
+def verificar_al_inicio(logger) -> None:
+    """
+    Copia los datos del juego en los partidos del historial sin desnormalizar o desfasados, advierte de los que
+    no tienen juego (no entran en las lecturas del torneo) y arranca la reconciliación periódica.
+    """
+    try:
+        reconciliar(logger)
+        faltantes = pendientes()
+        if faltantes:
+            logger.warning(f"{faltantes} partidos del historial sin juego en `juegos`; no entran en las estadísticas")
+    except PyMongoError as e:
+        logger.warning(f"No se pudo verificar la desnormalización del historial: {str(e)}")
+    if DESNORMALIZACION_INTERVALO_SEG > 0:
+        threading.Thread(target=_reconciliar_periodicamente, args=(logger,), name="reconciliacion-historial",
+                         daemon=True).start()
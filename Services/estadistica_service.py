@@ -1,34 +1,124 @@
 from fastapi import HTTPException, status
 from google.api_core.exceptions import GoogleAPIError
-from pymongo.mongo_client import MongoClient
 from Utils import estadistica_util
-from Config.settings import MONGODB_URI
+from Config.database import db
+from Config.settings import JUGADOR_STATS_MATERIALIZADO, VALIDAR_RESPUESTAS
+from Services import jugador_stats_service
+from Services import referencia_service
 from bson.objectid import ObjectId
 from datetime import datetime
 from collections import defaultdict
 from typing import List, Dict, Any
-from Schemas.jugador import (
-    PerfilGeneral, AtributosFisicosTecnicos, EstadoActual, HistorialTemporada,
-    DatosDescriptivos, ProbabilidadesPredictivas, PrecisionBajoPresion,
-    EstadisticasAnaliticas, JugadorDetalleResponse
-)
+from Schemas.jugador import JugadorDetalleResponse
 
-client = MongoClient(MONGODB_URI)
-db = client['mundial'] 
+# Campos pesados del historial que no se necesitan al consultar partidos de un jugador
+CAMPOS_EXCLUIDOS_PARTIDO_JUGADOR = {
+    'titulares_local': 0,
+    'titulares_visitante': 0,
+    'suplentes_local': 0,
+    'suplentes_visitante': 0,
+    'acciones_agrupadas': 0
+}
 
-def get_pais_detalle(id, logger):
+# Resumen de partido que devuelven por defecto los detalles de país y ciudad
+CAMPOS_RESUMEN_PARTIDO = {
+    'equipo_local': 1,
+    'equipo_visitante': 1,
+    'goles_local': 1,
+    'goles_visitante': 1,
+    'ganador': 1,
+    'ubicacion.ciudad': 1,
+    'ubicacion.pais': 1,
+    'ubicacion.estadio': 1,
+    'partido_original_id': 1,
+    'fecha': 1
+}
+PAGINA_PARTIDOS_DEFECTO = 20
+PAGINA_PARTIDOS_MAX = 100
+
+def listar_partidos(filtro: Dict, limit: int = PAGINA_PARTIDOS_DEFECTO, cursor: str = None,
+                    expandir_acciones: bool = False) -> Dict:
+    """
+    Página de partidos del historial, del más reciente al más antiguo, paginada por `_id` (keyset).
+    Por defecto solo trae el resumen de cada partido; con `expandir_acciones` incluye sus acciones.
+    `siguiente_cursor` es el `_id` a enviar como `cursor` para pedir la página siguiente.
+    Usa los índices (equipo, _id) y (ciudad, país, _id) de Config/indices.py.
+    """
+    limit = max(1, min(limit, PAGINA_PARTIDOS_MAX))
+    if cursor:
+        if not ObjectId.is_valid(cursor):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        filtro = {'$and': [filtro, {'_id': {'$lt': ObjectId(cursor)}}]}
+
+    proyeccion = dict(CAMPOS_RESUMEN_PARTIDO)
+    if expandir_acciones:
+        proyeccion['acciones'] = 1
+
+    # Se pide un partido de más para saber si hay página siguiente
+    partidos = list(db['historial'].find(filtro, proyeccion).sort('_id', -1).limit(limit + 1))
+    hay_mas = len(partidos) > limit
+    partidos = partidos[:limit]
+    for partido in partidos:
+        # Fecha del juego copiada en el historial; la de creación del documento solo si aún no la tiene
+        fecha = partido.get('fecha') or partido['_id'].generation_time
+        partido['fecha'] = fecha.isoformat() if isinstance(fecha, datetime) else fecha
+
+    return {
+        'partidos': estadistica_util.convertir_objectid_a_string(partidos),
+        'paginacion': {
+            'limit': limit,
+            'siguiente_cursor': str(partidos[-1]['_id']) if hay_mas else None
+        }
+    }
+
+
+
+def obtener_partidos_jugador(nombre: str, pais: str, estado: str = None) -> List[Dict]:
+    """
+    Obtiene los partidos de un jugador con solo sus propias acciones, filtradas en MongoDB.
+    Cada partido incluye `total_acciones_equipo` con el número de acciones de su selección en ese partido.
+    Con `estado` solo se consideran los partidos del historial en ese estado.
+    """
+    filtro = {"acciones": {"$elemMatch": {"jugador": nombre, "equipo": pais}}}
+    if estado:
+        filtro['estado'] = estado
+    pipeline = [
+        # Nombre y selección en la misma acción: usa el índice multikey (acciones.jugador, acciones.equipo)
+        {'$match': filtro},
+        {'$addFields': {
+            'total_acciones_equipo': {'$size': {'$filter': {
+                'input': '$acciones', 'as': 'accion',
+                'cond': {'$eq': ['$$accion.equipo', pais]}
+            }}},
+            'acciones': {'$filter': {
+                'input': '$acciones', 'as': 'accion',
+                'cond': {'$and': [
+                    {'$eq': ['$$accion.jugador', nombre]},
+                    {'$eq': ['$$accion.equipo', pais]}
+                ]}
+            }}
+        }},
+        {'$project': CAMPOS_EXCLUIDOS_PARTIDO_JUGADOR}
+    ]
+    return list(db['historial'].aggregate(pipeline))
+
+
+def get_pais_detalle(id, logger, limit: int = PAGINA_PARTIDOS_DEFECTO, cursor: str = None,
+                     expandir_acciones: bool = False):
     try:        
         collection = db['paises']
         logger.info(f"Consultando coleccionable para el usuario {id}")
-        # Ejecutar la consulta
-        pais = collection.find_one({'_id': ObjectId(id)})
+        # Catálogo en memoria; solo se consulta MongoDB si el país es más reciente que el catálogo
+        pais = referencia_service.pais_por_object_id(id) or collection.find_one({'_id': ObjectId(id)})
         
         if not pais:
             logger.info(f"Coleccionable para el usuario {id} no encontrado. Creando nuevo coleccionable.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pais no encontrado")
         
-        pais['partidos'] = list(db['historial'].find({"equipo_local": pais['nombre']})) + list(db['historial'].find({"equipo_visitante": pais['nombre']}))
+        pagina = listar_partidos({'$or': [{"equipo_local": pais['nombre']}, {"equipo_visitante": pais['nombre']}]},
+                                 limit, cursor, expandir_acciones)
         pais = estadistica_util.convertir_objectid_a_string(pais)
+        pais.update(pagina)
         
         return pais              
     except GoogleAPIError as e:
@@ -51,15 +141,12 @@ def get_jugador_basic(id, logger):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Jugador no encontrado")
         
         # Obtener información del país
-        pais_info = db['paises'].find_one({'id': jugador.get('pais_id')})
-        jugador['pais'] = pais_info['nombre'] if pais_info else 'Desconocido'
+        jugador['pais'] = referencia_service.nombre_pais(jugador.get('pais_id'))
         
-        # Obtener historial de partidos
-        filtro_busqueda = {
-            "acciones.jugador": jugador['nombre'],
-            "acciones.equipo": jugador['pais']
-        }
-        partidos = list(db['historial'].find(filtro_busqueda))
+        # Obtener historial de partidos (solo con las acciones del jugador)
+        partidos = obtener_partidos_jugador(jugador['nombre'], jugador['pais'])
+        for partido in partidos:
+            partido.pop('total_acciones_equipo', None)
         jugador['partidos'] = partidos
         
         # Convertir ObjectId a string
@@ -87,163 +174,37 @@ def get_jugador_detalle(id, logger):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Jugador no encontrado")
         
         # Obtener información del país
-        pais_info = db['paises'].find_one({'id': jugador.get('pais_id')})
-        jugador['pais'] = pais_info['nombre'] if pais_info else 'Desconocido'
-        
-        # Obtener historial de partidos
-        filtro_busqueda = {
-            "acciones.jugador": jugador['nombre'],
-            "acciones.equipo": jugador['pais']
-        }
-        partidos = list(db['historial'].find(filtro_busqueda))
-        jugador['partidos'] = partidos
-        
-        # Extraer todas las acciones del jugador
-        acciones_jugador = estadistica_util.obtener_todas_acciones_jugador(partidos, jugador['nombre'])
-        
-        # Calcular estadísticas adicionales
-        partidos_jugados = len(partidos) if len(partidos) > 0 else 1
-        
-        # ========== DATOS DESCRIPTIVOS ==========
-        
-        # Perfil general
-        perfil_general = PerfilGeneral(
-            nombre=jugador.get('nombre', 'Desconocido'),
-            posicion=estadistica_util.mapear_posicion(jugador.get('posicion_id', 0)),
-            pie_habil=jugador.get('pie_habil', 'derecho'),
-            numero=jugador.get('numero', 0),
-            equipo_pais=jugador['pais'],
-            titular=bool(jugador.get('titular', 0))
-        )
-        
-        # Atributos físicos y técnicos
-        velocidad = int(jugador.get('velocidad', 70))
-        resistencia = int(jugador.get('resistencia', 70))
-        fuerza_fisica = int(jugador.get('fuerza_fisica', 70))
-        control_balon = int(jugador.get('control_balon', 70))
-        regate = int(jugador.get('regate', 70))
-        precision_pase = int(jugador.get('precision_pase', 70))
-        
-        fisico_promedio = (velocidad + resistencia + fuerza_fisica) / 3
-        tecnico_promedio = (control_balon + regate + precision_pase) / 3
-        
-        lista_atributos = {
-            'precision_tiro': int(jugador.get('precision_tiro', 70)),
-            'precision_pase': int(jugador.get('precision_pase', 70)),
-            'regate': int(jugador.get('regate', 70)),
-            'fuerza_disparo': int(jugador.get('fuerza_disparo', 70)),
-            'vision_juego': int(jugador.get('vision_juego', 70)),
-            'anticipacion': int(jugador.get('anticipacion', 70)),
-            'control_balon': int(jugador.get('control_balon', 70)),
-            'juego_aereo': int(jugador.get('juego_aereo', 70)),
-            'velocidad': velocidad,
-            'resistencia': resistencia,
-            'fuerza_fisica': fuerza_fisica,
-            'agilidad': int(jugador.get('agilidad', 70)),
-            'compostura': int(jugador.get('compostura', 70)),
-            'agresividad': int(jugador.get('agresividad', 50)),
-            'concentracion': int(jugador.get('concentracion', 70))
-        }
-        
-        atributos_fisicos_tecnicos = AtributosFisicosTecnicos(
-            fisico=round(fisico_promedio, 2),
-            tecnico=round(tecnico_promedio, 2),
-            lista_completa=lista_atributos
-        )
-        
-        # Estado actual
-        bonificaciones_lista = []
-        if jugador.get('especialista_penales'):
-            bonificaciones_lista.append('Especialista en penales')
-        if jugador.get('especialista_tiros_libres'):
-            bonificaciones_lista.append('Especialista en tiros libres')
-        if jugador.get('bonificaciones'):
-            bonificaciones_lista.extend(jugador.get('bonificaciones', []))
-        
-        estado_actual = EstadoActual(
-            rendimiento=int(jugador.get('rendimiento', 70)),
-            forma_actual=int(jugador.get('forma_actual', 70)),
-            moral=int(jugador.get('moral', 70)),
-            bonificaciones=bonificaciones_lista
-        )
-        
-        # Historial temporada
-        asistencias_calculadas = estadistica_util.calcular_asistencias(acciones_jugador)
-        
-        historial_temporada = HistorialTemporada(
-            goles_totales=jugador.get('goles', 0) + jugador.get('goles_temp', 0),
-            asistencias=asistencias_calculadas,
-            faltas_acumuladas=jugador.get('faltas', 0) + jugador.get('faltas_temp', 0),
-            lesiones_total=jugador.get('lesiones', 0)
-        )
-        
-        datos_descriptivos = DatosDescriptivos(
-            perfil_general=perfil_general,
-            atributos_fisicos_tecnicos=atributos_fisicos_tecnicos,
-            estado_actual=estado_actual,
-            historial_temporada=historial_temporada
-        )
-        
-        # ========== PROBABILIDADES PREDICTIVAS ==========
-        
-        probabilidades_predictivas = ProbabilidadesPredictivas(
-            exito_pases=round(estadistica_util.calcular_probabilidad_exito_pases(jugador, acciones_jugador), 2),
-            precision_tiros=round(estadistica_util.calcular_probabilidad_precision_tiros(jugador, acciones_jugador), 2),
-            exito_regates=round(estadistica_util.calcular_probabilidad_exito_regates(jugador, acciones_jugador), 2),
-            recuperaciones=round(estadistica_util.calcular_probabilidad_recuperaciones(jugador, acciones_jugador), 2),
-            fatiga_desgaste=round(estadistica_util.calcular_fatiga_desgaste(jugador, acciones_jugador), 2),
-            faltas_cometidas=round(estadistica_util.calcular_probabilidad_faltas(jugador, acciones_jugador), 2),
-            contribucion_gol=round(estadistica_util.calcular_contribucion_gol(jugador, acciones_jugador, partidos_jugados), 2)
-        )
-        
-        # ========== ESTADÍSTICAS ANALÍTICAS ==========
-        
-        # Calcular total de acciones del equipo
-        total_acciones_equipo = 0
-        for partido in partidos:
-            if 'acciones' in partido:
-                acciones_equipo = [a for a in partido['acciones'] if a.get('equipo') == jugador['pais']]
-                total_acciones_equipo += len(acciones_equipo)
-        
-        if total_acciones_equipo == 0:
-            total_acciones_equipo = 1
-        
-        # Calcular minutos totales
-        minutos_totales = 0
-        if len(acciones_jugador) > 0:
-            minutos_totales = max([a.get('minuto', 0) for a in acciones_jugador])
-        
-        precision_presion = estadistica_util.calcular_precision_bajo_presion(acciones_jugador)
-        
-        estadisticas_analiticas = EstadisticasAnaliticas(
-            tasa_posesion_individual=round(estadistica_util.calcular_tasa_posesion_individual(
-                acciones_jugador, total_acciones_equipo), 2),
-            pases_clave=estadistica_util.calcular_pases_clave(acciones_jugador),
-            precision_bajo_presion=PrecisionBajoPresion(
-                medio_central=round(precision_presion.get('medio_central', 0), 2),
-                defensivo=round(precision_presion.get('defensivo', 0), 2),
-                ofensivo=round(precision_presion.get('ofensivo', 0), 2)
-            ),
-            duelos_aereos_ganados=round(estadistica_util.calcular_duelos_aereos(jugador, acciones_jugador), 2),
-            indice_creacion=round(estadistica_util.calcular_indice_creacion(jugador, acciones_jugador, minutos_totales), 2),
-            eficiencia_defensiva=round(estadistica_util.calcular_eficiencia_defensiva(jugador, acciones_jugador), 2),
-            mapa_calor=estadistica_util.calcular_mapa_calor(acciones_jugador),
-            impacto_resultado=round(estadistica_util.calcular_impacto_resultado(acciones_jugador), 2),
-            tendencia_forma=round(estadistica_util.calcular_tendencia_forma(jugador, acciones_jugador), 2)
-        )
-        
-        # Convertir ObjectId a string
-        jugador = estadistica_util.convertir_objectid_a_string(jugador)
-        
-        # Crear respuesta completa
-        respuesta = JugadorDetalleResponse(
-            jugador_base=jugador,
-            datos_descriptivos=datos_descriptivos,
-            probabilidades_predictivas=probabilidades_predictivas,
-            estadisticas_analiticas=estadisticas_analiticas
-        )
-        
-        return respuesta.dict()
+        jugador['pais'] = referencia_service.nombre_pais(jugador.get('pais_id'))
+        
+        # Conteos materializados en jugador_stats: una lectura indexada en lugar de recorrer el historial,
+        # si siguen correspondiendo a los partidos finalizados del jugador
+        stats = None
+        if JUGADOR_STATS_MATERIALIZADO:
+            stats = jugador_stats_service.obtener_stats_jugador(jugador['nombre'], jugador['pais'])
+        
+        if stats:
+            acumulado = estadistica_util.AcumuladorJugador.desde_documento(stats)
+            total_acciones_equipo = stats.get('total_acciones_equipo', 0)
+            partidos_jugados = stats.get('partidos_jugados', 0)
+            jugador['partidos_ids'] = stats.get('partidos', [])
+        else:
+            # Partidos finalizados del jugador (solo con sus acciones), los mismos que cuenta jugador_stats
+            partidos = obtener_partidos_jugador(jugador['nombre'], jugador['pais'], estado='finalizado')
+            total_acciones_equipo = sum(partido.pop('total_acciones_equipo', 0) for partido in partidos)
+            jugador['partidos_ids'] = [str(partido['_id']) for partido in partidos]
+            
+            # Extraer todas las acciones del jugador y recorrerlas una sola vez
+            acciones_jugador = estadistica_util.obtener_todas_acciones_jugador(partidos, jugador['nombre'])
+            acumulado = estadistica_util.AcumuladorJugador(acciones_jugador)
+            partidos_jugados = len(partidos)
+            
+            # Conteos ausentes o desactualizados: se reescriben para que la próxima lectura use jugador_stats
+            if JUGADOR_STATS_MATERIALIZADO and partidos:
+                jugador_stats_service.reemplazar_stats_jugador(
+                    jugador['nombre'], jugador['pais'], acumulado, total_acciones_equipo,
+                    {str(partido['_id']): partido.get('revision') for partido in partidos})
+        
+        return construir_detalle_jugador(jugador, acumulado, partidos_jugados, total_acciones_equipo)
               
     except GoogleAPIError as e:
         logger.error(f"Error de MongoDB: {str(e)}")
@@ -252,20 +213,285 @@ def get_jugador_detalle(id, logger):
         logger.error(f"Error al obtener el jugador: {str(e)}")
         raise HTTPException(status_code=409, detail=f"Error al obtener el jugador: {str(e)}")
 
-def get_ciudad_detalle(id, logger):
+
+def acumular_jugadores_desde_historial(claves: set) -> Dict[tuple, tuple]:
+    """
+    Recorre una sola vez los partidos de las selecciones de los jugadores pedidos y reparte cada acción
+    en el acumulador de su (jugador, equipo).
+    Devuelve por clave: (acumulado, partidos_jugados, total_acciones_equipo, ids de partidos).
+    """
+    acumulados = {clave: estadistica_util.AcumuladorJugador() for clave in claves}
+    partidos_ids = defaultdict(list)
+    total_equipo = defaultdict(int)
+    equipos = list({equipo for _, equipo in claves})
+    filtro_partidos = {'estado': 'finalizado', '$or': [
+        {'equipo_local': {'$in': equipos}},
+        {'equipo_visitante': {'$in': equipos}}
+    ]}
+    for partido in db['historial'].find(filtro_partidos, {'acciones': 1}):
+        acciones_equipo = defaultdict(int)
+        presentes = set()
+        for accion in partido.get('acciones', []):
+            equipo = accion.get('equipo')
+            acciones_equipo[equipo] += 1
+            clave = (accion.get('jugador'), equipo)
+            acumulado = acumulados.get(clave)
+            if acumulado is not None:
+                acumulado.agregar(accion)
+                presentes.add(clave)
+        for clave in presentes:
+            partidos_ids[clave].append(str(partido['_id']))
+            total_equipo[clave] += acciones_equipo[clave[1]]
+    
+    return {
+        clave: (acumulados[clave], len(partidos_ids[clave]), total_equipo[clave], partidos_ids[clave])
+        for clave in claves
+    }
+
+
+def get_jugadores_detalle(ids: List[str], logger) -> Dict:
+    """
+    Detalle de varios jugadores en una sola petición.
+    Usa los conteos materializados vigentes; para el resto carga cada partido del historial
+    una sola vez y reparte sus acciones entre los jugadores pedidos en un único recorrido.
+    """
+    try:
+        logger.info(f"Consultando detalle de {len(ids)} jugadores")
+        object_ids = [ObjectId(id) for id in ids]
+        jugadores = {str(j['_id']): j for j in db['jugadores'].find({'_id': {'$in': object_ids}})}
+        
+        for jugador in jugadores.values():
+            jugador['pais'] = referencia_service.nombre_pais(jugador.get('pais_id'))
+        
+        claves = {(j['nombre'], j['pais']): j for j in jugadores.values()}
+        datos = {}
+        
+        # Conteos materializados en una sola lectura
+        if JUGADOR_STATS_MATERIALIZADO and claves:
+            filtro = {'$or': [{'jugador': nombre, 'equipo': equipo} for nombre, equipo in claves]}
+            revisiones = {}
+            for stats in db[jugador_stats_service.COLECCION].find(filtro):
+                clave = (stats['jugador'], stats['equipo'])
+                revisiones[clave] = stats.get('revisiones')
+                datos[clave] = (
+                    estadistica_util.AcumuladorJugador.desde_documento(stats),
+                    stats.get('partidos_jugados', 0),
+                    stats.get('total_acciones_equipo', 0),
+                    stats.get('partidos', [])
+                )
+            if revisiones:
+                nombres = list({nombre for nombre, _ in revisiones})
+                for clave in jugador_stats_service.claves_desactualizadas(
+                        revisiones, {'acciones.jugador': {'$in': nombres}}):
+                    del datos[clave]
+        
+        # Jugadores sin materializar: un solo recorrido sobre los partidos de sus selecciones
+        pendientes = {clave for clave in claves if clave not in datos}
+        if pendientes:
+            datos.update(acumular_jugadores_desde_historial(pendientes))
+        
+        respuesta = []
+        no_encontrados = []
+        for id in ids:
+            jugador = jugadores.get(id)
+            if not jugador:
+                no_encontrados.append(id)
+                continue
+            acumulado, partidos_jugados, total_acciones_equipo, partidos = datos[(jugador['nombre'], jugador['pais'])]
+            jugador = dict(jugador, partidos_ids=partidos)
+            respuesta.append(construir_detalle_jugador(jugador, acumulado, partidos_jugados, total_acciones_equipo))
+        
+        return {"jugadores": respuesta, "no_encontrados": no_encontrados}
+    
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener los jugadores: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener los jugadores: {str(e)}")
+
+
+def construir_detalle_jugador(jugador: Dict, acumulado: estadistica_util.AcumuladorJugador,
+                              partidos_jugados: int, total_acciones_equipo: int) -> Dict:
+    """
+    Construye la respuesta de detalle de un jugador a partir de sus acciones acumuladas.
+    `jugador` debe incluir el nombre de su país en `pais`.
+    La respuesta se arma directamente como dict; con VALIDAR_RESPUESTAS se valida contra JugadorDetalleResponse.
+    """
+    # ========== DATOS DESCRIPTIVOS ==========
+    
+    # Perfil general
+    perfil_general = {
+        'nombre': jugador.get('nombre', 'Desconocido'),
+        'posicion': estadistica_util.mapear_posicion(jugador.get('posicion_id', 0)),
+        'pie_habil': jugador.get('pie_habil', 'derecho'),
+        'numero': jugador.get('numero', 0),
+        'equipo_pais': jugador['pais'],
+        'titular': bool(jugador.get('titular', 0))
+    }
+    
+    # Atributos físicos y técnicos
+    velocidad = int(jugador.get('velocidad', 70))
+    resistencia = int(jugador.get('resistencia', 70))
+    fuerza_fisica = int(jugador.get('fuerza_fisica', 70))
+    control_balon = int(jugador.get('control_balon', 70))
+    regate = int(jugador.get('regate', 70))
+    precision_pase = int(jugador.get('precision_pase', 70))
+    
+    fisico_promedio = (velocidad + resistencia + fuerza_fisica) / 3
+    tecnico_promedio = (control_balon + regate + precision_pase) / 3
+    
+    lista_atributos = {
+        'precision_tiro': int(jugador.get('precision_tiro', 70)),
+        'precision_pase': int(jugador.get('precision_pase', 70)),
+        'regate': int(jugador.get('regate', 70)),
+        'fuerza_disparo': int(jugador.get('fuerza_disparo', 70)),
+        'vision_juego': int(jugador.get('vision_juego', 70)),
+        'anticipacion': int(jugador.get('anticipacion', 70)),
+        'control_balon': int(jugador.get('control_balon', 70)),
+        'juego_aereo': int(jugador.get('juego_aereo', 70)),
+        'velocidad': velocidad,
+        'resistencia': resistencia,
+        'fuerza_fisica': fuerza_fisica,
+        'agilidad': int(jugador.get('agilidad', 70)),
+        'compostura': int(jugador.get('compostura', 70)),
+        'agresividad': int(jugador.get('agresividad', 50)),
+        'concentracion': int(jugador.get('concentracion', 70))
+    }
+    
+    atributos_fisicos_tecnicos = {
+        'fisico': round(fisico_promedio, 2),
+        'tecnico': round(tecnico_promedio, 2),
+        'lista_completa': lista_atributos
+    }
+    
+    # Estado actual
+    bonificaciones_lista = []
+    if jugador.get('especialista_penales'):
+        bonificaciones_lista.append('Especialista en penales')
+    if jugador.get('especialista_tiros_libres'):
+        bonificaciones_lista.append('Especialista en tiros libres')
+    if jugador.get('bonificaciones'):
+        bonificaciones_lista.extend(jugador.get('bonificaciones', []))
+    
+    estado_actual = {
+        'rendimiento': int(jugador.get('rendimiento', 70)),
+        'forma_actual': int(jugador.get('forma_actual', 70)),
+        'moral': int(jugador.get('moral', 70)),
+        'bonificaciones': bonificaciones_lista
+    }
+    
+    # Historial temporada
+    asistencias_calculadas = estadistica_util.calcular_asistencias(acumulado)
+    
+    historial_temporada = {
+        'goles_totales': jugador.get('goles', 0) + jugador.get('goles_temp', 0),
+        'asistencias': asistencias_calculadas,
+        'faltas_acumuladas': jugador.get('faltas', 0) + jugador.get('faltas_temp', 0),
+        'lesiones_total': jugador.get('lesiones', 0)
+    }
+    
+    datos_descriptivos = {
+        'perfil_general': perfil_general,
+        'atributos_fisicos_tecnicos': atributos_fisicos_tecnicos,
+        'estado_actual': estado_actual,
+        'historial_temporada': historial_temporada
+    }
+    
+    # ========== PROBABILIDADES PREDICTIVAS ==========
+    
+    probabilidades_predictivas = calcular_probabilidades_predictivas(jugador, acumulado, partidos_jugados)
+    
+    # ========== ESTADÍSTICAS ANALÍTICAS ==========
+    
+    estadisticas_analiticas = calcular_estadisticas_analiticas(jugador, acumulado, total_acciones_equipo)
+    
+    # Convertir ObjectId a string
+    jugador = estadistica_util.convertir_objectid_a_string(jugador)
+    
+    # Crear respuesta completa
+    respuesta = {
+        'jugador_base': jugador,
+        'datos_descriptivos': datos_descriptivos,
+        'probabilidades_predictivas': probabilidades_predictivas,
+        'estadisticas_analiticas': estadisticas_analiticas
+    }
+    
+    if VALIDAR_RESPUESTAS:
+        return JugadorDetalleResponse.model_validate(respuesta).model_dump()
+    return respuesta
+
+
+def _redondear(valor) -> float:
+    """Redondea a 2 decimales conservando el tipo float que declaran los schemas de respuesta."""
+    return round(float(valor), 2)
+
+
+def calcular_probabilidades_predictivas(jugador: Dict, acumulado: estadistica_util.AcumuladorJugador,
+                                        partidos_jugados: int) -> Dict[str, float]:
+    """Probabilidades predictivas de un jugador, redondeadas a 2 decimales."""
+    if partidos_jugados == 0:
+        partidos_jugados = 1
+    
+    return {
+        'exito_pases': _redondear(estadistica_util.calcular_probabilidad_exito_pases(jugador, acumulado)),
+        'precision_tiros': _redondear(estadistica_util.calcular_probabilidad_precision_tiros(jugador, acumulado)),
+        'exito_regates': _redondear(estadistica_util.calcular_probabilidad_exito_regates(jugador, acumulado)),
+        'recuperaciones': _redondear(estadistica_util.calcular_probabilidad_recuperaciones(jugador, acumulado)),
+        'fatiga_desgaste': _redondear(estadistica_util.calcular_fatiga_desgaste(jugador, acumulado)),
+        'faltas_cometidas': _redondear(estadistica_util.calcular_probabilidad_faltas(jugador, acumulado)),
+        'contribucion_gol': _redondear(estadistica_util.calcular_contribucion_gol(jugador, acumulado, partidos_jugados))
+    }
+
+
+def calcular_estadisticas_analiticas(jugador: Dict, acumulado: estadistica_util.AcumuladorJugador,
+                                     total_acciones_equipo: int) -> Dict[str, Any]:
+    """Estadísticas analíticas de un jugador, redondeadas a 2 decimales."""
+    # Total de acciones del equipo (contado en MongoDB por partido)
+    if total_acciones_equipo == 0:
+        total_acciones_equipo = 1
+    
+    # Calcular minutos totales
+    minutos_totales = acumulado.max_minuto if acumulado.total_acciones > 0 else 0
+    
+    precision_presion = estadistica_util.calcular_precision_bajo_presion(acumulado)
+    
+    return {
+        'tasa_posesion_individual': _redondear(estadistica_util.calcular_tasa_posesion_individual(
+            acumulado, total_acciones_equipo)),
+        'pases_clave': estadistica_util.calcular_pases_clave(acumulado),
+        'precision_bajo_presion': {
+            'medio_central': _redondear(precision_presion.get('medio_central', 0)),
+            'defensivo': _redondear(precision_presion.get('defensivo', 0)),
+            'ofensivo': _redondear(precision_presion.get('ofensivo', 0))
+        },
+        'duelos_aereos_ganados': _redondear(estadistica_util.calcular_duelos_aereos(jugador, acumulado)),
+        'indice_creacion': _redondear(estadistica_util.calcular_indice_creacion(jugador, acumulado, minutos_totales)),
+        'eficiencia_defensiva': _redondear(estadistica_util.calcular_eficiencia_defensiva(jugador, acumulado)),
+        'mapa_calor': estadistica_util.calcular_mapa_calor(acumulado),
+        'impacto_resultado': _redondear(estadistica_util.calcular_impacto_resultado(acumulado)),
+        'tendencia_forma': _redondear(estadistica_util.calcular_tendencia_forma(jugador, acumulado))
+    }
+
+
+def get_ciudad_detalle(id, logger, limit: int = PAGINA_PARTIDOS_DEFECTO, cursor: str = None,
+                       expandir_acciones: bool = False):
     try:        
         collection = db['ciudades']
         logger.info(f"Consultando coleccionable para el usuario {id}")
-        # Ejecutar la consulta
-        ciudad = collection.find_one({'_id': ObjectId(id)})
+        # Catálogo en memoria; solo se consulta MongoDB si la ciudad es más reciente que el catálogo
+        ciudad = referencia_service.ciudad_por_object_id(id) or collection.find_one({'_id': ObjectId(id)})
         
         if not ciudad:
             logger.info(f"Coleccionable para el usuario {id} no encontrado. Creando nuevo coleccionable.")
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Ciudad no encontrada")
         
-        ciudad['pais'] = db['paises'].find_one({'id': ciudad['pais_id']})['nombre']        
-        ciudad['partidos'] = list(db['historial'].find({"ubicacion.ciudad": ciudad['nombre'], "ubicacion.pais": ciudad['pais']}))
+        ciudad = dict(ciudad)
+        ciudad['pais'] = referencia_service.pais_por_id(ciudad['pais_id'])['nombre']
+        pagina = listar_partidos({"ubicacion.ciudad": ciudad['nombre'], "ubicacion.pais": ciudad['pais']},
+                                 limit, cursor, expandir_acciones)
         ciudad = estadistica_util.convertir_objectid_a_string(ciudad)
+        ciudad.update(pagina)
         
         return ciudad              
     except GoogleAPIError as e:
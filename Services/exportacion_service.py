@@ -0,0 +1,210 @@
+"""
+Módulo de exportación del historial en formato tabular (CSV, Arrow IPC o Parquet).
+Las filas se leen de un cursor de MongoDB por lotes y se emiten por bloques, de modo que la memoria usada
+no depende del tamaño del torneo. Arrow y Parquet usan `pyarrow` (en requirements.txt; sin él responden 400).
+"""
+import csv
+import io
+from typing import Dict, Iterator, List, Optional
+
+from fastapi import HTTPException, status
+
+from Config.database import db
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Partidos del historial por lote del cursor y filas por bloque emitido
+TAMANO_LOTE = 100
+FILAS_POR_BLOQUE = 10000
+
+FORMATOS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'arrow': ('application/vnd.apache.arrow.stream', 'arrow'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Columnas de cada exportación con su tipo: str, int o bool
+COLUMNAS = {
+    'acciones': (
+        ('partido_id', str), ('partido_original_id', str), ('equipo_local', str), ('equipo_visitante', str),
+        ('equipo', str), ('jugador', str), ('minuto', int), ('segundo', int), ('tipo', str), ('sector', str),
+        ('lado', str), ('importancia', str), ('exito', bool)
+    ),
+    'partidos': (
+        ('partido_id', str), ('partido_original_id', str), ('equipo_local', str), ('equipo_visitante', str),
+        ('goles_local', int), ('goles_visitante', int), ('ganador', str), ('asistencia', int), ('ciudad', str),
+        ('estadio', str), ('pais', str), ('tarjetas_amarillas', int), ('tarjetas_rojas', int), ('acciones', int)
+    ),
+}
+
+PROYECCIONES = {
+    'acciones': {
+        'partido_original_id': 1, 'equipo_local': 1, 'equipo_visitante': 1, 'acciones.equipo': 1,
+        'acciones.jugador': 1, 'acciones.minuto': 1, 'acciones.segundo': 1, 'acciones.tipo': 1,
+        'acciones.sector': 1, 'acciones.lado': 1, 'acciones.importancia': 1, 'acciones.exito': 1
+    },
+    'partidos': {
+        'partido_original_id': 1, 'equipo_local': 1, 'equipo_visitante': 1, 'goles_local': 1,
+        'goles_visitante': 1, 'ganador': 1, 'asistencia': 1, 'ubicacion': 1,
+        'tarjetas_amarillas_detalle.minuto': 1, 'tarjetas_rojas_detalle.minuto': 1, 'acciones.minuto': 1
+    },
+}
+
+_ARROW_TIPOS = {str: 'string', int: 'int64', bool: 'bool'}
+
+
+def _convertir(valor, tipo):
+    """Convierte el valor al tipo de la columna; None si falta o no es convertible."""
+    if valor is None or valor == '':
+        return None
+    try:
+        return tipo(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _fila(valores: Dict, columnas) -> Dict:
+    return {nombre: _convertir(valores.get(nombre), tipo) for nombre, tipo in columnas}
+
+
+def _filas_partido(partido: Dict, tabla: str) -> Iterator[Dict]:
+    columnas = COLUMNAS[tabla]
+    base = {
+        'partido_id': str(partido['_id']),
+        'partido_original_id': partido.get('partido_original_id'),
+        'equipo_local': partido.get('equipo_local'),
+        'equipo_visitante': partido.get('equipo_visitante'),
+    }
+    if tabla == 'acciones':
+        for accion in partido.get('acciones', []):
+            yield _fila(dict(accion, **base), columnas)
+        return
+
+    ubicacion = partido.get('ubicacion') or {}
+    yield _fila(dict(
+        base,
+        goles_local=partido.get('goles_local'),
+        goles_visitante=partido.get('goles_visitante'),
+        ganador=partido.get('ganador'),
+        asistencia=partido.get('asistencia'),
+        ciudad=ubicacion.get('ciudad'),
+        estadio=ubicacion.get('estadio'),
+        pais=ubicacion.get('pais'),
+        tarjetas_amarillas=len(partido.get('tarjetas_amarillas_detalle', [])),
+        tarjetas_rojas=len(partido.get('tarjetas_rojas_detalle', [])),
+        acciones=len(partido.get('acciones', []))
+    ), columnas)
+
+
+def bloques_filas(tabla: str, filas_por_bloque: int = FILAS_POR_BLOQUE,
+                  tamano_lote: int = TAMANO_LOTE) -> Iterator[List[Dict]]:
+    """Filas planas de `tabla` en bloques de hasta `filas_por_bloque`, leídas del historial en orden de `_id`."""
+    cursor = db['historial'].find({}, PROYECCIONES[tabla], batch_size=tamano_lote).sort('_id', 1)
+    bloque = []
+    for partido in cursor:
+        for fila in _filas_partido(partido, tabla):
+            bloque.append(fila)
+            if len(bloque) >= filas_por_bloque:
+                yield bloque
+                bloque = []
+    if bloque:
+        yield bloque
+
+
+class _SalidaIncremental(io.RawIOBase):
+    """Destino de escritura que acumula bytes hasta que se vacía; pyarrow escribe en él como en un archivo."""
+
+    def __init__(self):
+        self._partes = []
+        self._posicion = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        datos = bytes(datos)
+        self._partes.append(datos)
+        self._posicion += len(datos)
+        return len(datos)
+
+    def tell(self) -> int:
+        return self._posicion
+
+    def vaciar(self) -> bytes:
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _esquema_arrow(tabla: str):
+    return pyarrow.schema([(nombre, _ARROW_TIPOS[tipo]) for nombre, tipo in COLUMNAS[tabla]])
+
+
+def _csv(tabla: str, bloques) -> Iterator[bytes]:
+    salida = io.StringIO()
+    escritor = csv.DictWriter(salida, fieldnames=[nombre for nombre, _ in COLUMNAS[tabla]])
+    escritor.writeheader()
+    for bloque in bloques:
+        escritor.writerows(bloque)
+        yield salida.getvalue().encode('utf-8')
+        salida.seek(0)
+        salida.truncate()
+    if salida.tell():
+        yield salida.getvalue().encode('utf-8')
+
+
+def _arrow(tabla: str, bloques) -> Iterator[bytes]:
+    esquema = _esquema_arrow(tabla)
+    salida = _SalidaIncremental()
+    with pyarrow.ipc.new_stream(salida, esquema) as escritor:
+        for bloque in bloques:
+            escritor.write_batch(pyarrow.RecordBatch.from_pylist(bloque, schema=esquema))
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+
+def _parquet(tabla: str, bloques) -> Iterator[bytes]:
+    esquema = _esquema_arrow(tabla)
+    salida = _SalidaIncremental()
+    # Cada bloque se escribe como un row group; el pie del archivo se emite al final
+    with pyarrow.parquet.ParquetWriter(salida, esquema, compression='zstd') as escritor:
+        for bloque in bloques:
+            escritor.write_table(pyarrow.Table.from_pylist(bloque, schema=esquema))
+            yield salida.vaciar()
+    yield salida.vaciar()
+
+
+_ESCRITORES = {'csv': _csv, 'arrow': _arrow, 'parquet': _parquet}
+
+
+def validar_exportacion(tabla: str, formato: str) -> None:
+    """Comprueba la tabla y el formato antes de empezar a transmitir la respuesta."""
+    if tabla not in COLUMNAS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Exportación desconocida: {tabla}. Disponibles: {', '.join(COLUMNAS)}")
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"Formato desconocido: {formato}. Disponibles: {', '.join(FORMATOS)}")
+    if formato != 'csv' and pyarrow is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"El formato {formato} requiere el paquete pyarrow")
+
+
+def exportar(tabla: str, formato: str, logger, filas_por_bloque: int = FILAS_POR_BLOQUE,
+             tamano_lote: int = TAMANO_LOTE) -> Iterator[bytes]:
+    """Genera el archivo exportado por partes, listas para escribirse o transmitirse."""
+    validar_exportacion(tabla, formato)
+    logger.info(f"Exportando {tabla} en formato {formato}")
+    return _ESCRITORES[formato](tabla, bloques_filas(tabla, filas_por_bloque, tamano_lote))
+
+
+def tipo_contenido(formato: str) -> str:
+    return FORMATOS[formato][0]
+
+
+def nombre_archivo(tabla: str, formato: str, sufijo: Optional[str] = None) -> str:
+    return f"{tabla}{'_' + sufijo if sufijo else ''}.{FORMATOS[formato][1]}"
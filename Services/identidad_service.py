@@ -0,0 +1,134 @@
+"""
+Módulo del índice de identidades: (nombre, selección) -> id de jugador y selección -> id de país.
+Las acciones del historial solo traen nombres; el índice permite sellarles ids enteros para que los cruces
+y agrupaciones usen ints y dos jugadores homónimos de distintas selecciones no se mezclen.
+El índice se persiste en la colección `identidades` y se reconstruye cuando cambia el contador de cambios de los
+datos (escrituras de la aplicación), el número de jugadores o países, o pasados IDENTIDAD_MAX_EDAD_SEG (ediciones
+externas de `jugadores`, como renombres o cambios de selección, que no alteran ningún conteo).
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from Config.database import db
+from Config.settings import IDENTIDAD_MAX_EDAD_SEG, IDENTIDAD_TTL_SEG
+from Services import referencia_service
+from Services import version_service
+
+COLECCION = 'identidades'
+DOCUMENTO_ID = 'actual'
+
+_lock = threading.Lock()
+_cache = {"indice": None, "consultado_en": 0.0}
+
+
+class IndiceIdentidad:
+    """Mapas de nombres a ids enteros de jugadores y países."""
+
+    def __init__(self, jugadores: Dict[Tuple[str, str], int], paises: Dict[str, int], huella: str,
+                 generado_en: Optional[datetime] = None):
+        self.jugadores = jugadores
+        self.paises = paises
+        self.huella = huella
+        self.generado_en = generado_en or datetime.now()
+
+    def vigente(self, huella: str) -> bool:
+        """Misma huella y generado hace menos de IDENTIDAD_MAX_EDAD_SEG."""
+        return self.huella == huella and datetime.now() - self.generado_en < timedelta(seconds=IDENTIDAD_MAX_EDAD_SEG)
+
+    def jugador_id(self, nombre: Optional[str], equipo: Optional[str]) -> Optional[int]:
+        return self.jugadores.get((nombre, equipo))
+
+    def pais_id(self, equipo: Optional[str]) -> Optional[int]:
+        return self.paises.get(equipo)
+
+    def sellar_acciones(self, acciones: List[Dict]) -> List[Dict]:
+        """Agrega `jugador_id` y `pais_id` a cada acción (None si el nombre no está en el índice)."""
+        for accion in acciones:
+            equipo = accion.get('equipo')
+            accion['pais_id'] = self.paises.get(equipo)
+            accion['jugador_id'] = self.jugadores.get((accion.get('jugador'), equipo))
+        return acciones
+
+    def sellar_historial(self, historial: List[Dict]) -> List[Dict]:
+        """Sella los ids en las acciones de todos los partidos del historial."""
+        for partido in historial:
+            self.sellar_acciones(partido.get('acciones', []))
+        return historial
+
+
+def _huella_actual() -> str:
+    """Huella barata de las colecciones de origen del índice: contador de cambios de los datos y conteos."""
+    return (f"{version_service.contador_cambios()}-{db['jugadores'].estimated_document_count()}-"
+            f"{len(referencia_service.paises())}")
+
+
+def construir_indice(huella: Optional[str] = None) -> IndiceIdentidad:
+    """Construye el índice desde `jugadores` y `paises`."""
+    huella = huella or _huella_actual()
+    paises_por_id = {p['id']: p['nombre'] for p in referencia_service.paises() if p.get('nombre') and p.get('id') is not None}
+    paises = {nombre: pais_id for pais_id, nombre in paises_por_id.items()}
+
+    jugadores = {}
+    for jugador in db['jugadores'].find({}, {'id': 1, 'nombre': 1, 'pais_id': 1}):
+        equipo = paises_por_id.get(jugador.get('pais_id'))
+        if jugador.get('nombre') and equipo and jugador.get('id') is not None:
+            # Ante duplicados exactos (mismo nombre y selección) se conserva el primero
+            jugadores.setdefault((jugador['nombre'], equipo), jugador['id'])
+    return IndiceIdentidad(jugadores, paises, huella)
+
+
+def guardar_indice(indice: IndiceIdentidad) -> None:
+    """Persiste el índice para que otros workers lo carguen sin reconstruirlo."""
+    db[COLECCION].replace_one({'_id': DOCUMENTO_ID}, {
+        '_id': DOCUMENTO_ID,
+        'huella': indice.huella,
+        'jugadores': [[nombre, equipo, jugador_id] for (nombre, equipo), jugador_id in indice.jugadores.items()],
+        'paises': [[nombre, pais_id] for nombre, pais_id in indice.paises.items()],
+        'generado_en': indice.generado_en
+    }, upsert=True)
+
+
+def cargar_indice() -> Optional[IndiceIdentidad]:
+    """Lee el índice persistido, si existe."""
+    documento = db[COLECCION].find_one({'_id': DOCUMENTO_ID})
+    if not documento:
+        return None
+    jugadores = {(nombre, equipo): jugador_id for nombre, equipo, jugador_id in documento.get('jugadores', [])}
+    paises = {nombre: pais_id for nombre, pais_id in documento.get('paises', [])}
+    return IndiceIdentidad(jugadores, paises, documento.get('huella'), documento.get('generado_en'))
+
+
+def reconstruir_indice(logger) -> IndiceIdentidad:
+    """Reconstruye y persiste el índice, reemplazando el que esté en caché."""
+    indice = construir_indice()
+    guardar_indice(indice)
+    with _lock:
+        _cache["indice"] = indice
+        _cache["consultado_en"] = time.monotonic()
+    logger.info(f"Índice de identidades reconstruido: {len(indice.jugadores)} jugadores, {len(indice.paises)} países")
+    return indice
+
+
+def obtener_indice(logger) -> IndiceIdentidad:
+    """
+    Devuelve el índice en caché, comprobando cada IDENTIDAD_TTL_SEG que siga vigente.
+    Si el persistido no corresponde a la huella actual o es más antiguo que IDENTIDAD_MAX_EDAD_SEG, se reconstruye.
+    """
+    ahora = time.monotonic()
+    with _lock:
+        indice = _cache["indice"]
+        if indice is not None and ahora - _cache["consultado_en"] < IDENTIDAD_TTL_SEG:
+            return indice
+
+    huella = _huella_actual()
+    if indice is None or not indice.vigente(huella):
+        indice = cargar_indice()
+        if indice is None or not indice.vigente(huella):
+            return reconstruir_indice(logger)
+
+    with _lock:
+        _cache["indice"] = indice
+        _cache["consultado_en"] = ahora
+    return indice
@@ -0,0 +1,109 @@
+"""
+Módulo de gestión de índices a partir de la especificación declarativa de `Config/indices.py`:
+compara los índices existentes con los esperados, los crea o reconcilia y verifica al iniciar la aplicación.
+"""
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from pymongo.errors import PyMongoError
+
+from Config.database import db
+from Config.indices import INDICES
+from Config.settings import INDICES_AL_INICIO, MONGODB_SNAPSHOT
+
+# Opciones que distinguen a dos índices con las mismas claves
+_OPCIONES = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+_asegurados = set()
+_lock = threading.Lock()
+
+
+def _claves(claves) -> tuple:
+    items = claves.items() if isinstance(claves, dict) else claves
+    return tuple((campo, int(direccion) if isinstance(direccion, (int, float)) else direccion)
+                 for campo, direccion in items)
+
+
+def _opciones(documento: Dict) -> Dict:
+    return {opcion: documento[opcion] for opcion in _OPCIONES if documento.get(opcion)}
+
+
+def comparar(coleccion: str) -> Dict[str, List[str]]:
+    """
+    Diferencias entre los índices de la colección y la especificación:
+    `faltantes` (no existen), `distintos` (mismas claves con otras opciones) y `sobrantes` (no especificados).
+    """
+    existentes = {_claves(info['key']): (nombre, info) for nombre, info in db[coleccion].index_information().items()}
+    faltantes, distintos, esperadas = [], [], set()
+    for indice in INDICES.get(coleccion, []):
+        documento = indice.document
+        claves = _claves(documento['key'])
+        esperadas.add(claves)
+        actual = existentes.get(claves)
+        if actual is None:
+            faltantes.append(documento['name'])
+        elif _opciones(actual[1]) != _opciones(documento):
+            distintos.append(actual[0])
+    sobrantes = [nombre for claves, (nombre, _) in existentes.items() if claves not in esperadas and nombre != '_id_']
+    return {'faltantes': faltantes, 'distintos': distintos, 'sobrantes': sobrantes}
+
+
+def reconciliar(logger, colecciones: Optional[Iterable[str]] = None, aplicar: bool = True,
+                eliminar_sobrantes: bool = False) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Crea los índices faltantes y recrea los que tienen otras opciones. Los índices que no están en la
+    especificación solo se eliminan con `eliminar_sobrantes`. Con `aplicar=False` solo reporta las diferencias.
+    """
+    reporte = {}
+    for coleccion in colecciones or INDICES:
+        diferencias = comparar(coleccion)
+        reporte[coleccion] = diferencias
+        if not aplicar:
+            continue
+        for nombre in diferencias['distintos']:
+            logger.info(f"Recreando índice {coleccion}.{nombre} con las opciones especificadas")
+            db[coleccion].drop_index(nombre)
+        pendientes = [
+            indice for indice in INDICES[coleccion]
+            if indice.document['name'] in diferencias['faltantes'] or indice.document['name'] in diferencias['distintos']
+        ]
+        if pendientes:
+            creados = db[coleccion].create_indexes(pendientes)
+            logger.info(f"Índices creados en {coleccion}: {', '.join(creados)}")
+        if eliminar_sobrantes:
+            for nombre in diferencias['sobrantes']:
+                logger.info(f"Eliminando índice no especificado {coleccion}.{nombre}")
+                db[coleccion].drop_index(nombre)
+    return reporte
+
+
+def asegurar_coleccion(coleccion: str) -> None:
+    """Crea (una vez por proceso) los índices especificados de una colección de la que depende la corrección."""
+    if coleccion in _asegurados:
+        return
+    with _lock:
+        if coleccion not in _asegurados:
+            db[coleccion].create_indexes(INDICES[coleccion])
+            _asegurados.add(coleccion)
+
+
+def verificar_al_inicio(logger) -> None:
+    """
+    Al iniciar la aplicación: con INDICES_AL_INICIO=verificar advierte de los índices faltantes o distintos,
+    con `crear` los reconcilia y con `no` no hace nada. En modo offline no hay índices que verificar.
+    """
+    if INDICES_AL_INICIO == 'no' or MONGODB_SNAPSHOT:
+        return
+    try:
+        if INDICES_AL_INICIO == 'crear':
+            reconciliar(logger)
+            return
+        for coleccion in INDICES:
+            diferencias = comparar(coleccion)
+            for nombre in diferencias['faltantes']:
+                logger.warning(f"Falta el índice {coleccion}.{nombre}; ejecutar `python -m Scripts.indices`")
+            for nombre in diferencias['distintos']:
+                logger.warning(f"El índice {coleccion}.{nombre} no tiene las opciones especificadas; "
+                               f"ejecutar `python -m Scripts.indices`")
+    except PyMongoError as e:
+        logger.warning(f"No se pudieron verificar los índices: {str(e)}")
@@ -0,0 +1,203 @@
+"""
+Módulo de carga masiva de `historial` y `juegos` desde archivos exportados (Extended JSON).
+Cada documento se valida contra su schema Pydantic y se escribe con `bulk_write` no ordenado en lotes;
+cada partido del historial recibe los datos de su juego (estado, fecha, fase...) y una `revision` nueva, y cada
+juego los propaga al historial ya cargado. Opcionalmente, en la misma pasada se escriben las operaciones de `jugador_stats` de los partidos finalizados.
+"""
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional
+
+from bson import ObjectId, json_util
+from pydantic import ValidationError
+from pymongo import InsertOne, ReplaceOne
+from pymongo.errors import BulkWriteError
+
+from Config.database import db
+from Schemas.historial import Historia
+from Schemas.juego import Juego
+from Services import desnormalizacion_service
+from Services import jugador_stats_service
+from Services import referencia_service
+from Services import version_service
+
+TAMANO_LOTE = 500
+MAX_ERRORES_REPORTADOS = 20
+
+SCHEMAS = {'historial': Historia, 'juegos': Juego}
+
+CODIGO_CLAVE_DUPLICADA = 11000
+
+
+def leer_documentos(ruta: str) -> Iterator[Dict]:
+    """
+    Documentos tal como están en el archivo (sin convertir `$oid`, `$date`, ...): un arreglo JSON o un documento
+    por línea (`.ndjson`/`.jsonl`, formato de `mongoexport`). Los archivos por línea se leen sin cargarlos completos.
+    """
+    with open(ruta, encoding='utf-8') as archivo:
+        if ruta.endswith(('.ndjson', '.jsonl')):
+            for linea in archivo:
+                if linea.strip():
+                    yield json.loads(linea)
+            return
+        contenido = json.load(archivo)
+    yield from (contenido if isinstance(contenido, list) else [contenido])
+
+
+class ReporteIngesta:
+    """Conteos y duración de una carga."""
+
+    def __init__(self, coleccion: str):
+        self.coleccion = coleccion
+        self.leidos = 0
+        self.invalidos = 0
+        self.escritos = 0
+        self.fallidos = 0
+        self.derivados = 0
+        self.errores: List[str] = []
+        self.inicio = time.perf_counter()
+
+    def error(self, mensaje: str) -> None:
+        if len(self.errores) < MAX_ERRORES_REPORTADOS:
+            self.errores.append(mensaje)
+
+    def a_dict(self) -> Dict:
+        segundos = time.perf_counter() - self.inicio
+        return {
+            'coleccion': self.coleccion,
+            'leidos': self.leidos,
+            'invalidos': self.invalidos,
+            'escritos': self.escritos,
+            'fallidos': self.fallidos,
+            'jugador_stats_actualizados': self.derivados,
+            'segundos': round(segundos, 3),
+            'documentos_por_segundo': round(self.escritos / segundos, 1) if segundos else 0.0,
+            'errores': self.errores,
+        }
+
+
+def _escribir_lote(coleccion: str, operaciones: List, reporte: Optional[ReporteIngesta] = None,
+                   ignorar_duplicados: bool = False, fallidos: Optional[set] = None) -> int:
+    """
+    bulk_write no ordenado; los errores de un documento no detienen el resto del lote.
+    En `fallidos` se agregan las posiciones de las operaciones que no se escribieron.
+    """
+    if not operaciones:
+        return 0
+    try:
+        resultado = db[coleccion].bulk_write(operaciones, ordered=False)
+        return resultado.inserted_count + resultado.upserted_count + resultado.matched_count
+    except BulkWriteError as e:
+        detalles = e.details
+        errores = [error for error in detalles.get('writeErrors', [])
+                   if not (ignorar_duplicados and error.get('code') == CODIGO_CLAVE_DUPLICADA)]
+        if fallidos is not None:
+            fallidos.update(error.get('index') for error in errores)
+        if reporte is not None:
+            reporte.fallidos += len(errores)
+            for error in errores:
+                reporte.error(f"{coleccion}[{error.get('index')}]: {error.get('errmsg')}")
+        return detalles.get('nInserted', 0) + detalles.get('nUpserted', 0) + detalles.get('nMatched', 0)
+
+
+def _operacion(documento: Dict):
+    """Reemplazo por `_id` (recargar el mismo archivo no duplica documentos) o inserción si no trae `_id`."""
+    if '_id' in documento:
+        return ReplaceOne({'_id': documento['_id']}, documento, upsert=True)
+    return InsertOne(documento)
+
+
+def ingerir(coleccion: str, documentos, logger, tamano_lote: int = TAMANO_LOTE, validar: bool = True,
+            derivados: bool = False) -> Dict:
+    """
+    Carga `documentos` (Extended JSON tal como se leyó del archivo) en `historial` o `juegos`.
+    Los documentos que no pasan la validación se omiten y se reportan. Los partidos del historial se escriben
+    con los datos de su juego y los juegos actualizan el historial que apunta a ellos. Con `derivados` se
+    actualiza `jugador_stats` con cada partido finalizado del historial en la misma pasada, después de que
+    su lote del historial quedó escrito.
+    """
+    if coleccion not in SCHEMAS:
+        raise ValueError(f"Colección no soportada: {coleccion}. Disponibles: {', '.join(SCHEMAS)}")
+    if derivados and coleccion == 'historial':
+        jugador_stats_service.asegurar_indices()
+
+    schema = SCHEMAS[coleccion]
+    reporte = ReporteIngesta(coleccion)
+    lote = []
+
+    def escribir(documentos: List[Dict]) -> None:
+        if coleccion == 'historial':
+            desnormalizacion_service.completar_historial(documentos)
+            # Marca de contenido: los mapas de calor recuentan un partido ya contado si su revisión cambió
+            for documento in documentos:
+                documento['revision'] = ObjectId()
+        fallidos = set()
+        reporte.escritos += _escribir_lote(coleccion, [_operacion(documento) for documento in documentos], reporte,
+                                           fallidos=fallidos)
+        if coleccion == 'juegos':
+            _escribir_lote('historial', [desnormalizacion_service.operacion_juego(documento)
+                                         for documento in documentos if '_id' in documento])
+        if derivados and coleccion == 'historial':
+            # Solo partidos finalizados cuyo documento del historial ya confirmó el bulk_write del lote
+            operaciones_stats = [
+                operacion
+                for indice, documento in enumerate(documentos)
+                if indice not in fallidos and '_id' in documento and documento.get('estado') == 'finalizado'
+                for operacion in jugador_stats_service.operaciones_registro(documento)
+            ]
+            reporte.derivados += _escribir_lote(jugador_stats_service.COLECCION, operaciones_stats,
+                                                ignorar_duplicados=True)
+
+    for indice, crudo in enumerate(documentos):
+        reporte.leidos += 1
+        if validar:
+            try:
+                schema.model_validate(crudo)
+            except ValidationError as e:
+                reporte.invalidos += 1
+                primero = e.errors()[0]
+                ubicacion = '.'.join(str(parte) for parte in primero['loc'])
+                reporte.error(f"{coleccion}[{indice}] {ubicacion}: {primero['msg']}")
+                continue
+
+        documento = json_util.loads(json.dumps(crudo))
+        lote.append(documento)
+
+        if len(lote) >= tamano_lote:
+            escribir(lote)
+            lote = []
+
+    escribir(lote)
+
+    version_service.invalidar_version_datos()
+    resultado = reporte.a_dict()
+    logger.info(f"Ingesta de {coleccion}: {resultado['escritos']} escritos, {resultado['invalidos']} inválidos "
+                f"en {resultado['segundos']}s ({resultado['documentos_por_segundo']} docs/s)")
+    return resultado
+
+
+def sembrar_referencias(logger, tamano_lote: int = TAMANO_LOTE) -> List[Dict]:
+    """Carga `paises.json` y `confederaciones.json` en sus colecciones (upsert por `id`, conserva los `_id`)."""
+    reportes = []
+    for coleccion, archivo in referencia_service.FUENTES.items():
+        if not archivo:
+            continue
+        ruta = os.path.join(referencia_service._DIRECTORIO_RAIZ, archivo)
+        reporte = ReporteIngesta(coleccion)
+        operaciones = []
+        for documento in leer_documentos(ruta):
+            reporte.leidos += 1
+            documento = json_util.loads(json.dumps(documento))
+            documento.pop('_id', None)
+            operaciones.append(ReplaceOne({'id': documento['id']}, documento, upsert=True))
+            if len(operaciones) >= tamano_lote:
+                reporte.escritos += _escribir_lote(coleccion, operaciones, reporte)
+                operaciones = []
+        reporte.escritos += _escribir_lote(coleccion, operaciones, reporte)
+        reportes.append(reporte.a_dict())
+        logger.info(f"Referencias de {coleccion}: {reporte.escritos} documentos desde {archivo}")
+
+    referencia_service.invalidar_referencias()
+    version_service.invalidar_version_datos()
+    return reportes
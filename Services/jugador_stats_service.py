@@ -0,0 +1,229 @@
+"""
+Módulo para la materialización de estadísticas por jugador (colección `jugador_stats`).
+Cada documento guarda los conteos acumulados de un jugador en su selección, de modo que el detalle
+del jugador se resuelve con una lectura indexada en lugar de recorrer todo su historial.
+Junto con los ids de los partidos contados se guarda la `revision` de cada uno; los conteos cuyos partidos
+cambiaron de revisión, dejaron de estar finalizados o no incluyen un partido finalizado están desactualizados.
+"""
+import time
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from Config.database import db
+from Config.indices import INDICES
+from Services import indice_service
+from Services import version_service
+from Utils import estadistica_util
+
+COLECCION = 'jugador_stats'
+# Colección en la que el backfill reconstruye los conteos antes de reemplazar la actual
+COLECCION_RECONSTRUCCION = 'jugador_stats_reconstruccion'
+CODIGO_CLAVE_DUPLICADA = 11000
+TAMANO_LOTE = 500
+
+def asegurar_indices() -> None:
+    """Crea el índice único (jugador, equipo) del que depende la idempotencia de las actualizaciones."""
+    indice_service.asegurar_coleccion(COLECCION)
+
+
+def _clave_campo(valor) -> str:
+    """Convierte un tipo o sector en un nombre de campo válido para MongoDB."""
+    clave = str(valor) if valor not in (None, '') else 'desconocido'
+    return clave.replace('.', '_').lstrip('$') or 'desconocido'
+
+
+def acumular_partido(partido: Dict) -> Tuple[Dict[Tuple[str, str], estadistica_util.AcumuladorJugador], Counter]:
+    """
+    Recorre una vez las acciones de un partido y devuelve un acumulador por (jugador, equipo)
+    junto con el número de acciones de cada equipo.
+    """
+    acumulados = defaultdict(estadistica_util.AcumuladorJugador)
+    acciones_equipo = Counter()
+    for accion in partido.get('acciones', []):
+        equipo = accion.get('equipo')
+        acciones_equipo[equipo] += 1
+        jugador = accion.get('jugador')
+        if jugador and equipo:
+            acumulados[(jugador, equipo)].agregar(accion)
+    return acumulados, acciones_equipo
+
+
+def _operacion_partido(acumulado: estadistica_util.AcumuladorJugador, partido_id: str,
+                       total_acciones_equipo: int, revision: Any = None) -> Dict:
+    """Construye la actualización incremental ($inc/$max/$push) de un jugador para un partido."""
+    documento = acumulado.a_documento()
+    incrementos = {
+        'partidos_jugados': 1,
+        'total_acciones_equipo': total_acciones_equipo,
+        'total_acciones': documento['total_acciones'],
+        'tiros_area_chica': documento['tiros_area_chica'],
+        'regates_medio_central': documento['regates_medio_central'],
+        'asistencias': documento['asistencias'],
+        'pases_clave': documento['pases_clave'],
+        'impacto': documento['impacto']
+    }
+    for campo in ('conteo_tipos', 'exitos_tipos', 'sectores'):
+        for clave, valor in documento[campo].items():
+            incrementos[f"{campo}.{_clave_campo(clave)}"] = valor
+    for sector, datos in documento['presion_sectores'].items():
+        for clave, valor in datos.items():
+            incrementos[f"presion_sectores.{_clave_campo(sector)}.{clave}"] = valor
+
+    return {
+        '$inc': incrementos,
+        '$set': {f"revisiones.{partido_id}": revision},
+        '$max': {'max_minuto': documento['max_minuto']},
+        '$push': {
+            'exitos_recientes': {'$each': documento['exitos_recientes'], '$slice': -estadistica_util.ACCIONES_RECIENTES},
+            'partidos': partido_id
+        }
+    }
+
+
+def operaciones_registro(partido: Dict) -> List[UpdateOne]:
+    """
+    Operaciones para `bulk_write` que incorporan un partido a `jugador_stats`, con la misma idempotencia
+    que registrar_partido: las de jugadores que ya tienen el partido fallan por la clave única y se ignoran.
+    """
+    partido_id = str(partido.get('_id'))
+    acumulados, acciones_equipo = acumular_partido(partido)
+    return [
+        UpdateOne(
+            {'jugador': jugador, 'equipo': equipo, 'partidos': {'$ne': partido_id}},
+            _operacion_partido(acumulado, partido_id, acciones_equipo[equipo], partido.get('revision')),
+            upsert=True
+        )
+        for (jugador, equipo), acumulado in acumulados.items()
+    ]
+
+
+def registrar_partido(partido: Dict, logger) -> int:
+    """
+    Incorpora un partido finalizado a `jugador_stats` con un solo `bulk_write`.
+    Es idempotente: un jugador que ya tiene el partido registrado no se vuelve a actualizar.
+    Devuelve el número de jugadores actualizados.
+    """
+    asegurar_indices()
+    partido_id = str(partido.get('_id'))
+    operaciones = operaciones_registro(partido)
+
+    actualizados = 0
+    if operaciones:
+        try:
+            resultado = db[COLECCION].bulk_write(operaciones, ordered=False)
+            actualizados = resultado.modified_count + resultado.upserted_count
+        except BulkWriteError as e:
+            # Los jugadores que ya tenían este partido registrado fallan por la clave única
+            errores = [error for error in e.details.get('writeErrors', []) if error.get('code') != CODIGO_CLAVE_DUPLICADA]
+            if errores:
+                raise
+            actualizados = e.details.get('nModified', 0) + e.details.get('nUpserted', 0)
+
+    version_service.invalidar_version_datos()
+    logger.info(f"Partido {partido_id} registrado en {COLECCION}: {actualizados} jugadores actualizados")
+    return actualizados
+
+
+def registrar_partido_por_id(id: str, logger) -> int:
+    """Carga un documento del historial por su _id y lo registra en `jugador_stats`."""
+    partido = db['historial'].find_one({'_id': ObjectId(id)}, {'acciones': 1, 'revision': 1})
+    if not partido:
+        raise ValueError(f"Partido {id} no encontrado en el historial")
+    return registrar_partido(partido, logger)
+
+
+def obtener_stats_jugador(nombre: str, equipo: str) -> Optional[Dict]:
+    """Lectura indexada de los conteos materializados de un jugador, o None si están desactualizados."""
+    stats = db[COLECCION].find_one({'jugador': nombre, 'equipo': equipo})
+    if stats is None:
+        return None
+    filtro = {'acciones': {'$elemMatch': {'jugador': nombre, 'equipo': equipo}}}
+    if claves_desactualizadas({(nombre, equipo): stats.get('revisiones')}, filtro):
+        return None
+    return stats
+
+
+def partidos_vigentes(filtro: Optional[Dict] = None) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """
+    Partidos finalizados del historial que cumplen `filtro`, como {partido_id: revision} por (jugador, equipo)
+    de cada jugador con alguna acción en ellos. Solo lee los nombres de las acciones.
+    """
+    por_clave = defaultdict(dict)
+    proyeccion = {'revision': 1, 'acciones.jugador': 1, 'acciones.equipo': 1}
+    for partido in db['historial'].find(dict(filtro or {}, estado='finalizado'), proyeccion):
+        partido_id = str(partido['_id'])
+        revision = partido.get('revision')
+        for accion in partido.get('acciones', []):
+            por_clave[(accion.get('jugador'), accion.get('equipo'))][partido_id] = revision
+    return por_clave
+
+
+def claves_desactualizadas(revisiones: Dict[Tuple[str, str], Optional[Dict[str, Any]]],
+                           filtro: Optional[Dict] = None) -> set:
+    """
+    Claves (jugador, equipo) cuyas `revisiones` materializadas no coinciden con sus partidos finalizados del
+    historial (acotados por `filtro`, que debe incluir todos los partidos de esos jugadores). Los documentos sin
+    `revisiones` (anteriores a ese campo) se consideran desactualizados.
+    """
+    vigentes = partidos_vigentes(filtro)
+    return {clave for clave, contadas in revisiones.items() if contadas != vigentes.get(clave, {})}
+
+
+def reemplazar_stats_jugador(nombre: str, equipo: str, acumulado: estadistica_util.AcumuladorJugador,
+                             total_acciones_equipo: int, revisiones: Dict[str, Any]) -> None:
+    """Reescribe los conteos de un jugador calculados desde el historial (`revisiones`: {partido_id: revision})."""
+    documento = acumulado.a_documento()
+    for campo in ('conteo_tipos', 'exitos_tipos', 'sectores', 'presion_sectores'):
+        documento[campo] = {_clave_campo(clave): valor for clave, valor in documento[campo].items()}
+    documento.update({
+        'jugador': nombre,
+        'equipo': equipo,
+        'partidos_jugados': len(revisiones),
+        'total_acciones_equipo': total_acciones_equipo,
+        'partidos': list(revisiones),
+        'revisiones': revisiones
+    })
+    db[COLECCION].replace_one({'jugador': nombre, 'equipo': equipo}, documento, upsert=True)
+
+
+def backfill(logger, tamano_lote: int = TAMANO_LOTE) -> Dict:
+    """
+    Reconstruye `jugador_stats` recorriendo una sola vez los partidos finalizados del historial.
+    Los conteos se escriben en una colección temporal que al terminar reemplaza a la actual, de modo que
+    las lecturas nunca ven la colección vacía o a medio construir.
+    """
+    inicio = time.perf_counter()
+    destino = db[COLECCION_RECONSTRUCCION]
+    destino.drop()
+    destino.create_indexes(INDICES[COLECCION])
+
+    partidos = 0
+    operaciones = []
+    cursor = db['historial'].find({'estado': 'finalizado'}, {'acciones': 1, 'revision': 1}, batch_size=tamano_lote)
+    for partido in cursor:
+        partidos += 1
+        partido_id = str(partido['_id'])
+        acumulados, acciones_equipo = acumular_partido(partido)
+        for (jugador, equipo), acumulado in acumulados.items():
+            operaciones.append(UpdateOne(
+                {'jugador': jugador, 'equipo': equipo},
+                _operacion_partido(acumulado, partido_id, acciones_equipo[equipo], partido.get('revision')),
+                upsert=True
+            ))
+        if len(operaciones) >= tamano_lote:
+            destino.bulk_write(operaciones, ordered=True)
+            operaciones = []
+    if operaciones:
+        destino.bulk_write(operaciones, ordered=True)
+
+    jugadores = destino.count_documents({})
+    destino.rename(COLECCION, dropTarget=True)
+
+    version_service.invalidar_version_datos()
+    duracion = time.perf_counter() - inicio
+    logger.info(f"Backfill de {COLECCION}: {partidos} partidos, {jugadores} jugadores en {duracion:.2f}s")
+    return {"partidos": partidos, "jugadores": jugadores, "segundos": round(duracion, 2)}
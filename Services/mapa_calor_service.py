@@ -0,0 +1,259 @@
+"""
+Módulo de mapas de calor del torneo por selección, por jugador o de todo el torneo.
+Cada acción se codifica como un entero (sector, lado, tipo, éxito) y los mapas son conteos por código.
+Los conteos se calculan una sola vez por partido finalizado y revisión (`revision`, que la ingesta renueva en
+cada escritura) y se suman a los totales, de modo que un partido nuevo o editado solo cambia sus propios conteos.
+"""
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from google.api_core.exceptions import GoogleAPIError
+
+from Config.database import db
+from Services import referencia_service
+from Services import version_service
+
+# Bits reservados para cada componente del código de celda
+_BITS_EXITO = 1
+_BITS_TIPO = 9
+_BITS_LADO = 6
+_LIMITES = {'tipo': 1 << _BITS_TIPO, 'lado': 1 << _BITS_LADO}
+
+PROYECCION_ACCIONES = {
+    'revision': 1, 'acciones.sector': 1, 'acciones.lado': 1,
+    'acciones.tipo': 1, 'acciones.exito': 1, 'acciones.jugador': 1, 'acciones.equipo': 1
+}
+
+
+class CodificadorCeldas:
+    """Asigna un índice entero a cada sector, lado y tipo, y los empaqueta en un único código."""
+
+    def __init__(self):
+        self.valores = {'sector': [], 'lado': [], 'tipo': []}
+        self._indices = {'sector': {}, 'lado': {}, 'tipo': {}}
+
+    def _indice(self, campo: str, valor) -> int:
+        valor = valor or 'desconocido'
+        indices = self._indices[campo]
+        if valor not in indices:
+            if campo in _LIMITES and len(self.valores[campo]) >= _LIMITES[campo]:
+                raise ValueError(f"Demasiados valores distintos de '{campo}' para codificar el mapa de calor")
+            indices[valor] = len(self.valores[campo])
+            self.valores[campo].append(valor)
+        return indices[valor]
+
+    def codificar(self, accion: Dict) -> int:
+        codigo = self._indice('sector', accion.get('sector'))
+        codigo = (codigo << _BITS_LADO) | self._indice('lado', accion.get('lado'))
+        codigo = (codigo << _BITS_TIPO) | self._indice('tipo', accion.get('tipo'))
+        return (codigo << _BITS_EXITO) | (1 if accion.get('exito') else 0)
+
+    def decodificar(self, codigo: int) -> Tuple[str, str, str, bool]:
+        exito = bool(codigo & 1)
+        codigo >>= _BITS_EXITO
+        tipo = self.valores['tipo'][codigo & ((1 << _BITS_TIPO) - 1)]
+        codigo >>= _BITS_TIPO
+        lado = self.valores['lado'][codigo & ((1 << _BITS_LADO) - 1)]
+        sector = self.valores['sector'][codigo >> _BITS_LADO]
+        return sector, lado, tipo, exito
+
+
+class MapaCalorPartido:
+    """Conteos por código de celda de una revisión de un partido, por selección y por (jugador, selección)."""
+
+    def __init__(self, partido: Dict, codificador: CodificadorCeldas):
+        self.revision = partido.get('revision')
+        self.equipos: Dict[str, Counter] = defaultdict(Counter)
+        self.jugadores: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        # Códigos del partido y su selección en un solo recorrido; luego se cuentan de una vez
+        codigos_equipo = defaultdict(list)
+        codigos_jugador = defaultdict(list)
+        for accion in partido.get('acciones', []):
+            equipo = accion.get('equipo')
+            if not equipo:
+                continue
+            codigo = codificador.codificar(accion)
+            codigos_equipo[equipo].append(codigo)
+            if accion.get('jugador'):
+                codigos_jugador[(accion['jugador'], equipo)].append(codigo)
+        for equipo, codigos in codigos_equipo.items():
+            self.equipos[equipo] = Counter(codigos)
+        for clave, codigos in codigos_jugador.items():
+            self.jugadores[clave] = Counter(codigos)
+
+
+class _EstadoMapas:
+    def __init__(self):
+        self.codificador = CodificadorCeldas()
+        self.partidos: Dict[str, MapaCalorPartido] = {}
+        self.torneo = Counter()
+        self.equipos: Dict[str, Counter] = defaultdict(Counter)
+        self.jugadores: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+        self.version = None
+
+    def sumar(self, mapa: MapaCalorPartido, signo: int = 1) -> None:
+        for equipo, conteos in mapa.equipos.items():
+            for codigo, n in conteos.items():
+                self.equipos[equipo][codigo] += signo * n
+                self.torneo[codigo] += signo * n
+        for clave, conteos in mapa.jugadores.items():
+            for codigo, n in conteos.items():
+                self.jugadores[clave][codigo] += signo * n
+
+
+_estado = _EstadoMapas()
+_lock = threading.Lock()
+# Serializa las sincronizaciones; las consultas a MongoDB se hacen sin tomar `_lock`
+_lock_sincronizacion = threading.Lock()
+
+
+def sincronizar(logger) -> _EstadoMapas:
+    """
+    Incorpora a los totales los partidos finalizados que aún no se han contado o cuya revisión cambió
+    (y descuenta los que ya no están). Solo consulta MongoDB si cambió la versión de los datos.
+    """
+    version = version_service.obtener_version_datos()
+    with _lock:
+        if _estado.version == version:
+            return _estado
+
+    with _lock_sincronizacion:
+        with _lock:
+            if _estado.version == version:
+                return _estado
+            contados = {partido_id: mapa.revision for partido_id, mapa in _estado.partidos.items()}
+
+        vigentes = {
+            str(h['_id']): h.get('revision')
+            for h in db['historial'].find({'estado': 'finalizado'}, {'_id': 1, 'revision': 1})
+        }
+        pendientes = [
+            ObjectId(partido_id) for partido_id, revision in vigentes.items()
+            if partido_id not in contados or contados[partido_id] != revision
+        ]
+        partidos = list(db['historial'].find({'_id': {'$in': pendientes}}, PROYECCION_ACCIONES)) if pendientes else []
+
+        with _lock:
+            for partido_id in set(_estado.partidos) - vigentes.keys():
+                _estado.sumar(_estado.partidos.pop(partido_id), signo=-1)
+            for partido in partidos:
+                partido_id = str(partido['_id'])
+                anterior = _estado.partidos.get(partido_id)
+                if anterior is not None:
+                    _estado.sumar(anterior, signo=-1)
+                mapa = MapaCalorPartido(partido, _estado.codificador)
+                _estado.partidos[partido_id] = mapa
+                _estado.sumar(mapa)
+            if partidos:
+                logger.info(f"Mapas de calor: {len(partidos)} partidos nuevos o editados, {len(_estado.partidos)} en total")
+
+            _estado.version = version
+            return _estado
+
+
+def construir_mapa(conteos: Counter, codificador: CodificadorCeldas, tipo: Optional[str] = None,
+                   exito: Optional[bool] = None) -> Dict:
+    """Convierte conteos por código en el mapa por sector/lado y por tipo de acción."""
+    total = 0
+    sectores = {}
+    por_tipo = {}
+    for codigo, n in conteos.items():
+        if n <= 0:
+            continue
+        sector, lado, tipo_accion, exitosa = codificador.decodificar(codigo)
+        if (tipo is not None and tipo_accion != tipo) or (exito is not None and exitosa != exito):
+            continue
+        total += n
+
+        celda = sectores.setdefault(sector, {"total": 0, "exitos": 0, "lados": {}})
+        celda["total"] += n
+        celda["exitos"] += n if exitosa else 0
+        celda["lados"][lado] = celda["lados"].get(lado, 0) + n
+
+        resumen_tipo = por_tipo.setdefault(tipo_accion, {"total": 0, "exitos": 0, "sectores": {}})
+        resumen_tipo["total"] += n
+        resumen_tipo["exitos"] += n if exitosa else 0
+        resumen_tipo["sectores"][sector] = resumen_tipo["sectores"].get(sector, 0) + n
+
+    for celda in sectores.values():
+        celda["porcentaje"] = round(celda["total"] / total * 100, 2)
+        celda["porcentaje_exito"] = round(celda["exitos"] / celda["total"] * 100, 2)
+    for resumen_tipo in por_tipo.values():
+        resumen_tipo["porcentaje_exito"] = round(resumen_tipo["exitos"] / resumen_tipo["total"] * 100, 2)
+
+    return {"total_acciones": total, "sectores": sectores, "por_tipo": por_tipo}
+
+
+def get_mapa_torneo(tipo: Optional[str], exito: Optional[bool], logger) -> Dict:
+    """Mapa de calor de todas las acciones del torneo."""
+    try:
+        estado = sincronizar(logger)
+        with _lock:
+            mapa = construir_mapa(estado.torneo, estado.codificador, tipo, exito)
+            return {"ambito": "torneo", "partidos": len(estado.partidos), **mapa}
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener el mapa de calor: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener el mapa de calor: {str(e)}")
+
+
+def get_mapas_equipos(tipo: Optional[str], exito: Optional[bool], logger) -> Dict:
+    """Mapas de calor de todas las selecciones en una sola respuesta."""
+    try:
+        estado = sincronizar(logger)
+        with _lock:
+            equipos = {
+                equipo: construir_mapa(conteos, estado.codificador, tipo, exito)
+                for equipo, conteos in sorted(estado.equipos.items())
+            }
+            return {"ambito": "equipos", "partidos": len(estado.partidos), "equipos": equipos}
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener el mapa de calor: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener el mapa de calor: {str(e)}")
+
+
+def get_mapa_equipo(nombre: str, tipo: Optional[str], exito: Optional[bool], logger) -> Dict:
+    """Mapa de calor de una selección, por nombre o siglas."""
+    try:
+        pais = referencia_service.pais_por_nombre(nombre) or referencia_service.pais_por_siglas(nombre)
+        equipo = pais['nombre'] if pais else nombre
+        estado = sincronizar(logger)
+        with _lock:
+            if equipo not in estado.equipos:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Selección sin acciones en el torneo")
+            mapa = construir_mapa(estado.equipos[equipo], estado.codificador, tipo, exito)
+            return {"ambito": "equipo", "equipo": equipo, **mapa}
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener el mapa de calor: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener el mapa de calor: {str(e)}")
+
+
+def get_mapa_jugador(id: str, tipo: Optional[str], exito: Optional[bool], logger) -> Dict:
+    """Mapa de calor de un jugador en su selección."""
+    try:
+        jugador = db['jugadores'].find_one({'_id': ObjectId(id)}, {'nombre': 1, 'pais_id': 1})
+        if not jugador:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Jugador no encontrado")
+        equipo = referencia_service.nombre_pais(jugador.get('pais_id'))
+        estado = sincronizar(logger)
+        with _lock:
+            conteos = estado.jugadores.get((jugador.get('nombre'), equipo), Counter())
+            mapa = construir_mapa(conteos, estado.codificador, tipo, exito)
+            return {"ambito": "jugador", "jugador": jugador.get('nombre'), "equipo": equipo, **mapa}
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener el mapa de calor: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener el mapa de calor: {str(e)}")
@@ -1,16 +1,18 @@
 import logging
-from fastapi import HTTPException
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
 from bson.objectid import ObjectId
 from google.api_core.exceptions import GoogleAPIError
-from Config.settings import MONGODB_URI
-from pymongo.mongo_client import MongoClient
+from pymongo import ReplaceOne
+from Config.database import db
+from Config.settings import TIMELINES_CACHE_MAX
 import requests
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
-client = MongoClient(MONGODB_URI)
-db = client['mundial']
 collection = db['juegos']
 
 
@@ -26,3 +28,174 @@ def obtener_partidos(logger):
         raise HTTPException(status_code=409, detail=f"Error al obtener el partido: {str(e)}")
 
 
+
+
+# ========== TIMELINE DEL MARCADOR ==========
+
+COLECCION_TIMELINE = 'partido_timeline'
+LOCAL = 'L'
+VISITANTE = 'V'
+
+# Timelines de partidos finalizados ya calculados en este proceso, por (_id del historial, revisión del partido),
+# con un máximo de entradas (LRU): las de revisiones anteriores dejan de usarse y salen primero
+_timelines: "OrderedDict[tuple, Dict]" = OrderedDict()
+_lock_timelines = threading.Lock()
+
+
+def _timeline_en_memoria(clave: tuple) -> Optional[Dict]:
+    with _lock_timelines:
+        timeline = _timelines.get(clave)
+        if timeline is not None:
+            _timelines.move_to_end(clave)
+        return timeline
+
+
+def _guardar_en_memoria(clave: tuple, timeline: Dict) -> None:
+    with _lock_timelines:
+        _timelines[clave] = timeline
+        _timelines.move_to_end(clave)
+        while len(_timelines) > TIMELINES_CACHE_MAX:
+            _timelines.popitem(last=False)
+
+
+def calcular_timeline(partido: Dict) -> Dict:
+    """
+    Recorre una vez los goles de un partido del historial y devuelve su timeline compacto:
+    minuto, lado ('L'/'V') y jugador de cada gol, el marcador acumulado de cada equipo tras cada gol
+    y el mayor déficit que enfrentó cada equipo.
+    """
+    local = partido.get('equipo_local')
+    visitante = partido.get('equipo_visitante')
+    minutos, lados, jugadores, acumulado_local, acumulado_visitante = [], [], [], [], []
+    goles_local = goles_visitante = 0
+    deficit_local = deficit_visitante = 0
+
+    for accion in partido.get('acciones', []):
+        if accion.get('tipo') != 'Gol':
+            continue
+        equipo = accion.get('equipo')
+        if equipo == local:
+            goles_local += 1
+            lados.append(LOCAL)
+        elif equipo == visitante:
+            goles_visitante += 1
+            lados.append(VISITANTE)
+        else:
+            continue
+        minutos.append(accion.get('minuto', 0))
+        jugadores.append(accion.get('jugador', 'Desconocido'))
+        acumulado_local.append(goles_local)
+        acumulado_visitante.append(goles_visitante)
+        deficit_local = max(deficit_local, goles_visitante - goles_local)
+        deficit_visitante = max(deficit_visitante, goles_local - goles_visitante)
+
+    return {
+        '_id': partido.get('_id'),
+        'equipo_local': local,
+        'equipo_visitante': visitante,
+        'minutos': minutos,
+        'lados': ''.join(lados),
+        'jugadores': jugadores,
+        'acumulado_local': acumulado_local,
+        'acumulado_visitante': acumulado_visitante,
+        'deficit_maximo_local': deficit_local,
+        'deficit_maximo_visitante': deficit_visitante
+    }
+
+
+def obtener_timelines(historial: List[Dict], logger) -> Dict[str, Dict]:
+    """
+    Timelines de partidos finalizados, por _id del historial.
+    Se leen de memoria o de `partido_timeline` si se calcularon con la misma `revision` del partido (la que la
+    ingesta renueva en cada escritura); solo los que faltan o cuya revisión cambió se calculan de nuevo y se guardan.
+    """
+    timelines = {}
+    faltantes = []
+    for partido in historial:
+        partido_id = str(partido.get('_id'))
+        timeline = _timeline_en_memoria((partido_id, partido.get('revision')))
+        if timeline is not None:
+            timelines[partido_id] = timeline
+        else:
+            faltantes.append(partido)
+
+    if faltantes:
+        guardados = {
+            str(t['_id']): t
+            for t in db[COLECCION_TIMELINE].find({'_id': {'$in': [p['_id'] for p in faltantes]}})
+        }
+        nuevos = []
+        for partido in faltantes:
+            partido_id = str(partido['_id'])
+            revision = partido.get('revision')
+            timeline = guardados.get(partido_id)
+            if timeline is None or timeline.get('revision') != revision:
+                timeline = dict(calcular_timeline(partido), revision=revision)
+                nuevos.append(ReplaceOne({'_id': partido['_id']}, timeline, upsert=True))
+            _guardar_en_memoria((partido_id, revision), timeline)
+            timelines[partido_id] = timeline
+        if nuevos:
+            db[COLECCION_TIMELINE].bulk_write(nuevos, ordered=False)
+            logger.info(f"Timelines calculados y guardados: {len(nuevos)} partidos")
+
+    return timelines
+
+
+def expandir_goles(timeline: Dict) -> List[Dict]:
+    """Estado del marcador después de cada gol."""
+    goles = []
+    for i, lado in enumerate(timeline['lados']):
+        marcador_local = timeline['acumulado_local'][i]
+        marcador_visitante = timeline['acumulado_visitante'][i]
+        goles.append({
+            'minuto': timeline['minutos'][i],
+            'equipo': timeline['equipo_local'] if lado == LOCAL else timeline['equipo_visitante'],
+            'jugador': timeline['jugadores'][i],
+            'marcador_local': marcador_local,
+            'marcador_visitante': marcador_visitante,
+            'marcador': f"{marcador_local}-{marcador_visitante}"
+        })
+    return goles
+
+
+def get_timeline_partido(id: str, logger) -> Dict:
+    """
+    Evolución del marcador de un partido del historial. Los partidos finalizados usan el timeline guardado;
+    los que siguen en juego se calculan al vuelo sin guardarse.
+    """
+    try:
+        # Forma canónica del id (hexadecimal en minúsculas), la misma con la que se indexan los timelines
+        id = str(ObjectId(id))
+        partido = db['historial'].find_one(
+            {'_id': ObjectId(id)},
+            {'equipo_local': 1, 'equipo_visitante': 1, 'goles_local': 1, 'goles_visitante': 1,
+             'estado': 1, 'revision': 1, 'acciones.tipo': 1, 'acciones.equipo': 1,
+             'acciones.minuto': 1, 'acciones.jugador': 1}
+        )
+        if not partido:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Partido no encontrado")
+
+        finalizado = partido.get('estado') == 'finalizado'
+
+        if finalizado:
+            timeline = obtener_timelines([partido], logger)[id]
+        else:
+            timeline = calcular_timeline(partido)
+
+        return {
+            'partido_id': id,
+            'equipo_local': partido.get('equipo_local'),
+            'equipo_visitante': partido.get('equipo_visitante'),
+            'goles_local': partido.get('goles_local'),
+            'goles_visitante': partido.get('goles_visitante'),
+            'finalizado': finalizado,
+            'goles': expandir_goles(timeline),
+            'deficit_maximo_local': timeline['deficit_maximo_local'],
+            'deficit_maximo_visitante': timeline['deficit_maximo_visitante']
+        }
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoBD: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoBD: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al obtener el timeline del partido: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al obtener el timeline del partido: {str(e)}")
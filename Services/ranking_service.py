@@ -0,0 +1,175 @@
+"""
+Módulo para los rankings de jugadores del torneo por métrica predictiva o analítica.
+La tabla de métricas de todos los jugadores se calcula en una sola pasada sobre `jugador_stats`
+y se guarda en caché por versión de los datos y del índice de identidades (que recoge ediciones de `jugadores`).
+"""
+import threading
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from google.api_core.exceptions import GoogleAPIError
+
+from Config.database import db
+from Services import estadistica_service
+from Services import identidad_service
+from Services import jugador_stats_service
+from Services import referencia_service
+from Services import version_service
+from Utils import coalescencia_util
+from Utils import estadistica_util
+
+METRICAS_PREDICTIVAS = (
+    'exito_pases', 'precision_tiros', 'exito_regates', 'recuperaciones',
+    'fatiga_desgaste', 'faltas_cometidas', 'contribucion_gol'
+)
+METRICAS_ANALITICAS = (
+    'tasa_posesion_individual', 'pases_clave', 'duelos_aereos_ganados', 'indice_creacion',
+    'eficiencia_defensiva', 'impacto_resultado', 'tendencia_forma'
+)
+METRICAS_PRESION = ('medio_central', 'defensivo', 'ofensivo')
+METRICAS = METRICAS_PREDICTIVAS + METRICAS_ANALITICAS + tuple(f"precision_{m}" for m in METRICAS_PRESION)
+# Métricas en las que un valor menor es mejor: se ordenan de menor a mayor
+METRICAS_ASCENDENTES = ('fatiga_desgaste', 'faltas_cometidas')
+# Tipos de acción que cuentan como intentos de una métrica; sin intentos, la métrica sale de los atributos del
+# jugador y no de su torneo, así que esos jugadores no entran al ranking
+TIPOS_INTENTO = {
+    'exito_pases': ('Pase',),
+    'precision_tiros': ('Tiro',),
+    'exito_regates': ('Regate',),
+    'recuperaciones': ('Entrada', 'Intercepcion'),
+    'duelos_aereos_ganados': ('Despeje',)
+}
+
+_lock = threading.Lock()
+_tabla_cache = {"version": None, "filas": None}
+
+
+def calcular_tabla_metricas(logger) -> List[Dict]:
+    """
+    Calcula todas las métricas de todos los jugadores en una sola pasada: una consulta a `jugadores`
+    y una a `jugador_stats` (los países salen del catálogo de referencia). Los jugadores que no estén materializados
+    (colección vacía o a medio poblar) o cuyos conteos estén desactualizados se acumulan desde el historial
+    en un único recorrido.
+    """
+    jugadores = list(db['jugadores'].find())
+    paises = {p['id']: p['nombre'] for p in referencia_service.paises() if p.get('id') is not None}
+
+    datos = {}
+    revisiones = {}
+    for stats in db[jugador_stats_service.COLECCION].find():
+        revisiones[(stats['jugador'], stats['equipo'])] = stats.get('revisiones')
+        datos[(stats['jugador'], stats['equipo'])] = (
+            estadistica_util.AcumuladorJugador.desde_documento(stats),
+            stats.get('partidos_jugados', 0),
+            stats.get('total_acciones_equipo', 0)
+        )
+
+    # Conteos de partidos editados, ya no finalizados o con partidos sin contar: se acumulan desde el historial
+    if revisiones:
+        for clave in jugador_stats_service.claves_desactualizadas(revisiones):
+            del datos[clave]
+
+    claves = {(j.get('nombre'), paises.get(j.get('pais_id'), 'Desconocido')) for j in jugadores}
+    pendientes = claves - datos.keys()
+    if pendientes:
+        logger.info(f"{len(pendientes)} jugadores sin jugador_stats, acumulando sus métricas desde el historial")
+        datos.update({
+            clave: valores[:3]
+            for clave, valores in estadistica_service.acumular_jugadores_desde_historial(pendientes).items()
+        })
+
+    vacio = (estadistica_util.AcumuladorJugador(), 0, 0)
+    filas = []
+    for jugador in jugadores:
+        pais = paises.get(jugador.get('pais_id'), 'Desconocido')
+        acumulado, partidos_jugados, total_acciones_equipo = datos.get((jugador.get('nombre'), pais), vacio)
+
+        probabilidades = estadistica_service.calcular_probabilidades_predictivas(jugador, acumulado, partidos_jugados)
+        analiticas = estadistica_service.calcular_estadisticas_analiticas(jugador, acumulado, total_acciones_equipo)
+        fila = {
+            "jugador_id": str(jugador.get('_id')),
+            "nombre": jugador.get('nombre'),
+            "pais": pais,
+            "posicion": estadistica_util.mapear_posicion(jugador.get('posicion_id', 0)),
+            "partidos_jugados": partidos_jugados,
+            "intentos": {m: sum(acumulado.tipo(t) for t in tipos) for m, tipos in TIPOS_INTENTO.items()}
+        }
+        fila.update({m: probabilidades[m] for m in METRICAS_PREDICTIVAS})
+        fila.update({m: analiticas[m] for m in METRICAS_ANALITICAS})
+        fila.update({f"precision_{m}": analiticas['precision_bajo_presion'][m] for m in METRICAS_PRESION})
+        filas.append(fila)
+
+    logger.info(f"Tabla de métricas calculada para {len(filas)} jugadores")
+    return filas
+
+
+def obtener_tabla_metricas(logger) -> List[Dict]:
+    """
+    Tabla de métricas de la versión actual, calculada una sola vez por versión. La versión combina la de los datos
+    con la del índice de identidades, que se regenera cuando se editan `jugadores` (posición, selección, nombre).
+    """
+    indice = identidad_service.obtener_indice(logger)
+    version = f"{version_service.obtener_version_datos()}:{indice.huella}:{indice.generado_en.timestamp()}"
+    with _lock:
+        if _tabla_cache["version"] == version:
+            return _tabla_cache["filas"]
+
+    filas = coalescencia_util.ejecutar_coalescido(
+        f"ranking-tabla:{version}", lambda: calcular_tabla_metricas(logger), logger)
+    with _lock:
+        _tabla_cache["version"] = version
+        _tabla_cache["filas"] = filas
+    return filas
+
+
+def get_ranking(metrica: str, top: int, posicion: Optional[str], equipo: Optional[str], logger,
+                min_partidos: int = 1) -> Dict:
+    """
+    Top-N jugadores del torneo para una métrica, filtrable por posición y selección.
+    Solo entran los jugadores con al menos `min_partidos` partidos y, en las métricas de TIPOS_INTENTO, algún intento.
+    """
+    try:
+        if metrica not in METRICAS:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Métrica no soportada. Disponibles: {', '.join(METRICAS)}"
+            )
+
+        filas = [f for f in obtener_tabla_metricas(logger) if f["partidos_jugados"] >= min_partidos]
+        if metrica in TIPOS_INTENTO:
+            filas = [f for f in filas if f["intentos"][metrica] > 0]
+        if posicion:
+            posicion = posicion.lower()
+            filas = [f for f in filas if f["posicion"].lower() == posicion]
+        if equipo:
+            equipo = equipo.lower()
+            filas = [f for f in filas if (f["pais"] or '').lower() == equipo]
+
+        ascendente = metrica in METRICAS_ASCENDENTES
+        mejores = sorted(filas, key=lambda f: f[metrica], reverse=not ascendente)[:top]
+        return {
+            "metrica": metrica,
+            "orden": "ascendente" if ascendente else "descendente",
+            "filtros": {"posicion": posicion, "equipo": equipo, "min_partidos": min_partidos},
+            "total_jugadores": len(filas),
+            "jugadores": [
+                {
+                    "ranking": i + 1,
+                    "jugador_id": f["jugador_id"],
+                    "nombre": f["nombre"],
+                    "pais": f["pais"],
+                    "posicion": f["posicion"],
+                    "partidos_jugados": f["partidos_jugados"],
+                    "valor": f[metrica]
+                }
+                for i, f in enumerate(mejores)
+            ]
+        }
+    except HTTPException:
+        raise
+    except GoogleAPIError as e:
+        logger.error(f"Error de MongoDB: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error de MongoDB: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error al generar el ranking: {str(e)}")
+        raise HTTPException(status_code=409, detail=f"Error al generar el ranking: {str(e)}")
@@ -0,0 +1,140 @@
+"""
+Módulo de datos de referencia en memoria: paises, confederaciones y ciudades.
+Estos catálogos casi nunca cambian, así que se cargan una vez (de forma perezosa) y se recargan
+pasados REFERENCIA_TTL_SEG, ofreciendo búsquedas O(1) por `_id`, `id`, `nombre` y `siglas`.
+Si la colección de MongoDB está vacía se usa el JSON incluido en el repositorio (`paises.json`,
+`confederaciones.json`).
+"""
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from Config.database import db
+from Config.settings import REFERENCIA_TTL_SEG
+
+_DIRECTORIO_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Catálogo -> archivo JSON de respaldo
+FUENTES = {
+    'paises': 'paises.json',
+    'confederaciones': 'confederaciones.json',
+    'ciudades': None
+}
+
+
+class CatalogoReferencia:
+    """Documentos de una colección de referencia indexados por sus claves de búsqueda."""
+
+    def __init__(self, nombre: str, documentos: List[Dict]):
+        self.nombre = nombre
+        self.documentos = documentos
+        self.cargado_en = time.monotonic()
+        self.por_object_id = {str(d['_id']): d for d in documentos if d.get('_id') is not None}
+        self.por_id = {d['id']: d for d in documentos if d.get('id') is not None}
+        self.por_nombre = {d['nombre']: d for d in documentos if d.get('nombre')}
+        self.por_nombre_normalizado = {d['nombre'].lower(): d for d in documentos if d.get('nombre')}
+        self.por_siglas = {d['siglas'].upper(): d for d in documentos if d.get('siglas')}
+
+    def obtener(self, object_id: str = None, id: int = None, nombre: str = None,
+                siglas: str = None) -> Optional[Dict]:
+        """Busca un documento por la primera clave indicada."""
+        if object_id is not None:
+            return self.por_object_id.get(str(object_id))
+        if id is not None:
+            return self.por_id.get(id)
+        if nombre is not None:
+            return self.por_nombre.get(nombre) or self.por_nombre_normalizado.get(nombre.lower())
+        if siglas is not None:
+            return self.por_siglas.get(siglas.upper())
+        return None
+
+
+_lock = threading.Lock()
+_catalogos: Dict[str, CatalogoReferencia] = {}
+
+
+def _cargar_documentos(nombre: str) -> List[Dict]:
+    """Lee el catálogo de MongoDB y, si está vacío, del JSON de respaldo."""
+    documentos = list(db[nombre].find())
+    archivo = FUENTES.get(nombre)
+    if not documentos and archivo:
+        ruta = os.path.join(_DIRECTORIO_RAIZ, archivo)
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                documentos = json.load(f)
+    return documentos
+
+
+def obtener_catalogo(nombre: str) -> CatalogoReferencia:
+    """Devuelve el catálogo en memoria, cargándolo si no existe o si superó REFERENCIA_TTL_SEG."""
+    if nombre not in FUENTES:
+        raise ValueError(f"Catálogo de referencia desconocido: {nombre}")
+
+    catalogo = _catalogos.get(nombre)
+    if catalogo is not None and time.monotonic() - catalogo.cargado_en < REFERENCIA_TTL_SEG:
+        return catalogo
+
+    with _lock:
+        catalogo = _catalogos.get(nombre)
+        if catalogo is not None and time.monotonic() - catalogo.cargado_en < REFERENCIA_TTL_SEG:
+            return catalogo
+        catalogo = CatalogoReferencia(nombre, _cargar_documentos(nombre))
+        _catalogos[nombre] = catalogo
+        return catalogo
+
+
+def invalidar_referencias(nombre: Optional[str] = None) -> None:
+    """Descarta uno o todos los catálogos para que se recarguen en la siguiente consulta."""
+    with _lock:
+        if nombre is None:
+            _catalogos.clear()
+        else:
+            _catalogos.pop(nombre, None)
+
+
+def paises() -> List[Dict]:
+    return obtener_catalogo('paises').documentos
+
+
+def pais_por_id(id: int) -> Optional[Dict]:
+    return obtener_catalogo('paises').obtener(id=id)
+
+
+def pais_por_object_id(object_id: str) -> Optional[Dict]:
+    return obtener_catalogo('paises').obtener(object_id=object_id)
+
+
+def pais_por_nombre(nombre: str) -> Optional[Dict]:
+    return obtener_catalogo('paises').obtener(nombre=nombre)
+
+
+def pais_por_siglas(siglas: str) -> Optional[Dict]:
+    return obtener_catalogo('paises').obtener(siglas=siglas)
+
+
+def nombre_pais(id: int, por_defecto: str = 'Desconocido') -> str:
+    """Nombre del país con ese `id`, o `por_defecto` si no existe."""
+    pais = pais_por_id(id)
+    return pais['nombre'] if pais else por_defecto
+
+
+def confederaciones() -> List[Dict]:
+    return obtener_catalogo('confederaciones').documentos
+
+
+def confederacion_por_id(id: int) -> Optional[Dict]:
+    return obtener_catalogo('confederaciones').obtener(id=id)
+
+
+def confederacion_por_nombre(nombre: str) -> Optional[Dict]:
+    return obtener_catalogo('confederaciones').obtener(nombre=nombre)
+
+
+def ciudad_por_object_id(object_id: str) -> Optional[Dict]:
+    return obtener_catalogo('ciudades').obtener(object_id=object_id)
+
+
+def ciudad_por_nombre(nombre: str) -> Optional[Dict]:
+    return obtener_catalogo('ciudades').obtener(nombre=nombre)
@@ -0,0 +1,178 @@
+"""
+Módulo que mantiene el último snapshot calculado de las estadísticas del torneo.
+Con TORNEO_SWR activo se sirve el snapshot existente de inmediato y se recalcula en segundo plano
+cuando cambia la versión de los datos; pasado TORNEO_MAX_STALENESS_SEG las peticiones esperan al recálculo.
+Cada snapshot lleva un número de versión monótono y se conservan los últimos TORNEO_VERSIONES_RETENIDAS
+(en memoria y, comprimidos, en `torneo_snapshots`, compartidos entre workers) para responder solo los cambios
+desde la versión que ya tiene el cliente.
+El cuerpo JSON de cada snapshot se serializa y comprime una sola vez al publicarlo.
+"""
+import gzip
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+from Config.database import db
+from Config.settings import TORNEO_SWR, TORNEO_MAX_STALENESS_SEG, TORNEO_VERSIONES_RETENIDAS
+from Services import analisis_torneo_service
+from Services import version_service
+from Utils import coalescencia_util
+from Utils import compresion_util
+from Utils import delta_util
+
+
+class SnapshotTorneo:
+    """Estadísticas del torneo calculadas para una versión de los datos."""
+
+    def __init__(self, datos: Dict[str, Any], version: str, numero: int = 0):
+        self.datos = datos
+        self.version = version
+        self.numero = numero
+        self.cuerpo = compresion_util.CuerpoPrecomprimido(datos)
+        self.generado_en = time.time()
+
+    def edad(self) -> float:
+        """Segundos transcurridos desde que se generó el snapshot."""
+        return time.time() - self.generado_en
+
+
+_snapshot: Optional[SnapshotTorneo] = None
+_desactualizado_desde: Optional[float] = None
+_lock_estado = threading.Lock()
+# Últimos snapshots publicados por número de versión, y parches ya calculados entre ellos
+_retenidos: "OrderedDict[int, SnapshotTorneo]" = OrderedDict()
+_cambios_cache: Dict[Tuple[int, int], Dict] = {}
+# Snapshots retenidos de todos los workers, por número de versión, con el cuerpo JSON comprimido con gzip
+COLECCION_RETENIDOS = 'torneo_snapshots'
+# Un solo recálculo a la vez por proceso
+_lock_refresco = threading.Lock()
+
+
+def _max_staleness() -> float:
+    return TORNEO_MAX_STALENESS_SEG if TORNEO_SWR else 0
+
+
+def _retener(snapshot: SnapshotTorneo) -> None:
+    """Guarda el snapshot en `torneo_snapshots` y descarta los que exceden TORNEO_VERSIONES_RETENIDAS."""
+    cuerpo = snapshot.cuerpo.variantes.get('gzip') or gzip.compress(snapshot.cuerpo.cuerpo)
+    coleccion = db[COLECCION_RETENIDOS]
+    coleccion.replace_one({'_id': snapshot.numero}, {
+        '_id': snapshot.numero,
+        'cuerpo': cuerpo,
+        'creada_en': datetime.now()
+    }, upsert=True)
+    antiguos = [d['_id'] for d in coleccion.find({}, {'_id': 1}).sort('_id', -1).skip(TORNEO_VERSIONES_RETENIDAS)]
+    if antiguos:
+        coleccion.delete_many({'_id': {'$in': antiguos}})
+
+
+def _datos_retenidos(numero: int) -> Optional[Dict[str, Any]]:
+    """Datos (en su forma JSON) de una versión retenida por cualquier worker, si sigue en `torneo_snapshots`."""
+    documento = db[COLECCION_RETENIDOS].find_one({'_id': numero})
+    if documento is None:
+        return None
+    return json.loads(gzip.decompress(documento['cuerpo']))
+
+
+def _refrescar(version: str, logger) -> SnapshotTorneo:
+    """Recalcula las estadísticas y publica el nuevo snapshot."""
+    global _snapshot, _desactualizado_desde
+    with _lock_refresco:
+        actual = _snapshot
+        if actual is not None and actual.version == version:
+            return actual
+
+        logger.info(f"Recalculando estadísticas del torneo para la versión {version}")
+        datos = coalescencia_util.ejecutar_coalescido(
+            "torneo", lambda: analisis_torneo_service.get_estadisticas_torneo(logger), logger)
+        numero = version_service.numero_version(version)
+        nuevo = SnapshotTorneo(dict(datos, version=numero), version, numero)
+        with _lock_estado:
+            _snapshot = nuevo
+            _desactualizado_desde = None
+            _retenidos[numero] = nuevo
+            _retenidos.move_to_end(numero)
+            while len(_retenidos) > TORNEO_VERSIONES_RETENIDAS:
+                _retenidos.popitem(last=False)
+            _cambios_cache.clear()
+        try:
+            _retener(nuevo)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar el snapshot {numero} en {COLECCION_RETENIDOS}: {str(e)}")
+        return nuevo
+
+
+def _refrescar_en_segundo_plano(version: str, logger) -> None:
+    """Lanza un recálculo si no hay otro en curso."""
+    if _lock_refresco.locked():
+        return
+
+    def tarea():
+        try:
+            _refrescar(version, logger)
+        except Exception as e:
+            logger.error(f"Error al recalcular el snapshot del torneo: {str(e)}")
+
+    threading.Thread(target=tarea, name="refresco-torneo", daemon=True).start()
+
+
+def obtener_snapshot(logger) -> Tuple[SnapshotTorneo, bool]:
+    """
+    Devuelve el snapshot a servir y si está desactualizado respecto a la versión actual de los datos.
+    Bloquea solo si no existe snapshot o si el existente superó la antigüedad máxima permitida.
+    """
+    global _desactualizado_desde
+    version = version_service.obtener_version_datos()
+    actual = _snapshot
+
+    if actual is None:
+        return _refrescar(version, logger), False
+
+    if actual.version == version:
+        return actual, False
+
+    with _lock_estado:
+        if _desactualizado_desde is None:
+            _desactualizado_desde = time.time()
+        tiempo_desactualizado = time.time() - _desactualizado_desde
+
+    if tiempo_desactualizado >= _max_staleness():
+        return _refrescar(version, logger), False
+
+    _refrescar_en_segundo_plano(version, logger)
+    return actual, True
+
+
+def obtener_cambios(desde: int, logger) -> Tuple[SnapshotTorneo, Dict[str, Any]]:
+    """
+    Cambios de las estadísticas del torneo desde la versión `desde` hasta el snapshot actual.
+    La versión base se busca en memoria y, si la publicó otro worker, en `torneo_snapshots` (comparando ambas en
+    su forma JSON). Si esa versión ya no se conserva (o es desconocida) se devuelve el snapshot completo.
+    """
+    snapshot, _ = obtener_snapshot(logger)
+    respuesta = {"desde": desde, "version": snapshot.numero}
+    if desde > snapshot.numero:
+        return snapshot, dict(respuesta, completo=True, datos=snapshot.datos)
+
+    with _lock_estado:
+        base = _retenidos.get(desde)
+        cambios = _cambios_cache.get((desde, snapshot.numero))
+
+    if cambios is None:
+        if base is not None:
+            datos_base, datos_actuales = base.datos, snapshot.datos
+        else:
+            datos_base = _datos_retenidos(desde)
+            if datos_base is None:
+                return snapshot, dict(respuesta, completo=True, datos=snapshot.datos)
+            datos_actuales = json.loads(snapshot.cuerpo.cuerpo)
+        cambios = delta_util.calcular_cambios(datos_base, datos_actuales)
+        if cambios is delta_util.SIN_CAMBIOS:
+            cambios = {}
+        with _lock_estado:
+            _cambios_cache[(desde, snapshot.numero)] = cambios
+
+    return snapshot, dict(respuesta, completo=False, cambios=cambios)
@@ -0,0 +1,105 @@
+"""
+Módulo para detectar cambios en los datos del torneo.
+Genera una huella barata que cambia con cada escritura de la aplicación (contador compartido `datos_cambios`,
+incrementado por la ingesta, la desnormalización, `jugador_stats` y las referencias) y cuando se registra
+o finaliza un partido en `historial` por fuera de ella.
+"""
+import threading
+import time
+from datetime import datetime
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from Config.database import db
+from Config.settings import VERSION_DATOS_TTL_SEG
+from Services import indice_service
+
+# Contador de escrituras de la aplicación en los datos del torneo (colección `contadores`)
+CONTADOR_CAMBIOS = 'datos_cambios'
+
+_lock = threading.Lock()
+_version_cache = {"version": None, "consultada_en": 0.0}
+
+
+def contador_cambios() -> int:
+    """Número de escrituras registradas con invalidar_version_datos (compartido entre workers)."""
+    contador = db['contadores'].find_one({'_id': CONTADOR_CAMBIOS})
+    return contador['valor'] if contador else 0
+
+
+def _cambios_de(huella: str) -> int:
+    """Valor del contador de cambios con el que se calculó una huella."""
+    try:
+        return int(huella.split('-', 1)[0])
+    except ValueError:
+        return 0
+
+
+def calcular_version_datos() -> str:
+    """
+    Consulta la huella actual de los datos: contador de cambios registrados, número de documentos del historial,
+    último _id insertado y número de partidos finalizados (estado copiado del juego).
+    """
+    cambios = contador_cambios()
+    ultimo = db['historial'].find_one({}, {'_id': 1}, sort=[('_id', -1)])
+    total_historial = db['historial'].estimated_document_count()
+    finalizados = db['historial'].count_documents({'estado': 'finalizado'})
+    ultimo_id = str(ultimo['_id']) if ultimo else 'vacio'
+    return f"{cambios}-{total_historial}-{ultimo_id}-{finalizados}"
+
+
+def obtener_version_datos() -> str:
+    """Devuelve la huella de los datos, reutilizándola durante VERSION_DATOS_TTL_SEG."""
+    ahora = time.monotonic()
+    with _lock:
+        if _version_cache["version"] is not None and ahora - _version_cache["consultada_en"] < VERSION_DATOS_TTL_SEG:
+            return _version_cache["version"]
+
+    version = calcular_version_datos()
+    with _lock:
+        _version_cache["version"] = version
+        _version_cache["consultada_en"] = ahora
+    return version
+
+
+def invalidar_version_datos() -> None:
+    """
+    Registra un cambio en los datos: incrementa el contador compartido entre workers, de modo que también
+    cambian la huella las ediciones en su lugar y las escrituras en otras colecciones, y fuerza a que la
+    siguiente consulta de este proceso recalcule la huella.
+    """
+    db['contadores'].update_one({'_id': CONTADOR_CAMBIOS}, {'$inc': {'valor': 1}}, upsert=True)
+    with _lock:
+        _version_cache["version"] = None
+
+
+def numero_version(huella: str) -> int:
+    """
+    Número de versión monótono asociado a una huella de los datos, compartido entre workers.
+    Una huella nueva, o que vuelve a aparecer después de otra, recibe el siguiente valor del contador
+    `torneo_version`, así que un número nunca se reutiliza para otros datos. Una huella anterior a un cambio
+    ya registrado (un worker que aún la tiene en caché) conserva el número que se le asignó.
+    """
+    indice_service.asegurar_coleccion('torneo_versiones')
+    registro = db['torneo_versiones'].find_one({'huella': huella}, {'numero': 1, 'cambios': 1})
+    ultimo = db['torneo_versiones'].find_one({}, {'numero': 1, 'cambios': 1}, sort=[('numero', -1)])
+    if registro is not None and registro.get('numero') is not None and ultimo is not None:
+        if registro['numero'] == ultimo.get('numero') or registro.get('cambios', 0) < ultimo.get('cambios', 0):
+            return registro['numero']
+
+    contador = db['contadores'].find_one_and_update(
+        {'_id': 'torneo_version'}, {'$inc': {'valor': 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    try:
+        db['torneo_versiones'].update_one(
+            {'huella': huella},
+            {'$set': {'numero': contador['valor'], 'cambios': _cambios_de(huella), 'creada_en': datetime.now()}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Otro worker insertó la misma huella al mismo tiempo; el upsert concurrente se reintenta como actualización
+        db['torneo_versiones'].update_one(
+            {'huella': huella}, {'$max': {'numero': contador['valor']}, '$set': {'cambios': _cambios_de(huella)}}
+        )
+    return contador['valor']
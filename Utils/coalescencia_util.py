@@ -0,0 +1,193 @@
+"""
+Coalescencia de peticiones (single-flight).
+Las peticiones concurrentes con la misma clave esperan a un único cálculo en curso
+y comparten su resultado, tanto dentro del proceso como entre workers de uvicorn.
+"""
+import hashlib
+import os
+import stat
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from bson import json_util
+
+from Config.settings import COALESCENCIA_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo coalescencia dentro del proceso
+    fcntl = None
+
+_SIN_RESULTADO = object()
+
+_lock = threading.Lock()
+_en_vuelo: Dict[str, "_Vuelo"] = {}
+
+
+class _Vuelo:
+    """Cálculo en curso para una clave."""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+def ejecutar_coalescido(clave: str, funcion: Callable[[], Any], logger=None, entre_workers: bool = True) -> Any:
+    """
+    Ejecuta `funcion` una sola vez por clave entre todas las peticiones concurrentes.
+    Las peticiones que llegan mientras hay un cálculo en curso reciben el mismo resultado
+    (o la misma excepción). Entre workers el resultado se comparte como JSON (tipos BSON incluidos);
+    con `entre_workers=False` solo se coalesce dentro del proceso.
+    """
+    with _lock:
+        vuelo = _en_vuelo.get(clave)
+        lider = vuelo is None
+        if lider:
+            vuelo = _Vuelo()
+            _en_vuelo[clave] = vuelo
+
+    if not lider:
+        if logger:
+            logger.info(f"Esperando cálculo en curso para {clave}")
+        vuelo.evento.wait()
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+
+    try:
+        if entre_workers:
+            vuelo.resultado = _ejecutar_entre_workers(clave, funcion, logger)
+        else:
+            vuelo.resultado = funcion()
+        return vuelo.resultado
+    except BaseException as e:
+        vuelo.error = e
+        raise
+    finally:
+        with _lock:
+            _en_vuelo.pop(clave, None)
+        vuelo.evento.set()
+
+
+def _directorio_seguro(logger=None) -> Optional[str]:
+    """
+    COALESCENCIA_DIR creado con permisos 0700, o None si no es un directorio propio
+    (otro usuario podría dejar resultados falsos en él).
+    """
+    try:
+        os.makedirs(COALESCENCIA_DIR, mode=0o700, exist_ok=True)
+        info = os.lstat(COALESCENCIA_DIR)
+        if stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid() and info.st_mode & 0o077:
+            os.chmod(COALESCENCIA_DIR, 0o700)
+            info = os.lstat(COALESCENCIA_DIR)
+    except OSError as e:
+        if logger:
+            logger.warning(f"Coalescencia solo en proceso, no se pudo preparar {COALESCENCIA_DIR}: {str(e)}")
+        return None
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        if logger:
+            logger.warning(f"Coalescencia solo en proceso: {COALESCENCIA_DIR} no es un directorio propio con permisos 0700")
+        return None
+    return COALESCENCIA_DIR
+
+
+def _vigente(archivo, ruta: str) -> bool:
+    """True si `ruta` sigue siendo el archivo abierto (no se borró ni se reemplazó)."""
+    try:
+        abierto, actual = os.fstat(archivo.fileno()), os.stat(ruta)
+    except OSError:
+        return False
+    return (abierto.st_dev, abierto.st_ino) == (actual.st_dev, actual.st_ino)
+
+
+def _ejecutar_entre_workers(clave: str, funcion: Callable[[], Any], logger=None) -> Any:
+    """
+    Coordina el cálculo entre procesos con un archivo de lock por clave.
+    El worker que obtiene el lock calcula y deja el resultado en disco (JSON); los que esperaban
+    se anotan con un lock compartido en `.espera` y lo reutilizan si fue escrito después de que empezaron
+    a esperar. El último en leerlo, con el lock todavía tomado, borra los archivos de la clave.
+    """
+    if fcntl is None or not COALESCENCIA_DIR:
+        return funcion()
+    directorio = _directorio_seguro(logger)
+    if directorio is None:
+        return funcion()
+
+    nombre = hashlib.sha1(clave.encode('utf-8')).hexdigest()
+    ruta_lock = os.path.join(directorio, f"{nombre}.lock")
+    ruta_espera = os.path.join(directorio, f"{nombre}.espera")
+    ruta_resultado = os.path.join(directorio, f"{nombre}.json")
+    rutas = (ruta_resultado, ruta_espera, ruta_lock)
+    inicio = time.time()
+
+    while True:
+        with open(ruta_lock, 'a+') as archivo_lock:
+            try:
+                fcntl.flock(archivo_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if logger:
+                    logger.info(f"Esperando cálculo de otro worker para {clave}")
+                with open(ruta_espera, 'a+') as archivo_espera:
+                    fcntl.flock(archivo_espera, fcntl.LOCK_SH)
+                    fcntl.flock(archivo_lock, fcntl.LOCK_EX)
+                    if not _vigente(archivo_lock, ruta_lock):
+                        # Los archivos se borraron mientras esperaba: empezar de nuevo
+                        continue
+                    resultado = _leer_resultado(ruta_resultado, inicio)
+                    fcntl.flock(archivo_espera, fcntl.LOCK_UN)
+                    if resultado is not _SIN_RESULTADO:
+                        _limpiar_si_nadie_espera(archivo_espera, rutas)
+                        return resultado
+            else:
+                if not _vigente(archivo_lock, ruta_lock):
+                    continue
+
+            # Con el lock tomado: calcular, compartir y limpiar si nadie espera
+            resultado = funcion()
+            _escribir_resultado(ruta_resultado, resultado, logger)
+            with open(ruta_espera, 'a+') as archivo_espera:
+                _limpiar_si_nadie_espera(archivo_espera, rutas)
+            return resultado
+
+
+def _limpiar_si_nadie_espera(archivo_espera, rutas) -> None:
+    """Borra los archivos de la clave si ningún worker tiene el lock compartido de espera (requiere el lock)."""
+    try:
+        fcntl.flock(archivo_espera, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return
+    for ruta in rutas:
+        try:
+            os.unlink(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def _leer_resultado(ruta: str, desde: float) -> Any:
+    """Lee el resultado dejado por otro worker si es posterior a `desde`."""
+    try:
+        if os.path.getmtime(ruta) < desde:
+            return _SIN_RESULTADO
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            return json_util.loads(archivo.read())
+    except (OSError, ValueError):
+        return _SIN_RESULTADO
+
+
+def _escribir_resultado(ruta: str, resultado: Any, logger=None) -> None:
+    """Escribe el resultado de forma atómica para los workers en espera."""
+    temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        contenido = json_util.dumps(resultado)
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(contenido)
+        os.replace(temporal, ruta)
+    except (OSError, TypeError, ValueError) as e:
+        if logger:
+            logger.warning(f"No se pudo compartir el resultado entre workers: {str(e)}")
+        try:
+            os.unlink(temporal)
+        except OSError:
+            pass
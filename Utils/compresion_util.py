@@ -0,0 +1,127 @@
+"""
+Cuerpos de respuesta JSON precomprimidos y negociación de `Accept-Encoding`.
+Las variantes gzip, brotli y zstd se calculan una sola vez al crear el cuerpo, de modo que servir una
+respuesta en caché no requiere comprimir nada. brotli (`brotli`) y zstd (`zstandard`) están en requirements.txt;
+si no están instalados solo se ofrece gzip.
+"""
+import gzip
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Debajo de este tamaño comprimir no compensa
+TAMANO_MINIMO = 1024
+
+# Preferencia del servidor cuando el cliente acepta varias con el mismo peso
+_PREFERENCIA = ('br', 'zstd', 'gzip')
+
+
+# Niveles moderados: los cuerpos se comprimen en la primera petición de cada versión, dentro de su latencia;
+# los niveles máximos (gzip 9, brotli 11, zstd 19) cuestan mucho más tiempo para unos pocos bytes menos
+NIVEL_GZIP = 6
+CALIDAD_BROTLI = 5
+NIVEL_ZSTD = 3
+
+
+def _compresores() -> Dict[str, Any]:
+    compresores = {'gzip': lambda datos: gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)}
+    if brotli is not None:
+        compresores['br'] = lambda datos: brotli.compress(datos, quality=CALIDAD_BROTLI)
+    if zstandard is not None:
+        compresores['zstd'] = lambda datos: zstandard.ZstdCompressor(level=NIVEL_ZSTD).compress(datos)
+    return compresores
+
+
+COMPRESORES = _compresores()
+
+
+def serializar_json(contenido: Any) -> bytes:
+    """Serializa igual que la JSONResponse de FastAPI."""
+    return json.dumps(
+        jsonable_encoder(contenido), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class CuerpoPrecomprimido:
+    """Cuerpo JSON junto con sus variantes comprimidas."""
+
+    def __init__(self, contenido: Any):
+        self.cuerpo = serializar_json(contenido)
+        self.variantes: Dict[str, bytes] = {}
+        if len(self.cuerpo) >= TAMANO_MINIMO:
+            for codificacion, comprimir in COMPRESORES.items():
+                self.variantes[codificacion] = comprimir(self.cuerpo)
+
+
+def elegir_codificacion(accept_encoding: Optional[str], disponibles) -> Optional[str]:
+    """Codificación con mayor `q` que acepta el cliente entre las disponibles (None = sin comprimir)."""
+    if not accept_encoding:
+        return None
+    pesos = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.strip().partition(';')
+        nombre = nombre.strip().lower()
+        peso = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                peso = float(parametros[2:])
+            except ValueError:
+                peso = 0.0
+        pesos[nombre] = peso
+
+    candidatas = [
+        (pesos.get(codificacion, pesos.get('*', 0.0)), -orden, codificacion)
+        for orden, codificacion in enumerate(_PREFERENCIA)
+        if codificacion in disponibles
+    ]
+    candidatas = [c for c in candidatas if c[0] > 0]
+    return max(candidatas)[2] if candidatas else None
+
+
+def responder(request: Request, cuerpo: CuerpoPrecomprimido, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Respuesta con la variante que mejor acepta el cliente, sin comprimir nada en la petición."""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    codificacion = elegir_codificacion(request.headers.get("accept-encoding"), cuerpo.variantes)
+    if codificacion:
+        headers["Content-Encoding"] = codificacion
+        return Response(cuerpo.variantes[codificacion], media_type="application/json", headers=headers)
+    return Response(cuerpo.cuerpo, media_type="application/json", headers=headers)
+
+
+class CacheRespuestas:
+    """Cuerpos precomprimidos por clave y versión de los datos, con un máximo de entradas (LRU)."""
+
+    def __init__(self, maximo: int):
+        self.maximo = maximo
+        self._entradas: "OrderedDict[Any, CuerpoPrecomprimido]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obtener(self, clave) -> Optional[CuerpoPrecomprimido]:
+        with self._lock:
+            cuerpo = self._entradas.get(clave)
+            if cuerpo is not None:
+                self._entradas.move_to_end(clave)
+            return cuerpo
+
+    def guardar(self, clave, cuerpo: CuerpoPrecomprimido) -> None:
+        with self._lock:
+            self._entradas[clave] = cuerpo
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
@@ -0,0 +1,197 @@
+"""
+Registro de consultas lentas a MongoDB mediante los listeners de monitoreo de comandos de pymongo.
+Se registra en el cliente compartido (Config/database.py), así que cubre todas las consultas de los servicios
+sin cambiar su código. Cada `find`/`aggregate` (incluidos sus `getMore`) que supera el umbral se registra con su
+filtro, proyección, duración y documentos devueltos; para una muestra de ellas se obtiene en segundo plano
+el plan con `explain` y se indica si fue COLLSCAN o IXSCAN.
+"""
+import logging
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+from pymongo import monitoring
+
+COMANDOS = ('find', 'aggregate', 'count', 'distinct')
+
+# Cursores abiertos que se siguen a la vez, largo máximo del filtro en el log y
+# segundos mínimos entre dos explain de la misma forma de consulta
+MAX_CURSORES = 1000
+MAX_TEXTO = 500
+INTERVALO_EXPLAIN_SEG = 300
+
+logger = logging.getLogger('consultas_lentas')
+
+
+class _Consulta:
+    __slots__ = ('base_datos', 'coleccion', 'comando', 'detalle', 'duracion_us', 'documentos')
+
+    def __init__(self, base_datos: str, coleccion: str, comando: str, detalle: Dict):
+        self.base_datos = base_datos
+        self.coleccion = coleccion
+        self.comando = comando
+        self.detalle = detalle
+        self.duracion_us = 0
+        self.documentos = 0
+
+
+def _texto(valor) -> str:
+    texto = json_util.dumps(valor, ensure_ascii=False)
+    return texto if len(texto) <= MAX_TEXTO else texto[:MAX_TEXTO] + '...'
+
+
+def _forma(valor):
+    """Estructura de un filtro sin sus valores, para no repetir explain de la misma consulta."""
+    if isinstance(valor, dict):
+        return tuple((clave, _forma(v)) for clave, v in valor.items())
+    if isinstance(valor, list):
+        return tuple(_forma(v) for v in valor[:1])
+    return None
+
+
+def resumir_plan(explicacion: Dict) -> Dict[str, Any]:
+    """Etapas del plan ganador, índices usados y si alguna etapa recorrió la colección completa (COLLSCAN)."""
+    etapas: List[str] = []
+    indices: List[str] = []
+
+    def recorrer(nodo):
+        if isinstance(nodo, dict):
+            if 'stage' in nodo:
+                etapas.append(nodo['stage'])
+                if nodo.get('indexName'):
+                    indices.append(nodo['indexName'])
+            for clave, valor in nodo.items():
+                if clave != 'rejectedPlans':
+                    recorrer(valor)
+        elif isinstance(nodo, list):
+            for valor in nodo:
+                recorrer(valor)
+
+    recorrer(explicacion)
+    if 'COLLSCAN' in etapas:
+        tipo = 'COLLSCAN'
+    elif any(etapa in ('IXSCAN', 'IDHACK', 'EXPRESS_IXSCAN', 'EXPRESS_CLUSTERED_IXSCAN') for etapa in etapas):
+        tipo = 'IXSCAN'
+    else:
+        tipo = etapas[0] if etapas else 'DESCONOCIDO'
+    return {'tipo': tipo, 'etapas': etapas, 'indices': sorted(set(indices))}
+
+
+class MonitorConsultasLentas(monitoring.CommandListener):
+    """Listener de comandos que registra las consultas que superan `umbral_ms`."""
+
+    def __init__(self, umbral_ms: float, muestreo_explain: float = 1.0):
+        self.umbral_us = umbral_ms * 1000
+        self.muestreo_explain = muestreo_explain
+        self.cliente = None
+        self._pendientes: Dict[int, _Consulta] = {}
+        self._cursores: "OrderedDict[int, _Consulta]" = OrderedDict()
+        self._explicadas: Dict[Any, float] = {}
+        self._lock = threading.Lock()
+        self._cola: "queue.Queue[_Consulta]" = queue.Queue(maxsize=100)
+        self._hilo: Optional[threading.Thread] = None
+
+    # Listener
+
+    def started(self, event) -> None:
+        if event.command_name in COMANDOS:
+            comando = event.command
+            detalle = {
+                campo: comando[campo]
+                for campo in ('filter', 'projection', 'sort', 'limit', 'pipeline', 'query', 'key')
+                if campo in comando
+            }
+            consulta = _Consulta(event.database_name, comando.get(event.command_name), event.command_name, detalle)
+            with self._lock:
+                self._pendientes[event.request_id] = consulta
+        elif event.command_name == 'getMore':
+            with self._lock:
+                consulta = self._cursores.get(event.command.get('getMore'))
+                if consulta is not None:
+                    self._pendientes[event.request_id] = consulta
+
+    def succeeded(self, event) -> None:
+        with self._lock:
+            consulta = self._pendientes.pop(event.request_id, None)
+        if consulta is None:
+            return
+
+        respuesta = event.reply or {}
+        consulta.duracion_us += event.duration_micros
+        cursor = respuesta.get('cursor')
+        if cursor is not None:
+            consulta.documentos += len(cursor.get('firstBatch', cursor.get('nextBatch', [])))
+            cursor_id = cursor.get('id', 0)
+        else:
+            consulta.documentos += respuesta.get('n', len(respuesta.get('values', [])))
+            cursor_id = 0
+
+        with self._lock:
+            if cursor_id:
+                # Quedan lotes: la consulta se evalúa cuando el cursor se agota
+                self._cursores[cursor_id] = consulta
+                self._cursores.move_to_end(cursor_id)
+                while len(self._cursores) > MAX_CURSORES:
+                    self._cursores.popitem(last=False)
+                return
+            for id_cursor, abierta in list(self._cursores.items()):
+                if abierta is consulta:
+                    del self._cursores[id_cursor]
+
+        if consulta.duracion_us >= self.umbral_us:
+            self._registrar(consulta)
+
+    def failed(self, event) -> None:
+        with self._lock:
+            self._pendientes.pop(event.request_id, None)
+
+    # Registro y explain
+
+    def _registrar(self, consulta: _Consulta) -> None:
+        detalle = ', '.join(f"{campo}={_texto(valor)}" for campo, valor in consulta.detalle.items())
+        logger.warning(
+            f"Consulta lenta {consulta.coleccion}.{consulta.comando}: {consulta.duracion_us / 1000:.1f} ms, "
+            f"{consulta.documentos} documentos, {detalle}"
+        )
+        if self.cliente is None or random.random() >= self.muestreo_explain:
+            return
+
+        forma = (consulta.coleccion, consulta.comando, _forma(consulta.detalle))
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._explicadas.get(forma, -INTERVALO_EXPLAIN_SEG) < INTERVALO_EXPLAIN_SEG:
+                return
+            self._explicadas[forma] = ahora
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._procesar_explain, name="explain-consultas-lentas",
+                                              daemon=True)
+                self._hilo.start()
+        try:
+            self._cola.put_nowait(consulta)
+        except queue.Full:
+            pass
+
+    def _procesar_explain(self) -> None:
+        # El explain se ejecuta fuera del hilo de la petición y nunca dentro del propio listener
+        while True:
+            consulta = self._cola.get()
+            try:
+                resumen = resumir_plan(self.explicar(consulta))
+                indices = f" índices: {', '.join(resumen['indices'])}" if resumen['indices'] else ""
+                logger.warning(
+                    f"Plan de {consulta.coleccion}.{consulta.comando}: {resumen['tipo']}{indices} "
+                    f"(etapas: {' > '.join(resumen['etapas'])})"
+                )
+            except Exception as e:
+                logger.warning(f"No se pudo obtener el plan de {consulta.coleccion}.{consulta.comando}: {str(e)}")
+
+    def explicar(self, consulta: _Consulta) -> Dict:
+        comando = {consulta.comando: consulta.coleccion}
+        comando.update(consulta.detalle)
+        if consulta.comando == 'aggregate':
+            comando['cursor'] = {}
+        return self.cliente[consulta.base_datos].command({'explain': comando, 'verbosity': 'queryPlanner'})
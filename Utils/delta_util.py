@@ -0,0 +1,63 @@
+"""
+Diferencias entre dos versiones de una respuesta JSON.
+
+Formato del parche (similar a un JSON merge patch):
+- dict: solo las claves que cambiaron; las claves eliminadas se listan en `_eliminados`.
+- lista: {"_lista": <longitud nueva>, "entradas": {"<índice>": <valor nuevo>}} con solo las posiciones que cambiaron.
+- cualquier otro valor: el valor nuevo completo.
+"""
+from typing import Any, Dict
+
+SIN_CAMBIOS = object()
+
+
+def calcular_cambios(anterior: Any, actual: Any) -> Any:
+    """Devuelve el parche que transforma `anterior` en `actual`, o SIN_CAMBIOS si son iguales."""
+    if anterior == actual:
+        return SIN_CAMBIOS
+
+    if isinstance(anterior, dict) and isinstance(actual, dict):
+        parche: Dict[str, Any] = {}
+        for clave, valor in actual.items():
+            if clave not in anterior:
+                parche[clave] = valor
+                continue
+            cambio = calcular_cambios(anterior[clave], valor)
+            if cambio is not SIN_CAMBIOS:
+                parche[clave] = cambio
+        eliminados = [clave for clave in anterior if clave not in actual]
+        if eliminados:
+            parche['_eliminados'] = eliminados
+        return parche
+
+    if isinstance(anterior, list) and isinstance(actual, list):
+        entradas = {
+            str(i): valor
+            for i, valor in enumerate(actual)
+            if i >= len(anterior) or anterior[i] != valor
+        }
+        return {'_lista': len(actual), 'entradas': entradas}
+
+    return actual
+
+
+def aplicar_cambios(anterior: Any, parche: Any) -> Any:
+    """Aplica un parche de `calcular_cambios` (usado para verificar el formato del lado del cliente)."""
+    if isinstance(parche, dict) and '_lista' in parche and isinstance(anterior, list):
+        resultado = list(anterior[:parche['_lista']])
+        resultado.extend([None] * (parche['_lista'] - len(resultado)))
+        for indice, valor in parche['entradas'].items():
+            resultado[int(indice)] = valor
+        return resultado
+
+    if isinstance(parche, dict) and isinstance(anterior, dict):
+        resultado = dict(anterior)
+        for clave in parche.get('_eliminados', []):
+            resultado.pop(clave, None)
+        for clave, valor in parche.items():
+            if clave == '_eliminados':
+                continue
+            resultado[clave] = aplicar_cambios(anterior[clave], valor) if clave in anterior else valor
+        return resultado
+
+    return parche
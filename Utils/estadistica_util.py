@@ -1,7 +1,7 @@
 from bson.objectid import ObjectId
 import math
-from collections import Counter, defaultdict
-from typing import List, Dict, Any
+from collections import Counter, defaultdict, deque
+from typing import List, Dict, Any, Union
 
 def convertir_objectid_a_string(obj):
         """Función recursiva para convertir todos los ObjectId a string en un objeto"""
@@ -17,6 +17,138 @@ def convertir_objectid_a_string(obj):
 
 # ========== FUNCIONES DE CÁLCULO DE ESTADÍSTICAS DE JUGADOR ==========
 
+TIPOS_PRESION = ('Pase', 'Tiro', 'Regate')
+TIPOS_FISICOS = ('Entrada', 'Falta', 'Intercepcion')
+PESOS_IMPORTANCIA = {
+    'critica': 2.0,
+    'alta': 1.5,
+    'media': 1.0,
+    'baja': 0.5
+}
+ACCIONES_RECIENTES = 10
+VENTANA_SECUENCIA_SEGUNDOS = 30
+
+
+class AcumuladorJugador:
+    """
+    Recorre una sola vez las acciones de un jugador y guarda todos los conteos que usan
+    las funciones calcular_*: conteos por tipo, secuencias (asistencias, pases clave) y sectores.
+    """
+
+    def __init__(self, acciones: List[Dict] = None):
+        self.total_acciones = 0
+        self.conteo_tipos = Counter()
+        self.exitos_tipos = Counter()
+        self.tiros_area_chica = 0
+        self.regates_medio_central = 0
+        self.asistencias = 0
+        self.pases_clave = 0
+        self.max_minuto = 0
+        self.impacto = 0
+        self.sectores = Counter()
+        self.presion_sectores = defaultdict(lambda: {'total': 0, 'exitos': 0})
+        self.exitos_recientes = deque(maxlen=ACCIONES_RECIENTES)
+        self._anterior = None
+        for accion in acciones or []:
+            self.agregar(accion)
+
+    def agregar(self, accion: Dict) -> None:
+        """Incorpora una acción respetando el orden cronológico de la lista original"""
+        tipo = accion.get('tipo')
+        exito = bool(accion.get('exito'))
+        minuto = accion.get('minuto', 0)
+
+        self.total_acciones += 1
+        self.conteo_tipos[tipo] += 1
+        if exito:
+            self.exitos_tipos[tipo] += 1
+
+        if tipo == 'Tiro' and 'area_chica' in accion.get('sector', '').lower():
+            self.tiros_area_chica += 1
+        elif tipo == 'Regate' and 'medio_central' in accion.get('sector', '').lower():
+            self.regates_medio_central += 1
+
+        sector = accion.get('sector', 'desconocido')
+        self.sectores[sector] += 1
+        if tipo in TIPOS_PRESION:
+            self.presion_sectores[sector]['total'] += 1
+            if exito:
+                self.presion_sectores[sector]['exitos'] += 1
+
+        # Secuencias: pase exitoso seguido de gol (asistencia) o de tiro (pase clave) en <=30 segundos
+        anterior = self._anterior
+        if anterior is not None and anterior.get('tipo') == 'Pase' and anterior.get('exito') and tipo in ('Gol', 'Tiro'):
+            tiempo_anterior = anterior.get('minuto', 0) * 60 + anterior.get('segundo', 0)
+            tiempo_actual = minuto * 60 + accion.get('segundo', 0)
+            if abs(tiempo_actual - tiempo_anterior) <= VENTANA_SECUENCIA_SEGUNDOS:
+                if tipo == 'Gol':
+                    self.asistencias += 1
+                else:
+                    self.pases_clave += 1
+        self._anterior = accion
+
+        if self.total_acciones == 1 or minuto > self.max_minuto:
+            self.max_minuto = minuto
+
+        importancia = accion.get('importancia', 'baja').lower()
+        self.impacto += PESOS_IMPORTANCIA.get(importancia, 0.5) * (1 if exito else 0)
+        self.exitos_recientes.append(exito)
+
+    def a_documento(self) -> Dict[str, Any]:
+        """Serializa los conteos del acumulador (sin el estado de secuencia)"""
+        return {
+            'total_acciones': self.total_acciones,
+            'conteo_tipos': dict(self.conteo_tipos),
+            'exitos_tipos': dict(self.exitos_tipos),
+            'tiros_area_chica': self.tiros_area_chica,
+            'regates_medio_central': self.regates_medio_central,
+            'asistencias': self.asistencias,
+            'pases_clave': self.pases_clave,
+            'max_minuto': self.max_minuto,
+            'impacto': self.impacto,
+            'sectores': dict(self.sectores),
+            'presion_sectores': {sector: dict(datos) for sector, datos in self.presion_sectores.items()},
+            'exitos_recientes': list(self.exitos_recientes)
+        }
+
+    @classmethod
+    def desde_documento(cls, documento: Dict[str, Any]) -> 'AcumuladorJugador':
+        """Reconstruye un acumulador a partir de los conteos guardados"""
+        acumulado = cls()
+        acumulado.total_acciones = documento.get('total_acciones', 0)
+        acumulado.conteo_tipos.update(documento.get('conteo_tipos', {}))
+        acumulado.exitos_tipos.update(documento.get('exitos_tipos', {}))
+        acumulado.tiros_area_chica = documento.get('tiros_area_chica', 0)
+        acumulado.regates_medio_central = documento.get('regates_medio_central', 0)
+        acumulado.asistencias = documento.get('asistencias', 0)
+        acumulado.pases_clave = documento.get('pases_clave', 0)
+        acumulado.max_minuto = documento.get('max_minuto', 0)
+        acumulado.impacto = documento.get('impacto', 0)
+        acumulado.sectores.update(documento.get('sectores', {}))
+        for sector, datos in documento.get('presion_sectores', {}).items():
+            acumulado.presion_sectores[sector].update(datos)
+        acumulado.exitos_recientes.extend(documento.get('exitos_recientes', []))
+        return acumulado
+
+    def tipo(self, tipo: str) -> int:
+        """Número de acciones de un tipo"""
+        return self.conteo_tipos.get(tipo, 0)
+
+    def exitos(self, tipo: str) -> int:
+        """Número de acciones exitosas de un tipo"""
+        return self.exitos_tipos.get(tipo, 0)
+
+
+AccionesJugador = Union[List[Dict], AcumuladorJugador]
+
+
+def acumular_acciones(acciones: AccionesJugador) -> AcumuladorJugador:
+    """Devuelve el acumulador de las acciones, reutilizándolo si ya está construido"""
+    if isinstance(acciones, AcumuladorJugador):
+        return acciones
+    return AcumuladorJugador(acciones)
+
+
 def obtener_todas_acciones_jugador(partidos: List[Dict], nombre_jugador: str) -> List[Dict]:
     """Extrae todas las acciones de un jugador de su historial de partidos"""
     acciones_jugador = []
@@ -43,133 +175,108 @@ def mapear_posicion(posicion_id: int) -> str:
     }
     return mapeo_posiciones.get(posicion_id, 'Desconocido')
 
-def calcular_asistencias(acciones: List[Dict]) -> int:
+def calcular_asistencias(acciones: AccionesJugador) -> int:
     """Calcula asistencias contando pases exitosos seguidos de gol en <30 segundos"""
-    asistencias = 0
-    for i in range(len(acciones) - 1):
-        accion_actual = acciones[i]
-        accion_siguiente = acciones[i + 1]
-        
-        # Verificar si el pase fue exitoso
-        if (accion_actual.get('tipo') == 'Pase' and 
-            accion_actual.get('exito') and
-            accion_siguiente.get('tipo') == 'Gol'):
-            
-            # Verificar diferencia de tiempo (30 segundos)
-            tiempo_actual = accion_actual.get('minuto', 0) * 60 + accion_actual.get('segundo', 0)
-            tiempo_siguiente = accion_siguiente.get('minuto', 0) * 60 + accion_siguiente.get('segundo', 0)
-            
-            if abs(tiempo_siguiente - tiempo_actual) <= 30:
-                asistencias += 1
-    
-    return asistencias
-
-def calcular_probabilidad_exito_pases(jugador: Dict, acciones: List[Dict]) -> float:
+    return acumular_acciones(acciones).asistencias
+
+def calcular_probabilidad_exito_pases(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la probabilidad de éxito en pases"""
+    acumulado = acumular_acciones(acciones)
     precision_pase = jugador.get('precision_pase', 70)
     vision_juego = jugador.get('vision_juego', 70)
     
     # Contar pases en acciones
-    pases = [a for a in acciones if a.get('tipo') == 'Pase']
-    if len(pases) == 0:
+    pases = acumulado.tipo('Pase')
+    if pases == 0:
         return (precision_pase + vision_juego) / 200 * 100
     
-    pases_exitosos = len([p for p in pases if p.get('exito')])
-    tasa_historica = pases_exitosos / len(pases)
+    tasa_historica = acumulado.exitos('Pase') / pases
     
     return ((precision_pase + vision_juego) / 200 * 100) * tasa_historica
 
-def calcular_probabilidad_precision_tiros(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_probabilidad_precision_tiros(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la precisión de tiros"""
+    acumulado = acumular_acciones(acciones)
     precision_tiro = jugador.get('precision_tiro', 70)
     
     # Contar tiros
-    tiros = [a for a in acciones if a.get('tipo') == 'Tiro']
-    if len(tiros) == 0:
+    tiros = acumulado.tipo('Tiro')
+    if tiros == 0:
         return precision_tiro
     
-    tiros_exitosos = len([t for t in tiros if t.get('exito')])
-    atajadas = len([a for a in acciones if a.get('tipo') == 'Atajada'])
-    
-    tiros_efectivos = max(tiros_exitosos - atajadas, 0)
-    tasa_historica = tiros_efectivos / len(tiros) if len(tiros) > 0 else 0
+    tiros_efectivos = max(acumulado.exitos('Tiro') - acumulado.tipo('Atajada'), 0)
+    tasa_historica = tiros_efectivos / tiros
     
     probabilidad_base = (precision_tiro / 100 * 100) * tasa_historica
     
     # Bonus si tira desde área chica
-    tiros_area_chica = [t for t in tiros if 'area_chica' in t.get('sector', '').lower()]
-    if len(tiros_area_chica) > 0:
+    if acumulado.tiros_area_chica > 0:
         probabilidad_base += 10
     
     return min(probabilidad_base, 100)
 
-def calcular_probabilidad_exito_regates(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_probabilidad_exito_regates(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la probabilidad de éxito en regates"""
+    acumulado = acumular_acciones(acciones)
     regate = jugador.get('regate', 70)
     
     # Contar regates
-    regates = [a for a in acciones if a.get('tipo') == 'Regate']
-    if len(regates) == 0:
+    regates = acumulado.tipo('Regate')
+    if regates == 0:
         return regate
     
-    regates_exitosos = len([r for r in regates if r.get('exito')])
-    tasa_historica = regates_exitosos / len(regates)
+    tasa_historica = acumulado.exitos('Regate') / regates
     
     probabilidad_base = (regate / 100 * 100) * tasa_historica
     
     # Bonus en medio central
-    regates_medio = [r for r in regates if 'medio_central' in r.get('sector', '').lower()]
-    if len(regates_medio) > 0:
+    if acumulado.regates_medio_central > 0:
         probabilidad_base += 5
     
     return min(probabilidad_base, 100)
 
-def calcular_probabilidad_recuperaciones(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_probabilidad_recuperaciones(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la probabilidad de recuperaciones de balón"""
+    acumulado = acumular_acciones(acciones)
     anticipacion = jugador.get('anticipacion', 70)
     agresividad = jugador.get('agresividad', 50)
     
     # Contar acciones defensivas
-    entradas = [a for a in acciones if a.get('tipo') == 'Entrada']
-    intercepciones = [a for a in acciones if a.get('tipo') == 'Intercepcion']
-    
-    total_acciones = len(entradas) + len(intercepciones)
+    total_acciones = acumulado.tipo('Entrada') + acumulado.tipo('Intercepcion')
     if total_acciones == 0:
         return (anticipacion + agresividad) / 200 * 100
     
-    exitosas = len([a for a in entradas if a.get('exito')]) + len([a for a in intercepciones if a.get('exito')])
+    exitosas = acumulado.exitos('Entrada') + acumulado.exitos('Intercepcion')
     tasa_historica = exitosas / total_acciones
     
     return ((anticipacion + agresividad) / 200 * 100) * tasa_historica
 
-def calcular_fatiga_desgaste(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_fatiga_desgaste(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula el nivel de fatiga/desgaste"""
+    acumulado = acumular_acciones(acciones)
     resistencia = jugador.get('resistencia', 70)
     
     # Obtener minutos jugados
-    if len(acciones) == 0:
-        minutos_jugados = 0
-    else:
-        minutos_jugados = max([a.get('minuto', 0) for a in acciones])
+    minutos_jugados = acumulado.max_minuto if acumulado.total_acciones > 0 else 0
     
     fatiga = 100 - (resistencia / 100 * 100 * math.exp(-minutos_jugados / 90))
     return max(0, min(fatiga, 100))
 
-def calcular_probabilidad_faltas(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_probabilidad_faltas(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la probabilidad de cometer faltas"""
+    acumulado = acumular_acciones(acciones)
     agresividad = jugador.get('agresividad', 50)
     
     # Contar acciones físicas y faltas
-    acciones_fisicas = [a for a in acciones if a.get('tipo') in ['Entrada', 'Falta', 'Intercepcion']]
-    if len(acciones_fisicas) == 0:
+    acciones_fisicas = sum(acumulado.tipo(tipo) for tipo in TIPOS_FISICOS)
+    if acciones_fisicas == 0:
         return agresividad / 2
     
-    faltas = len([a for a in acciones if a.get('tipo') == 'Falta'])
-    tasa_historica = faltas / len(acciones_fisicas)
+    tasa_historica = acumulado.tipo('Falta') / acciones_fisicas
     
     return (agresividad / 100 * 100) * tasa_historica
 
-def calcular_contribucion_gol(jugador: Dict, acciones: List[Dict], partidos_jugados: int) -> float:
+def calcular_contribucion_gol(jugador: Dict, acciones: AccionesJugador, partidos_jugados: int) -> float:
     """Calcula la contribución al gol"""
     vision_juego = jugador.get('vision_juego', 70)
     fuerza_disparo = jugador.get('fuerza_disparo', 70)
@@ -183,41 +290,23 @@ def calcular_contribucion_gol(jugador: Dict, acciones: List[Dict], partidos_juga
     contribucion = ((vision_juego + fuerza_disparo) / 200 * 100) * ((goles_temp + asistencias) / partidos_jugados)
     return contribucion
 
-def calcular_tasa_posesion_individual(acciones: List[Dict], total_acciones_equipo: int) -> float:
+def calcular_tasa_posesion_individual(acciones: AccionesJugador, total_acciones_equipo: int) -> float:
     """Calcula la tasa de posesión individual"""
-    acciones_control = [a for a in acciones if a.get('tipo') in ['Pase', 'Regate'] and a.get('exito')]
+    acumulado = acumular_acciones(acciones)
+    acciones_control = acumulado.exitos('Pase') + acumulado.exitos('Regate')
     
     if total_acciones_equipo == 0:
         return 0
     
-    return (len(acciones_control) / total_acciones_equipo) * 100
+    return (acciones_control / total_acciones_equipo) * 100
 
-def calcular_pases_clave(acciones: List[Dict]) -> int:
+def calcular_pases_clave(acciones: AccionesJugador) -> int:
     """Calcula los pases clave (que conducen a tiro)"""
-    pases_clave = 0
-    for i in range(len(acciones) - 1):
-        if (acciones[i].get('tipo') == 'Pase' and 
-            acciones[i].get('exito') and
-            acciones[i + 1].get('tipo') == 'Tiro'):
-            
-            tiempo_actual = acciones[i].get('minuto', 0) * 60 + acciones[i].get('segundo', 0)
-            tiempo_siguiente = acciones[i + 1].get('minuto', 0) * 60 + acciones[i + 1].get('segundo', 0)
-            
-            if abs(tiempo_siguiente - tiempo_actual) <= 30:
-                pases_clave += 1
-    
-    return pases_clave
-
-def calcular_precision_bajo_presion(acciones: List[Dict]) -> Dict[str, float]:
+    return acumular_acciones(acciones).pases_clave
+
+def calcular_precision_bajo_presion(acciones: AccionesJugador) -> Dict[str, float]:
     """Calcula la precisión bajo presión por sector"""
-    sectores = defaultdict(lambda: {'total': 0, 'exitos': 0})
-    
-    for accion in acciones:
-        sector = accion.get('sector', 'desconocido')
-        if accion.get('tipo') in ['Pase', 'Tiro', 'Regate']:
-            sectores[sector]['total'] += 1
-            if accion.get('exito'):
-                sectores[sector]['exitos'] += 1
+    sectores = acumular_acciones(acciones).presion_sectores
     
     precision = {}
     for sector, datos in sectores.items():
@@ -232,24 +321,25 @@ def calcular_precision_bajo_presion(acciones: List[Dict]) -> Dict[str, float]:
         'ofensivo': precision.get('ofensivo', 0) + precision.get('ofensivo_central', 0) + precision.get('ofensivo_area_chica', 0)
     }
 
-def calcular_duelos_aereos(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_duelos_aereos(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula el porcentaje de duelos aéreos ganados"""
+    acumulado = acumular_acciones(acciones)
     juego_aereo = jugador.get('juego_aereo', 70)
     
-    despejes = [a for a in acciones if a.get('tipo') == 'Despeje']
-    if len(despejes) == 0:
+    despejes = acumulado.tipo('Despeje')
+    if despejes == 0:
         return juego_aereo
     
-    despejes_exitosos = len([d for d in despejes if d.get('exito')])
-    tasa_historica = despejes_exitosos / len(despejes)
+    tasa_historica = acumulado.exitos('Despeje') / despejes
     
     return (tasa_historica * 100) * (juego_aereo / 100)
 
-def calcular_indice_creacion(jugador: Dict, acciones: List[Dict], minutos_totales: float) -> float:
+def calcular_indice_creacion(jugador: Dict, acciones: AccionesJugador, minutos_totales: float) -> float:
     """Calcula el índice de creación de juego"""
+    acumulado = acumular_acciones(acciones)
     goles_temp = jugador.get('goles_temp', 0)
-    asistencias = calcular_asistencias(acciones)
-    pases_clave = calcular_pases_clave(acciones)
+    asistencias = calcular_asistencias(acumulado)
+    pases_clave = calcular_pases_clave(acumulado)
     
     if minutos_totales == 0:
         return 0
@@ -260,21 +350,16 @@ def calcular_indice_creacion(jugador: Dict, acciones: List[Dict], minutos_totale
     
     return (goles_temp + asistencias + pases_clave) / partidos_90min
 
-def calcular_eficiencia_defensiva(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_eficiencia_defensiva(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la eficiencia defensiva"""
-    entradas = [a for a in acciones if a.get('tipo') == 'Entrada']
-    intercepciones = [a for a in acciones if a.get('tipo') == 'Intercepcion']
-    
-    exitos_entrada = len([e for e in entradas if e.get('exito')])
-    exitos_intercepcion = len([i for i in intercepciones if i.get('exito')])
-    
+    acumulado = acumular_acciones(acciones)
     faltas_temp = jugador.get('faltas_temp', 0)
     
-    return (exitos_entrada + exitos_intercepcion) - faltas_temp
+    return (acumulado.exitos('Entrada') + acumulado.exitos('Intercepcion')) - faltas_temp
 
-def calcular_mapa_calor(acciones: List[Dict]) -> Dict[str, float]:
+def calcular_mapa_calor(acciones: AccionesJugador) -> Dict[str, float]:
     """Calcula el mapa de calor (distribución por sectores)"""
-    conteo_sectores = Counter([a.get('sector', 'desconocido') for a in acciones])
+    conteo_sectores = acumular_acciones(acciones).sectores
     total = sum(conteo_sectores.values())
     
     if total == 0:
@@ -282,35 +367,21 @@ def calcular_mapa_calor(acciones: List[Dict]) -> Dict[str, float]:
     
     return {sector: (count / total) * 100 for sector, count in conteo_sectores.items()}
 
-def calcular_impacto_resultado(acciones: List[Dict]) -> float:
+def calcular_impacto_resultado(acciones: AccionesJugador) -> float:
     """Calcula el impacto en el resultado del partido"""
-    pesos_importancia = {
-        'critica': 2.0,
-        'alta': 1.5,
-        'media': 1.0,
-        'baja': 0.5
-    }
-    
-    impacto_total = 0
-    for accion in acciones:
-        importancia = accion.get('importancia', 'baja').lower()
-        peso = pesos_importancia.get(importancia, 0.5)
-        exito = 1 if accion.get('exito') else 0
-        impacto_total += peso * exito
-    
-    return impacto_total
+    return acumular_acciones(acciones).impacto
 
-def calcular_tendencia_forma(jugador: Dict, acciones: List[Dict]) -> float:
+def calcular_tendencia_forma(jugador: Dict, acciones: AccionesJugador) -> float:
     """Calcula la tendencia de forma"""
+    acumulado = acumular_acciones(acciones)
     forma_actual = jugador.get('forma_actual', 70)
     
     # Contar fallos recientes
-    if len(acciones) == 0:
+    if acumulado.total_acciones == 0:
         return 0
     
     # Últimas 10 acciones
-    acciones_recientes = acciones[-10:] if len(acciones) >= 10 else acciones
-    fallos = len([a for a in acciones_recientes if not a.get('exito')])
+    fallos = len([exito for exito in acumulado.exitos_recientes if not exito])
     
     # Calcular rendimiento promedio post-acciones
     rendimiento_post = forma_actual
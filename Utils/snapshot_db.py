@@ -0,0 +1,901 @@
+"""
+Base de datos de solo lectura sobre un volcado local (modo offline, `MONGODB_SNAPSHOT`).
+
+Cada colección se lee de `<directorio>/<coleccion>.bson` (salida de `mongodump`) o de
+`<coleccion>.json`/`.ndjson`/`.jsonl` (un documento Extended JSON por línea, salida de `mongoexport`).
+Los archivos se abren con mmap y solo se indexan las posiciones de los documentos; cada documento se
+decodifica al leerlo, de modo que la memoria no depende del tamaño del volcado.
+
+Implementa el subconjunto de la API de pymongo que usan los servicios (find/find_one con filtros,
+proyecciones y orden, count, aggregate con $match/$addFields/$project, y escrituras). Las escrituras, como las
+de las colecciones derivadas (`jugador_stats`, `partido_timeline`, ...), se guardan solo en memoria.
+"""
+import copy
+import heapq
+import mmap
+import os
+import struct
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import bson
+from bson import ObjectId, json_util
+from bson.raw_bson import RawBSONDocument
+from pymongo import InsertOne, ReplaceOne, ReturnDocument, UpdateMany, UpdateOne, DeleteMany, DeleteOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+EXTENSIONES = ('.bson', '.json', '.ndjson', '.jsonl')
+
+_FALTANTE = object()
+
+
+class ArchivoSnapshot:
+    """Documentos de un archivo .bson o NDJSON, indexados por posición y decodificados bajo demanda."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.es_bson = ruta.endswith('.bson')
+        self._archivo = open(ruta, 'rb')
+        tamano = os.fstat(self._archivo.fileno()).st_size
+        self._mapa = mmap.mmap(self._archivo.fileno(), 0, access=mmap.ACCESS_READ) if tamano else b''
+        self._inicios: Optional[array] = None
+        self._longitudes: Optional[array] = None
+        self._ids: Optional[Dict[Any, int]] = None
+        self._lock = threading.RLock()
+
+    def _indexar(self) -> None:
+        inicios, longitudes = array('q'), array('q')
+        mapa, posicion, fin = self._mapa, 0, len(self._mapa)
+        while posicion < fin:
+            if self.es_bson:
+                longitud = struct.unpack_from('<i', mapa, posicion)[0]
+                inicios.append(posicion)
+                longitudes.append(longitud)
+                posicion += longitud
+                continue
+            salto = mapa.find(b'\n', posicion)
+            salto = fin if salto < 0 else salto
+            if mapa[posicion:salto].strip():
+                inicios.append(posicion)
+                longitudes.append(salto - posicion)
+            posicion = salto + 1
+        self._inicios, self._longitudes = inicios, longitudes
+
+    def _posiciones(self) -> Tuple[array, array]:
+        if self._inicios is None:
+            with self._lock:
+                if self._inicios is None:
+                    self._indexar()
+        return self._inicios, self._longitudes
+
+    def __len__(self) -> int:
+        return len(self._posiciones()[0])
+
+    def documento(self, indice: int) -> Dict:
+        inicios, longitudes = self._posiciones()
+        datos = self._mapa[inicios[indice]:inicios[indice] + longitudes[indice]]
+        return bson.decode(datos) if self.es_bson else json_util.loads(datos)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for indice in range(len(self)):
+            yield self.documento(indice)
+
+    def indice_por_id(self, id) -> Optional[int]:
+        """Posición del documento con ese `_id` (el índice por `_id` se construye en la primera búsqueda)."""
+        if self._ids is None:
+            with self._lock:
+                if self._ids is None:
+                    inicios, longitudes = self._posiciones()
+                    ids = {}
+                    for indice in range(len(inicios)):
+                        if self.es_bson:
+                            raw = RawBSONDocument(self._mapa[inicios[indice]:inicios[indice] + longitudes[indice]])
+                            ids[_hashable(raw.get('_id'))] = indice
+                        else:
+                            ids[_hashable(self.documento(indice).get('_id'))] = indice
+                    self._ids = ids
+        return self._ids.get(_hashable(id))
+
+
+# -- Consultas ---------------------------------------------------------------------------------------------
+
+def _hashable(valor):
+    if isinstance(valor, dict):
+        return tuple((k, _hashable(v)) for k, v in valor.items())
+    if isinstance(valor, list):
+        return tuple(_hashable(v) for v in valor)
+    return valor
+
+
+def _orden_tipo(valor) -> int:
+    """Orden de tipos BSON al comparar valores de distinto tipo."""
+    if valor is None or valor is _FALTANTE:
+        return 1
+    if isinstance(valor, bool):
+        return 8
+    if isinstance(valor, (int, float)):
+        return 2
+    if isinstance(valor, str):
+        return 3
+    if isinstance(valor, dict):
+        return 4
+    if isinstance(valor, list):
+        return 5
+    if isinstance(valor, ObjectId):
+        return 7
+    if isinstance(valor, datetime):
+        return 9
+    return 10
+
+
+def _clave_orden(valor):
+    tipo = _orden_tipo(valor)
+    if tipo in (2, 3, 7, 8, 9):
+        return (tipo, valor)
+    if tipo == 1:
+        return (tipo, 0)
+    return (tipo, str(valor))
+
+
+def _valores(documento, ruta: str) -> List:
+    """Valores de una ruta con puntos, atravesando arreglos como MongoDB. Vacío si la ruta no existe."""
+    actuales = [documento]
+    for parte in ruta.split('.'):
+        siguientes = []
+        for actual in actuales:
+            if isinstance(actual, dict):
+                if parte in actual:
+                    siguientes.append(actual[parte])
+            elif isinstance(actual, list):
+                if parte.isdigit() and int(parte) < len(actual):
+                    siguientes.append(actual[int(parte)])
+                for elemento in actual:
+                    if isinstance(elemento, dict) and parte in elemento:
+                        siguientes.append(elemento[parte])
+        actuales = siguientes
+    return actuales
+
+
+def _candidatos(valores: List) -> List:
+    """Cada valor y, si es un arreglo, también sus elementos."""
+    candidatos = []
+    for valor in valores:
+        candidatos.append(valor)
+        if isinstance(valor, list):
+            candidatos.extend(valor)
+    return candidatos
+
+
+def _comparar(a, b, operador: str) -> bool:
+    if _orden_tipo(a) != _orden_tipo(b):
+        return False
+    try:
+        return {'$gt': a > b, '$gte': a >= b, '$lt': a < b, '$lte': a <= b}[operador]
+    except TypeError:
+        return False
+
+
+def _igual(valores: List, esperado) -> bool:
+    if esperado is None and not valores:
+        return True
+    return any(candidato == esperado for candidato in _candidatos(valores))
+
+
+class _ConjuntoIn:
+    """Argumento de un $in de valores escalares, como conjunto para no comparar uno por uno en cada documento."""
+
+    def __init__(self, valores: List):
+        self.valores = frozenset(valores)
+
+    def contiene(self, valores: List) -> bool:
+        return any(
+            candidato in self.valores
+            for candidato in _candidatos(valores) if not isinstance(candidato, (dict, list))
+        )
+
+
+def _escalar(valor) -> bool:
+    return valor is not None and not isinstance(valor, (dict, list)) and not hasattr(valor, 'pattern')
+
+
+def _preparar_filtro(filtro):
+    """Convierte una vez por consulta los $in de valores escalares en conjuntos."""
+    if isinstance(filtro, list):
+        return [_preparar_filtro(f) for f in filtro]
+    if not isinstance(filtro, dict):
+        return filtro
+    preparado = {}
+    for clave, valor in filtro.items():
+        if clave == '$in' and isinstance(valor, (list, tuple)) and all(_escalar(v) for v in valor):
+            preparado[clave] = _ConjuntoIn(valor)
+        else:
+            preparado[clave] = _preparar_filtro(valor)
+    return preparado
+
+
+def _cumple_operadores(valores: List, condicion: Dict) -> bool:
+    for operador, argumento in condicion.items():
+        if operador == '$eq':
+            ok = _igual(valores, argumento)
+        elif operador == '$ne':
+            ok = not _igual(valores, argumento)
+        elif operador == '$in' and isinstance(argumento, _ConjuntoIn):
+            ok = argumento.contiene(valores)
+        elif operador == '$in':
+            ok = any(_igual(valores, v) for v in argumento)
+        elif operador == '$nin':
+            ok = not any(_igual(valores, v) for v in argumento)
+        elif operador in ('$gt', '$gte', '$lt', '$lte'):
+            ok = any(_comparar(c, argumento, operador) for c in _candidatos(valores))
+        elif operador == '$exists':
+            ok = bool(valores) == bool(argumento)
+        elif operador == '$size':
+            ok = any(isinstance(v, list) and len(v) == argumento for v in valores)
+        elif operador == '$elemMatch':
+            ok = any(
+                isinstance(v, list) and any(
+                    coincide(e, argumento) if isinstance(e, dict) else _cumple_operadores([e], argumento)
+                    for e in v)
+                for v in valores
+            )
+        elif operador == '$not':
+            ok = not _cumple_operadores(valores, argumento)
+        else:
+            raise NotImplementedError(f"Operador no soportado en modo snapshot: {operador}")
+        if not ok:
+            return False
+    return True
+
+
+def coincide(documento: Dict, filtro: Optional[Dict]) -> bool:
+    """Evalúa un filtro de consulta de MongoDB sobre un documento."""
+    for clave, condicion in (filtro or {}).items():
+        if clave == '$and':
+            ok = all(coincide(documento, f) for f in condicion)
+        elif clave == '$or':
+            ok = any(coincide(documento, f) for f in condicion)
+        elif clave == '$nor':
+            ok = not any(coincide(documento, f) for f in condicion)
+        elif isinstance(condicion, dict) and condicion and all(k.startswith('$') for k in condicion):
+            ok = _cumple_operadores(_valores(documento, clave), condicion)
+        else:
+            ok = _igual(_valores(documento, clave), condicion)
+        if not ok:
+            return False
+    return True
+
+
+def _arbol(rutas) -> Dict:
+    arbol = {}
+    for ruta in rutas:
+        nodo = arbol
+        partes = ruta.split('.')
+        for parte in partes[:-1]:
+            nodo = nodo.setdefault(parte, {})
+            if nodo is True:
+                break
+        else:
+            nodo[partes[-1]] = True
+    return arbol
+
+
+def _incluir(valor, arbol: Dict):
+    if isinstance(valor, list):
+        return [_incluir(e, arbol) for e in valor if isinstance(e, (dict, list))]
+    return {
+        clave: valor[clave] if sub is True else _incluir(valor[clave], sub)
+        for clave, sub in arbol.items()
+        if clave in valor and (sub is True or isinstance(valor[clave], (dict, list)))
+    }
+
+
+def _excluir(valor, arbol: Dict):
+    if isinstance(valor, list):
+        return [_excluir(e, arbol) if isinstance(e, (dict, list)) else e for e in valor]
+    if not isinstance(valor, dict):
+        return valor
+    return {
+        clave: v if clave not in arbol else _excluir(v, arbol[clave])
+        for clave, v in valor.items()
+        if arbol.get(clave) is not True
+    }
+
+
+def proyectar(documento: Dict, proyeccion) -> Dict:
+    """Aplica una proyección de inclusión o de exclusión (con rutas con puntos)."""
+    if not proyeccion:
+        return documento
+    if isinstance(proyeccion, (list, tuple)):
+        proyeccion = {campo: 1 for campo in proyeccion}
+    incluir_id = bool(proyeccion.get('_id', 1))
+    campos = {k: v for k, v in proyeccion.items() if k != '_id'}
+    if any(campos.values()) or (not campos and incluir_id):
+        resultado = _incluir(documento, _arbol(k for k, v in campos.items() if v))
+        if incluir_id and '_id' in documento:
+            resultado = {'_id': documento['_id'], **resultado}
+        return resultado
+    excluidos = [k for k in campos] + ([] if incluir_id else ['_id'])
+    return _excluir(documento, _arbol(excluidos))
+
+
+def _normalizar_orden(clave, direccion=None) -> List[Tuple[str, int]]:
+    if isinstance(clave, str):
+        return [(clave, direccion or 1)]
+    return list(clave)
+
+
+def _clave_documento(documento: Dict, orden: List[Tuple[str, int]]):
+    clave = []
+    for campo, direccion in orden:
+        valores = _valores(documento, campo)
+        valor = _clave_orden(valores[0] if valores else None)
+        clave.append(valor if direccion >= 0 else _Invertido(valor))
+    return tuple(clave)
+
+
+class _Invertido:
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __lt__(self, otro):
+        return otro.valor < self.valor
+
+    def __eq__(self, otro):
+        return self.valor == otro.valor
+
+
+# -- Expresiones de agregación -----------------------------------------------------------------------------
+
+def _ruta_expresion(base, ruta: str):
+    actual = base
+    for parte in ruta.split('.') if ruta else []:
+        if isinstance(actual, dict):
+            actual = actual.get(parte)
+        elif isinstance(actual, list):
+            actual = [e.get(parte) for e in actual if isinstance(e, dict) and parte in e]
+        else:
+            return None
+    return actual
+
+
+def evaluar(expresion, documento: Dict, variables: Optional[Dict] = None):
+    """Evalúa una expresión de agregación ($size, $filter, comparaciones, rutas `$campo` y `$$variable`)."""
+    variables = variables or {}
+    if isinstance(expresion, str) and expresion.startswith('$$'):
+        nombre, _, ruta = expresion[2:].partition('.')
+        base = documento if nombre in ('ROOT', 'CURRENT') else variables.get(nombre)
+        return _ruta_expresion(base, ruta)
+    if isinstance(expresion, str) and expresion.startswith('$'):
+        return _ruta_expresion(documento, expresion[1:])
+    if isinstance(expresion, list):
+        return [evaluar(e, documento, variables) for e in expresion]
+    if not isinstance(expresion, dict):
+        return expresion
+
+    if len(expresion) == 1:
+        operador, argumento = next(iter(expresion.items()))
+        if operador == '$literal':
+            return argumento
+        if operador == '$size':
+            valor = evaluar(argumento, documento, variables)
+            return len(valor) if isinstance(valor, list) else 0
+        if operador == '$filter':
+            entrada = evaluar(argumento['input'], documento, variables) or []
+            nombre = argumento.get('as', 'this')
+            return [e for e in entrada if evaluar(argumento['cond'], documento, dict(variables, **{nombre: e}))]
+        if operador in ('$eq', '$ne', '$gt', '$gte', '$lt', '$lte'):
+            a, b = (evaluar(e, documento, variables) for e in argumento)
+            if operador == '$eq':
+                return a == b
+            if operador == '$ne':
+                return a != b
+            return _comparar(a, b, operador)
+        if operador == '$and':
+            return all(evaluar(e, documento, variables) for e in argumento)
+        if operador == '$or':
+            return any(evaluar(e, documento, variables) for e in argumento)
+        if operador == '$not':
+            return not evaluar(argumento[0] if isinstance(argumento, list) else argumento, documento, variables)
+        if operador.startswith('$'):
+            raise NotImplementedError(f"Expresión no soportada en modo snapshot: {operador}")
+    return {clave: evaluar(valor, documento, variables) for clave, valor in expresion.items()}
+
+
+# -- Actualizaciones ---------------------------------------------------------------------------------------
+
+def _asignar(documento: Dict, ruta: str, valor) -> None:
+    partes = ruta.split('.')
+    for parte in partes[:-1]:
+        documento = documento.setdefault(parte, {})
+    documento[partes[-1]] = valor
+
+
+def _leer(documento: Dict, ruta: str):
+    for parte in ruta.split('.'):
+        if not isinstance(documento, dict) or parte not in documento:
+            return _FALTANTE
+        documento = documento[parte]
+    return documento
+
+
+def aplicar_actualizacion(documento: Dict, actualizacion: Dict, insercion: bool = False) -> None:
+    """Aplica los operadores de actualización ($set, $inc, $max, $min, $push, $addToSet, $unset, ...)."""
+    for operador, campos in actualizacion.items():
+        if operador == '$setOnInsert' and not insercion:
+            continue
+        for ruta, valor in campos.items():
+            actual = _leer(documento, ruta)
+            if operador in ('$set', '$setOnInsert'):
+                _asignar(documento, ruta, copy.deepcopy(valor))
+            elif operador == '$unset':
+                partes = ruta.rsplit('.', 1)
+                padre = documento if len(partes) == 1 else _leer(documento, partes[0])
+                if isinstance(padre, dict):
+                    padre.pop(partes[-1], None)
+            elif operador == '$inc':
+                _asignar(documento, ruta, (0 if actual is _FALTANTE else actual) + valor)
+            elif operador in ('$max', '$min'):
+                if actual is _FALTANTE or (_comparar(valor, actual, '$gt') if operador == '$max'
+                                           else _comparar(valor, actual, '$lt')):
+                    _asignar(documento, ruta, valor)
+            elif operador in ('$push', '$addToSet'):
+                lista = [] if actual is _FALTANTE else list(actual)
+                nuevos = valor['$each'] if isinstance(valor, dict) and '$each' in valor else [valor]
+                for nuevo in copy.deepcopy(nuevos):
+                    if operador == '$push' or nuevo not in lista:
+                        lista.append(nuevo)
+                if isinstance(valor, dict) and '$slice' in valor:
+                    corte = valor['$slice']
+                    lista = lista[corte:] if corte < 0 else lista[:corte]
+                _asignar(documento, ruta, lista)
+            else:
+                raise NotImplementedError(f"Operador de actualización no soportado en modo snapshot: {operador}")
+
+
+def _documento_upsert(filtro: Dict) -> Dict:
+    """Campos de igualdad del filtro que se copian al documento insertado por un upsert."""
+    documento = {}
+    for clave, condicion in (filtro or {}).items():
+        if clave.startswith('$'):
+            continue
+        if isinstance(condicion, dict) and any(k.startswith('$') for k in condicion):
+            if '$eq' in condicion:
+                _asignar(documento, clave, condicion['$eq'])
+            continue
+        _asignar(documento, clave, copy.deepcopy(condicion))
+    return documento
+
+
+class Resultado:
+    """Resultado de una escritura con los atributos de los resultados de pymongo."""
+
+    def __init__(self, **valores):
+        self.acknowledged = True
+        self.inserted_id = None
+        self.matched_count = 0
+        self.modified_count = 0
+        self.upserted_id = None
+        self.deleted_count = 0
+        self.inserted_count = 0
+        self.upserted_count = 0
+        self.__dict__.update(valores)
+
+
+# -- Colecciones -------------------------------------------------------------------------------------------
+
+class CursorSnapshot:
+    """Cursor perezoso con sort, skip y limit."""
+
+    def __init__(self, coleccion: 'ColeccionSnapshot', filtro, proyeccion):
+        self._coleccion = coleccion
+        self._filtro = filtro or {}
+        self._proyeccion = proyeccion
+        self._orden: List[Tuple[str, int]] = []
+        self._saltar = 0
+        self._limite = 0
+
+    def sort(self, clave, direccion=None) -> 'CursorSnapshot':
+        self._orden = _normalizar_orden(clave, direccion)
+        return self
+
+    def skip(self, n: int) -> 'CursorSnapshot':
+        self._saltar = n
+        return self
+
+    def limit(self, n: int) -> 'CursorSnapshot':
+        self._limite = n
+        return self
+
+    def batch_size(self, n: int) -> 'CursorSnapshot':
+        return self
+
+    def __iter__(self) -> Iterator[Dict]:
+        documentos = self._coleccion._buscar(self._filtro)
+        if self._orden:
+            clave = lambda d: _clave_documento(d, self._orden)
+            if self._limite:
+                # Solo se conservan en memoria los primeros skip + limit
+                documentos = iter(heapq.nsmallest(self._saltar + self._limite, documentos, key=clave))
+            else:
+                documentos = iter(sorted(documentos, key=clave))
+        for n, documento in enumerate(documentos):
+            if n < self._saltar:
+                continue
+            if self._limite and n >= self._saltar + self._limite:
+                break
+            yield proyectar(documento, self._proyeccion)
+
+    def __next__(self):
+        if not hasattr(self, '_iterador'):
+            self._iterador = iter(self)
+        return next(self._iterador)
+
+    def close(self) -> None:
+        pass
+
+
+class ColeccionSnapshot:
+    """
+    Colección cuyos documentos base vienen de un archivo del volcado (opcional) y cuyas escrituras
+    se guardan en memoria por encima de ellos.
+    """
+
+    def __init__(self, nombre: str, archivo: Optional[ArchivoSnapshot] = None,
+                 base_datos: Optional['BaseDatosSnapshot'] = None):
+        self.name = nombre
+        self.database = base_datos
+        self._archivo = archivo
+        self._escritos: Dict[Any, Dict] = {}
+        # `_id` de los documentos del archivo reemplazados (por una escritura) o eliminados
+        self._ocultos = set()
+        self._unicos: Dict[Tuple[str, ...], Dict[Tuple, Any]] = {}
+        self._indices: Dict[str, Dict] = {'_id_': {'key': [('_id', 1)]}}
+        self._lock = threading.RLock()
+
+    # Lectura
+
+    def _base(self) -> Iterator[Dict]:
+        if self._archivo is None:
+            return
+        for documento in self._archivo:
+            clave = _hashable(documento.get('_id'))
+            if clave in self._ocultos:
+                continue
+            yield documento
+
+    def _todos(self) -> Iterator[Dict]:
+        yield from self._base()
+        with self._lock:
+            escritos = [copy.deepcopy(d) for d in self._escritos.values()]
+        yield from escritos
+
+    def _por_id(self, id) -> Optional[Dict]:
+        clave = _hashable(id)
+        with self._lock:
+            if clave in self._escritos:
+                return copy.deepcopy(self._escritos[clave])
+            if clave in self._ocultos:
+                return None
+        if self._archivo is None:
+            return None
+        indice = self._archivo.indice_por_id(id)
+        return None if indice is None else self._archivo.documento(indice)
+
+    def _buscar(self, filtro: Dict) -> Iterator[Dict]:
+        filtro = filtro or {}
+        id_filtro = filtro.get('_id', _FALTANTE)
+        # Búsqueda directa por _id (igualdad o $in) sin recorrer la colección
+        if id_filtro is not _FALTANTE and not (isinstance(id_filtro, dict) and set(id_filtro) - {'$in', '$eq'}):
+            if isinstance(id_filtro, dict):
+                ids = id_filtro.get('$in', [id_filtro['$eq']] if '$eq' in id_filtro else [])
+            else:
+                ids = [id_filtro]
+            for id in ids:
+                documento = self._por_id(id)
+                if documento is not None and coincide(documento, filtro):
+                    yield documento
+            return
+        filtro = _preparar_filtro(filtro)
+        for documento in self._todos():
+            if coincide(documento, filtro):
+                yield documento
+
+    def find(self, filter=None, projection=None, *args, sort=None, limit=0, skip=0, **kwargs) -> CursorSnapshot:
+        cursor = CursorSnapshot(self, filter, projection)
+        if sort:
+            cursor.sort(sort)
+        return cursor.skip(skip).limit(limit)
+
+    def find_one(self, filter=None, projection=None, *args, sort=None, **kwargs) -> Optional[Dict]:
+        if filter is not None and not isinstance(filter, dict):
+            filter = {'_id': filter}
+        for documento in self.find(filter, projection, sort=sort, limit=1):
+            return documento
+        return None
+
+    def count_documents(self, filter, **kwargs) -> int:
+        return sum(1 for _ in self._buscar(filter))
+
+    def estimated_document_count(self, **kwargs) -> int:
+        with self._lock:
+            escritos, ocultos = len(self._escritos), len(self._ocultos)
+        return (len(self._archivo) if self._archivo is not None else 0) - ocultos + escritos
+
+    def distinct(self, key: str, filter=None, **kwargs) -> List:
+        vistos, resultado = set(), []
+        for documento in self._buscar(filter):
+            for valor in _candidatos(_valores(documento, key)):
+                if _hashable(valor) not in vistos:
+                    vistos.add(_hashable(valor))
+                    resultado.append(valor)
+        return resultado
+
+    def aggregate(self, pipeline: List[Dict], **kwargs) -> Iterator[Dict]:
+        documentos: Iterator[Dict] = iter(())
+        etapas = list(pipeline)
+        if etapas and '$match' in etapas[0]:
+            documentos = self._buscar(etapas.pop(0)['$match'])
+        else:
+            documentos = self._todos()
+        for etapa in etapas:
+            documentos = self._etapa(documentos, etapa)
+        return iter(list(documentos))
+
+    @staticmethod
+    def _etapa(documentos: Iterator[Dict], etapa: Dict) -> Iterator[Dict]:
+        nombre, argumento = next(iter(etapa.items()))
+        if nombre == '$match':
+            return (d for d in documentos if coincide(d, argumento))
+        if nombre in ('$addFields', '$set'):
+            return (dict(d, **{k: evaluar(v, d) for k, v in argumento.items()}) for d in documentos)
+        if nombre == '$project':
+            if all(isinstance(v, (int, bool)) for v in argumento.values()):
+                return (proyectar(d, argumento) for d in documentos)
+            return (
+                {**({'_id': d.get('_id')} if argumento.get('_id', 1) else {}),
+                 **{k: (_leer(d, k) if v in (1, True) else evaluar(v, d)) for k, v in argumento.items()
+                    if k != '_id'}}
+                for d in documentos
+            )
+        if nombre == '$sort':
+            orden = list(argumento.items())
+            return iter(sorted(documentos, key=lambda d: _clave_documento(d, orden)))
+        if nombre == '$limit':
+            return (d for n, d in enumerate(documentos) if n < argumento)
+        if nombre == '$skip':
+            return (d for n, d in enumerate(documentos) if n >= argumento)
+        if nombre == '$count':
+            return iter([{argumento: sum(1 for _ in documentos)}])
+        raise NotImplementedError(f"Etapa de agregación no soportada en modo snapshot: {nombre}")
+
+    # Escritura
+
+    def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        orden = _normalizar_orden(keys, 1)
+        campos = tuple(campo for campo, _ in orden)
+        nombre = kwargs.get('name') or '_'.join(f"{campo}_{direccion}" for campo, direccion in orden)
+        if unique:
+            with self._lock:
+                if campos not in self._unicos:
+                    self._unicos[campos] = {
+                        self._valores_unicos(d, campos): d.get('_id') for d in self._todos()
+                    }
+        # Solo los únicos tienen efecto; el resto se registra para index_information
+        self._indices[nombre] = dict({'key': orden}, **({'unique': True} if unique else {}))
+        return nombre
+
+    def create_indexes(self, indexes, **kwargs) -> List[str]:
+        return [self.create_index(list(i.document['key'].items()), unique=i.document.get('unique', False),
+                                  name=i.document.get('name'))
+                for i in indexes]
+
+    def index_information(self) -> Dict[str, Dict]:
+        return copy.deepcopy(self._indices)
+
+    def drop_index(self, nombre: str, **kwargs) -> None:
+        with self._lock:
+            informacion = self._indices.pop(nombre, None)
+            if informacion and informacion.get('unique'):
+                self._unicos.pop(tuple(campo for campo, _ in informacion['key']), None)
+
+    @staticmethod
+    def _valores_unicos(documento: Dict, campos: Tuple[str, ...]) -> Tuple:
+        return tuple(_hashable(None if _leer(documento, c) is _FALTANTE else _leer(documento, c)) for c in campos)
+
+    def _guardar(self, documento: Dict, anterior: Optional[Dict] = None) -> None:
+        """Guarda un documento en memoria comprobando `_id` e índices únicos (llamar con el lock tomado)."""
+        id_clave = _hashable(documento['_id'])
+        for campos, valores in self._unicos.items():
+            existente = valores.get(self._valores_unicos(documento, campos), _FALTANTE)
+            if existente is not _FALTANTE and _hashable(existente) != id_clave:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {campos}")
+        for campos, valores in self._unicos.items():
+            if anterior is not None:
+                valores.pop(self._valores_unicos(anterior, campos), None)
+            valores[self._valores_unicos(documento, campos)] = documento['_id']
+        self._escritos[id_clave] = documento
+        self._ocultar(documento['_id'])
+
+    def _ocultar(self, id) -> None:
+        if self._archivo is not None and self._archivo.indice_por_id(id) is not None:
+            self._ocultos.add(_hashable(id))
+
+    def insert_one(self, document: Dict, **kwargs) -> Resultado:
+        with self._lock:
+            document.setdefault('_id', ObjectId())
+            if self._por_id(document['_id']) is not None:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+            self._guardar(copy.deepcopy(document))
+        return Resultado(inserted_id=document['_id'])
+
+    def insert_many(self, documents, ordered: bool = True, **kwargs) -> Resultado:
+        ids = [self.insert_one(d).inserted_id for d in documents]
+        return Resultado(inserted_ids=ids, inserted_count=len(ids))
+
+    def _primero(self, filtro: Dict) -> Optional[Dict]:
+        # Con un índice único cuyas claves estén todas en el filtro se evita recorrer la colección
+        for campos, valores in self._unicos.items():
+            if all(c in filtro and not isinstance(filtro[c], dict) for c in campos):
+                id = valores.get(tuple(_hashable(filtro[c]) for c in campos), _FALTANTE)
+                if id is _FALTANTE:
+                    return None
+                documento = self._por_id(id)
+                return documento if documento is not None and coincide(documento, filtro) else None
+        return next(self._buscar(filtro), None)
+
+    def _actualizar(self, filtro, actualizacion, upsert: bool, reemplazo: bool, varios: bool = False) -> Resultado:
+        with self._lock:
+            documentos = list(self._buscar(filtro)) if varios else [d for d in [self._primero(filtro)] if d]
+            for documento in documentos:
+                anterior = copy.deepcopy(documento)
+                if reemplazo:
+                    documento = dict(actualizacion, _id=anterior['_id'])
+                else:
+                    aplicar_actualizacion(documento, actualizacion)
+                self._guardar(documento, anterior)
+            if documentos:
+                return Resultado(matched_count=len(documentos), modified_count=len(documentos))
+            if not upsert:
+                return Resultado()
+
+            nuevo = _documento_upsert(filtro)
+            if reemplazo:
+                nuevo = dict(actualizacion, **({'_id': nuevo['_id']} if '_id' in nuevo else {}))
+            else:
+                aplicar_actualizacion(nuevo, actualizacion, insercion=True)
+            nuevo.setdefault('_id', ObjectId())
+            self._guardar(nuevo)
+            return Resultado(upserted_id=nuevo['_id'], upserted_count=1)
+
+    def update_one(self, filter, update, upsert: bool = False, **kwargs) -> Resultado:
+        return self._actualizar(filter, update, upsert, reemplazo=False)
+
+    def update_many(self, filter, update, upsert: bool = False, **kwargs) -> Resultado:
+        return self._actualizar(filter, update, upsert, reemplazo=False, varios=True)
+
+    def replace_one(self, filter, replacement, upsert: bool = False, **kwargs) -> Resultado:
+        return self._actualizar(filter, replacement, upsert, reemplazo=True)
+
+    def find_one_and_update(self, filter, update, projection=None, upsert: bool = False,
+                            return_document=ReturnDocument.BEFORE, **kwargs) -> Optional[Dict]:
+        with self._lock:
+            anterior = self._primero(filter)
+            resultado = self._actualizar(filter, update, upsert, reemplazo=False)
+            if return_document == ReturnDocument.BEFORE:
+                return None if anterior is None else proyectar(anterior, projection)
+            id = anterior['_id'] if anterior is not None else resultado.upserted_id
+            documento = self._por_id(id)
+            return None if documento is None else proyectar(documento, projection)
+
+    def _borrar(self, filtro, varios: bool) -> Resultado:
+        with self._lock:
+            documentos = list(self._buscar(filtro)) if varios else [d for d in [self._primero(filtro)] if d]
+            for documento in documentos:
+                self._escritos.pop(_hashable(documento['_id']), None)
+                self._ocultar(documento['_id'])
+                for campos, valores in self._unicos.items():
+                    valores.pop(self._valores_unicos(documento, campos), None)
+            return Resultado(deleted_count=len(documentos))
+
+    def delete_one(self, filter, **kwargs) -> Resultado:
+        return self._borrar(filter, varios=False)
+
+    def delete_many(self, filter, **kwargs) -> Resultado:
+        return self._borrar(filter, varios=True)
+
+    def bulk_write(self, requests, ordered: bool = True, **kwargs) -> Resultado:
+        total = Resultado(upserted_ids={})
+        errores = []
+        for indice, operacion in enumerate(requests):
+            try:
+                if isinstance(operacion, InsertOne):
+                    self.insert_one(operacion._doc)
+                    total.inserted_count += 1
+                    continue
+                if isinstance(operacion, (DeleteOne, DeleteMany)):
+                    total.deleted_count += self._borrar(operacion._filter, isinstance(operacion, DeleteMany)).deleted_count
+                    continue
+                if not isinstance(operacion, (UpdateOne, UpdateMany, ReplaceOne)):
+                    raise NotImplementedError(f"Operación no soportada en modo snapshot: {type(operacion).__name__}")
+                resultado = self._actualizar(
+                    operacion._filter, operacion._doc, bool(operacion._upsert),
+                    reemplazo=isinstance(operacion, ReplaceOne), varios=isinstance(operacion, UpdateMany)
+                )
+            except DuplicateKeyError as e:
+                errores.append({'index': indice, 'code': 11000, 'errmsg': str(e)})
+                if ordered:
+                    break
+                continue
+            total.matched_count += resultado.matched_count
+            total.modified_count += resultado.modified_count
+            if resultado.upserted_id is not None:
+                total.upserted_ids[indice] = resultado.upserted_id
+                total.upserted_count += 1
+        if errores:
+            # Mismo formato de detalles que el BulkWriteError de pymongo
+            raise BulkWriteError({
+                'writeErrors': errores, 'nInserted': total.inserted_count, 'nUpserted': total.upserted_count,
+                'nMatched': total.matched_count, 'nModified': total.modified_count, 'nRemoved': total.deleted_count,
+                'upserted': [{'index': i, '_id': id} for i, id in total.upserted_ids.items()]
+            })
+        return total
+
+    def drop(self) -> None:
+        with self._lock:
+            self._archivo = None
+            self._escritos.clear()
+            self._ocultos.clear()
+            self._unicos.clear()
+
+    def rename(self, new_name: str, dropTarget: bool = False, **kwargs) -> None:
+        self.database._renombrar(self, new_name, dropTarget)
+
+
+class BaseDatosSnapshot:
+    """Base de datos con una colección por archivo del directorio del volcado."""
+
+    def __init__(self, directorio: str):
+        if not os.path.isdir(directorio):
+            raise FileNotFoundError(f"No existe el directorio del snapshot: {directorio}")
+        self.directorio = directorio
+        self.name = os.path.basename(os.path.normpath(directorio))
+        self._archivos = {}
+        for nombre_archivo in sorted(os.listdir(directorio)):
+            nombre, extension = os.path.splitext(nombre_archivo)
+            if extension in EXTENSIONES and nombre not in self._archivos:
+                self._archivos[nombre] = os.path.join(directorio, nombre_archivo)
+        self._colecciones: Dict[str, ColeccionSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, nombre: str) -> ColeccionSnapshot:
+        with self._lock:
+            if nombre not in self._colecciones:
+                ruta = self._archivos.get(nombre)
+                self._colecciones[nombre] = ColeccionSnapshot(nombre, ArchivoSnapshot(ruta) if ruta else None, self)
+            return self._colecciones[nombre]
+
+    def _renombrar(self, coleccion: ColeccionSnapshot, nombre: str, reemplazar: bool) -> None:
+        """Cambia el nombre de una colección; el archivo del volcado del nombre destino deja de usarse."""
+        with self._lock:
+            if not reemplazar and (nombre in self._colecciones or nombre in self._archivos):
+                raise OperationFailure(f"target namespace exists: {nombre}")
+            self._colecciones.pop(coleccion.name, None)
+            self._archivos.pop(coleccion.name, None)
+            self._archivos.pop(nombre, None)
+            coleccion.name = nombre
+            self._colecciones[nombre] = coleccion
+
+    def __getattr__(self, nombre: str) -> ColeccionSnapshot:
+        if nombre.startswith('_'):
+            raise AttributeError(nombre)
+        return self[nombre]
+
+    def get_collection(self, nombre: str, **kwargs) -> ColeccionSnapshot:
+        return self[nombre]
+
+    def list_collection_names(self, **kwargs) -> List[str]:
+        return sorted(set(self._archivos) | set(self._colecciones))
@@ -1,11 +1,24 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Header, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from Routes.test_route import route as test_route
 from Routes.estadistica_route import route as estadistica_route
 from Config.settings import SECRET_KEY
+from Services import desnormalizacion_service
+from Services import indice_service
+import logging
 import os
 
-app = FastAPI(title="Futbol API")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Advierte (o crea, según INDICES_AL_INICIO) los índices de Config/indices.py que falten
+    indice_service.verificar_al_inicio(logging.getLogger(__name__))
+    # Copia los datos del juego en el historial que no los tenga o esté desfasado, y lo reconcilia periódicamente
+    desnormalizacion_service.verificar_al_inicio(logging.getLogger(__name__))
+    yield
+
+app = FastAPI(title="Futbol API", lifespan=lifespan)
 
 # Configuración de CORS
 app.add_middleware(
@@ -0,0 +1,277 @@
+"""
+Compara las funciones calcular_* de `Utils/estadistica_util.py` alimentadas con un AcumuladorJugador
+(una sola pasada, también reconstruido desde `jugador_stats`) contra los cálculos originales que recorren
+la lista de acciones, sobre los datos sintéticos de los benchmarks.
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+import math
+from collections import Counter, defaultdict
+
+import pytest
+
+from Benchmarks.datos_sinteticos import generar_torneo
+from Utils import estadistica_util
+from Utils.estadistica_util import AcumuladorJugador
+
+
+# ========== CÁLCULOS DE REFERENCIA SOBRE LA LISTA DE ACCIONES ==========
+
+def _segundos(accion):
+    return accion.get('minuto', 0) * 60 + accion.get('segundo', 0)
+
+
+def _secuencias(acciones, tipo_siguiente):
+    """Pases exitosos seguidos de `tipo_siguiente` en <=30 segundos"""
+    return sum(
+        1 for actual, siguiente in zip(acciones, acciones[1:])
+        if actual.get('tipo') == 'Pase' and actual.get('exito') and siguiente.get('tipo') == tipo_siguiente
+        and abs(_segundos(siguiente) - _segundos(actual)) <= 30
+    )
+
+
+def _de_tipo(acciones, *tipos):
+    return [a for a in acciones if a.get('tipo') in tipos]
+
+
+def _exitosas(acciones):
+    return len([a for a in acciones if a.get('exito')])
+
+
+def ref_asistencias(acciones):
+    return _secuencias(acciones, 'Gol')
+
+
+def ref_pases_clave(acciones):
+    return _secuencias(acciones, 'Tiro')
+
+
+def ref_exito_pases(jugador, acciones):
+    base = (jugador.get('precision_pase', 70) + jugador.get('vision_juego', 70)) / 200 * 100
+    pases = _de_tipo(acciones, 'Pase')
+    return base * (_exitosas(pases) / len(pases)) if pases else base
+
+
+def ref_precision_tiros(jugador, acciones):
+    precision_tiro = jugador.get('precision_tiro', 70)
+    tiros = _de_tipo(acciones, 'Tiro')
+    if not tiros:
+        return precision_tiro
+    efectivos = max(_exitosas(tiros) - len(_de_tipo(acciones, 'Atajada')), 0)
+    probabilidad = (precision_tiro / 100 * 100) * (efectivos / len(tiros))
+    if any('area_chica' in t.get('sector', '').lower() for t in tiros):
+        probabilidad += 10
+    return min(probabilidad, 100)
+
+
+def ref_exito_regates(jugador, acciones):
+    regate = jugador.get('regate', 70)
+    regates = _de_tipo(acciones, 'Regate')
+    if not regates:
+        return regate
+    probabilidad = (regate / 100 * 100) * (_exitosas(regates) / len(regates))
+    if any('medio_central' in r.get('sector', '').lower() for r in regates):
+        probabilidad += 5
+    return min(probabilidad, 100)
+
+
+def ref_recuperaciones(jugador, acciones):
+    base = (jugador.get('anticipacion', 70) + jugador.get('agresividad', 50)) / 200 * 100
+    defensivas = _de_tipo(acciones, 'Entrada', 'Intercepcion')
+    return base * (_exitosas(defensivas) / len(defensivas)) if defensivas else base
+
+
+def ref_fatiga(jugador, acciones):
+    minutos = max(a.get('minuto', 0) for a in acciones) if acciones else 0
+    fatiga = 100 - (jugador.get('resistencia', 70) / 100 * 100 * math.exp(-minutos / 90))
+    return max(0, min(fatiga, 100))
+
+
+def ref_faltas(jugador, acciones):
+    agresividad = jugador.get('agresividad', 50)
+    fisicas = _de_tipo(acciones, 'Entrada', 'Falta', 'Intercepcion')
+    if not fisicas:
+        return agresividad / 2
+    return (agresividad / 100 * 100) * (len(_de_tipo(acciones, 'Falta')) / len(fisicas))
+
+
+def ref_contribucion_gol(jugador, acciones, partidos_jugados):
+    partidos_jugados = partidos_jugados or 1
+    return ((jugador.get('vision_juego', 70) + jugador.get('fuerza_disparo', 70)) / 200 * 100) * \
+        ((jugador.get('goles_temp', 0) + ref_asistencias(acciones)) / partidos_jugados)
+
+
+def ref_tasa_posesion(acciones, total_acciones_equipo):
+    if total_acciones_equipo == 0:
+        return 0
+    return (_exitosas(_de_tipo(acciones, 'Pase', 'Regate')) / total_acciones_equipo) * 100
+
+
+def ref_precision_bajo_presion(acciones):
+    sectores = defaultdict(lambda: {'total': 0, 'exitos': 0})
+    for accion in _de_tipo(acciones, 'Pase', 'Tiro', 'Regate'):
+        datos = sectores[accion.get('sector', 'desconocido')]
+        datos['total'] += 1
+        datos['exitos'] += 1 if accion.get('exito') else 0
+    precision = {sector: datos['exitos'] / datos['total'] * 100 for sector, datos in sectores.items()}
+    return {
+        'medio_central': precision.get('medio_central', 0),
+        'defensivo': precision.get('defensivo', 0) + precision.get('defensivo_lateral_derecho', 0) + precision.get('defensivo_lateral_izquierdo', 0),
+        'ofensivo': precision.get('ofensivo', 0) + precision.get('ofensivo_central', 0) + precision.get('ofensivo_area_chica', 0)
+    }
+
+
+def ref_duelos_aereos(jugador, acciones):
+    juego_aereo = jugador.get('juego_aereo', 70)
+    despejes = _de_tipo(acciones, 'Despeje')
+    if not despejes:
+        return juego_aereo
+    return (_exitosas(despejes) / len(despejes) * 100) * (juego_aereo / 100)
+
+
+def ref_indice_creacion(jugador, acciones, minutos_totales):
+    if minutos_totales == 0:
+        return 0
+    return (jugador.get('goles_temp', 0) + ref_asistencias(acciones) + ref_pases_clave(acciones)) / (minutos_totales / 90)
+
+
+def ref_eficiencia_defensiva(jugador, acciones):
+    return _exitosas(_de_tipo(acciones, 'Entrada', 'Intercepcion')) - jugador.get('faltas_temp', 0)
+
+
+def ref_mapa_calor(acciones):
+    conteo = Counter(a.get('sector', 'desconocido') for a in acciones)
+    total = sum(conteo.values())
+    return {sector: cantidad / total * 100 for sector, cantidad in conteo.items()} if total else {}
+
+
+def ref_impacto(acciones):
+    pesos = {'critica': 2.0, 'alta': 1.5, 'media': 1.0, 'baja': 0.5}
+    return sum(pesos.get(a.get('importancia', 'baja').lower(), 0.5) * (1 if a.get('exito') else 0) for a in acciones)
+
+
+def ref_tendencia_forma(jugador, acciones):
+    if not acciones:
+        return 0
+    fallos = len([a for a in acciones[-10:] if not a.get('exito')])
+    return -5 if fallos > 3 else 0
+
+
+# (función de estadistica_util, referencia, argumentos además de las acciones)
+CASOS = [
+    ('calcular_asistencias', ref_asistencias, 'acciones'),
+    ('calcular_pases_clave', ref_pases_clave, 'acciones'),
+    ('calcular_probabilidad_exito_pases', ref_exito_pases, 'jugador'),
+    ('calcular_probabilidad_precision_tiros', ref_precision_tiros, 'jugador'),
+    ('calcular_probabilidad_exito_regates', ref_exito_regates, 'jugador'),
+    ('calcular_probabilidad_recuperaciones', ref_recuperaciones, 'jugador'),
+    ('calcular_fatiga_desgaste', ref_fatiga, 'jugador'),
+    ('calcular_probabilidad_faltas', ref_faltas, 'jugador'),
+    ('calcular_contribucion_gol', ref_contribucion_gol, 'partidos'),
+    ('calcular_tasa_posesion_individual', ref_tasa_posesion, 'equipo'),
+    ('calcular_precision_bajo_presion', ref_precision_bajo_presion, 'acciones'),
+    ('calcular_duelos_aereos', ref_duelos_aereos, 'jugador'),
+    ('calcular_indice_creacion', ref_indice_creacion, 'minutos'),
+    ('calcular_eficiencia_defensiva', ref_eficiencia_defensiva, 'jugador'),
+    ('calcular_mapa_calor', ref_mapa_calor, 'acciones'),
+    ('calcular_impacto_resultado', ref_impacto, 'acciones'),
+    ('calcular_tendencia_forma', ref_tendencia_forma, 'jugador'),
+]
+
+
+def _argumentos(forma, jugador, acciones, caso):
+    if forma == 'acciones':
+        return (acciones,)
+    if forma == 'jugador':
+        return (jugador, acciones)
+    if forma == 'partidos':
+        return (jugador, acciones, caso['partidos_jugados'])
+    if forma == 'equipo':
+        return (acciones, caso['total_acciones_equipo'])
+    return (jugador, acciones, caso['partidos_jugados'] * 90)
+
+
+# ========== DATOS ==========
+
+@pytest.fixture(scope='module')
+def jugadores_sinteticos():
+    """
+    Por (jugador, selección): su documento, sus acciones en orden, los partidos jugados, las acciones de su
+    selección y los conteos de cada partido por separado (como los acumula `jugador_stats`).
+    """
+    datos = generar_torneo(equipos=8, jugadores_por_equipo=12, partidos=24, acciones_por_partido=160)
+    paises = {pais['id']: pais['nombre'] for pais in datos['paises']}
+    jugadores = {(j['nombre'], paises[j['pais_id']]): j for j in datos['jugadores']}
+
+    casos = defaultdict(lambda: {'acciones': [], 'partidos_jugados': 0, 'total_acciones_equipo': 0, 'por_partido': []})
+    for partido in datos['historial']:
+        acciones_equipo = Counter(accion['equipo'] for accion in partido['acciones'])
+        por_jugador = defaultdict(list)
+        for accion in partido['acciones']:
+            por_jugador[(accion['jugador'], accion['equipo'])].append(accion)
+        for clave, acciones in por_jugador.items():
+            caso = casos[clave]
+            caso['acciones'].extend(acciones)
+            caso['partidos_jugados'] += 1
+            caso['total_acciones_equipo'] += acciones_equipo[clave[1]]
+            caso['por_partido'].append(AcumuladorJugador(acciones).a_documento())
+
+    assert casos, "Los datos sintéticos no generaron acciones"
+    return [dict(caso, jugador=jugadores[clave]) for clave, caso in casos.items()]
+
+
+def _combinar(documentos):
+    """Suma los conteos por partido con la semántica de las actualizaciones de `jugador_stats` ($inc/$max/$push)."""
+    total = {'conteo_tipos': Counter(), 'exitos_tipos': Counter(), 'sectores': Counter(),
+             'presion_sectores': defaultdict(Counter), 'exitos_recientes': [], 'max_minuto': 0}
+    for documento in documentos:
+        for campo in ('total_acciones', 'tiros_area_chica', 'regates_medio_central', 'asistencias',
+                      'pases_clave', 'impacto'):
+            total[campo] = total.get(campo, 0) + documento[campo]
+        for campo in ('conteo_tipos', 'exitos_tipos', 'sectores'):
+            total[campo].update(documento[campo])
+        for sector, datos in documento['presion_sectores'].items():
+            total['presion_sectores'][sector].update(datos)
+        total['max_minuto'] = max(total['max_minuto'], documento['max_minuto'])
+        total['exitos_recientes'] = (total['exitos_recientes'] + documento['exitos_recientes'])[-estadistica_util.ACCIONES_RECIENTES:]
+    total['presion_sectores'] = {sector: dict(datos) for sector, datos in total['presion_sectores'].items()}
+    return total
+
+
+# ========== PRUEBAS ==========
+
+@pytest.mark.parametrize('funcion, referencia, forma', CASOS, ids=[caso[0] for caso in CASOS])
+def test_acumulador_igual_a_recorrer_acciones(jugadores_sinteticos, funcion, referencia, forma):
+    calcular = getattr(estadistica_util, funcion)
+    for caso in jugadores_sinteticos:
+        acumulado = AcumuladorJugador(caso['acciones'])
+        esperado = referencia(*_argumentos(forma, caso['jugador'], caso['acciones'], caso))
+        assert calcular(*_argumentos(forma, caso['jugador'], acumulado, caso)) == pytest.approx(esperado)
+        # La lista de acciones se sigue aceptando y da el mismo resultado
+        assert calcular(*_argumentos(forma, caso['jugador'], caso['acciones'], caso)) == pytest.approx(esperado)
+
+
+@pytest.mark.parametrize('funcion, referencia, forma', CASOS, ids=[caso[0] for caso in CASOS])
+def test_acumulador_materializado_igual_a_recorrer_acciones(jugadores_sinteticos, funcion, referencia, forma):
+    """Conteos sumados partido a partido y reconstruidos con desde_documento, como en el detalle materializado"""
+    calcular = getattr(estadistica_util, funcion)
+    for caso in jugadores_sinteticos:
+        acumulado = AcumuladorJugador.desde_documento(_combinar(caso['por_partido']))
+        esperado = referencia(*_argumentos(forma, caso['jugador'], caso['acciones'], caso))
+        assert calcular(*_argumentos(forma, caso['jugador'], acumulado, caso)) == pytest.approx(esperado)
+
+
+def test_documento_ida_y_vuelta(jugadores_sinteticos):
+    for caso in jugadores_sinteticos:
+        documento = AcumuladorJugador(caso['acciones']).a_documento()
+        assert AcumuladorJugador.desde_documento(documento).a_documento() == documento
+
+
+def test_sin_acciones():
+    jugador = {'precision_tiro': 80, 'regate': 75, 'juego_aereo': 60, 'agresividad': 40}
+    acumulado = AcumuladorJugador()
+    for funcion, referencia, forma in CASOS:
+        caso = {'partidos_jugados': 0, 'total_acciones_equipo': 0}
+        esperado = referencia(*_argumentos(forma, jugador, [], caso))
+        assert getattr(estadistica_util, funcion)(*_argumentos(forma, jugador, acumulado, caso)) == esperado, funcion
@@ -0,0 +1,75 @@
+"""
+Valida la respuesta de detalle de jugador (`construir_detalle_jugador`), que se arma como dict sin pasar
+por Pydantic, contra el schema `JugadorDetalleResponse`, independientemente de VALIDAR_RESPUESTAS.
+
+Uso (desde la raíz del proyecto):
+    python -m pytest tests
+"""
+import json
+from collections import Counter, defaultdict
+
+import pytest
+
+from Benchmarks.datos_sinteticos import generar_torneo
+from Schemas.jugador import JugadorDetalleResponse
+from Services import estadistica_service
+from Utils.estadistica_util import AcumuladorJugador
+
+
+@pytest.fixture(scope='module')
+def detalles_sinteticos():
+    """Argumentos de construir_detalle_jugador para cada jugador del torneo sintético."""
+    datos = generar_torneo(equipos=8, jugadores_por_equipo=14, partidos=16, acciones_por_partido=160)
+    paises = {pais['id']: pais['nombre'] for pais in datos['paises']}
+
+    acciones = defaultdict(list)
+    partidos = defaultdict(list)
+    total_equipo = Counter()
+    for partido in datos['historial']:
+        acciones_equipo = Counter(accion['equipo'] for accion in partido['acciones'])
+        presentes = set()
+        for accion in partido['acciones']:
+            clave = (accion['jugador'], accion['equipo'])
+            acciones[clave].append(accion)
+            presentes.add(clave)
+        for clave in presentes:
+            partidos[clave].append(str(partido['_id']))
+            total_equipo[clave] += acciones_equipo[clave[1]]
+
+    casos = []
+    for jugador in datos['jugadores']:
+        jugador = dict(jugador, pais=paises[jugador['pais_id']])
+        clave = (jugador['nombre'], jugador['pais'])
+        jugador['partidos_ids'] = partidos[clave]
+        casos.append((jugador, AcumuladorJugador(acciones[clave]), len(partidos[clave]), total_equipo[clave]))
+    return casos
+
+
+def _validar(respuesta):
+    """La respuesta debe pasar el schema y coincidir con su volcado (mismos campos y tipos: 1 != 1.0 en JSON)."""
+    volcado = JugadorDetalleResponse.model_validate(respuesta).model_dump()
+    assert json.dumps(volcado, sort_keys=True) == json.dumps(respuesta, sort_keys=True)
+
+
+def test_detalle_cumple_schema(detalles_sinteticos, monkeypatch):
+    monkeypatch.setattr(estadistica_service, 'VALIDAR_RESPUESTAS', False)
+    for jugador, acumulado, partidos_jugados, total_acciones_equipo in detalles_sinteticos:
+        _validar(estadistica_service.construir_detalle_jugador(jugador, acumulado, partidos_jugados, total_acciones_equipo))
+
+
+def test_detalle_igual_con_y_sin_validacion(detalles_sinteticos, monkeypatch):
+    for jugador, acumulado, partidos_jugados, total_acciones_equipo in detalles_sinteticos[:20]:
+        monkeypatch.setattr(estadistica_service, 'VALIDAR_RESPUESTAS', False)
+        sin_validar = estadistica_service.construir_detalle_jugador(jugador, acumulado, partidos_jugados, total_acciones_equipo)
+        monkeypatch.setattr(estadistica_service, 'VALIDAR_RESPUESTAS', True)
+        validada = estadistica_service.construir_detalle_jugador(jugador, acumulado, partidos_jugados, total_acciones_equipo)
+        assert sin_validar == validada
+
+
+def test_detalle_jugador_sin_atributos(monkeypatch):
+    """Un documento solo con nombre y país usa los valores por defecto de cada atributo."""
+    monkeypatch.setattr(estadistica_service, 'VALIDAR_RESPUESTAS', False)
+    respuesta = estadistica_service.construir_detalle_jugador(
+        {'nombre': 'Sin Datos', 'pais': 'Desconocido'}, AcumuladorJugador(), 0, 0)
+    _validar(respuesta)
+    assert respuesta['estadisticas_analiticas']['mapa_calor'] == {}